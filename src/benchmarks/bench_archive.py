@@ -0,0 +1,118 @@
+"""
+Rétention et archivage (composite_service/archive.py): un stockage rempli de demandes
+étalées sur `jours` jours est compacté avec une rétention de 7 jours. Mesure la durée de
+l'archivage, la taille de l'archive comparée à celle des mêmes enregistrements dans SQLite,
+et le coût d'une lecture d'une demande archivée comparé à une demande encore en base.
+
+Vérifie que les demandes restent lisibles (base ou archive), que les demandes en
+cours ne sont pas archivées, et qu'un WalStore rejoue ses suppressions.
+
+Usage: python benchmarks/bench_archive.py [demandes] [jours]   (défaut: 50 000 demandes, 30 jours)
+"""
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from composite_service.archive import Archive, RetentionPolicy, compact  # noqa: E402
+from composite_service.ids import PREFIX, _encode, _ms  # noqa: E402
+from composite_service.storage import SqliteStore, WalStore  # noqa: E402
+
+logging.disable(logging.INFO)
+
+TEXT = ("Nom du Client: Alice Dupont\nAdresse: 12 rue des Lilas, 75011 Paris\nMontant du Prêt Demandé: 180000\n"
+        "Revenu Mensuel: 4200\nDépenses Mensuelles: 1500\nDescription de la Propriété: appartement rénové")
+DECISION = {"approved": True, "message": "Approved", "interest_rate": 3.4,
+            "reasons": ["Credit score above threshold", "Debt ratio acceptable", "Property value sufficient"]}
+
+
+def records(count, days, now):
+    """Demandes créées entre `now - days` et `now`; une sur cent encore en cours."""
+    rng = random.Random(42)
+    result = {}
+    for k in range(count):
+        moment = now - timedelta(days=days * (count - k) / count)
+        request_id = PREFIX + _encode((_ms(moment) << 80) | rng.getrandbits(80))
+        done = k % 100 != 0
+        result[request_id] = {"text": TEXT, "status": "done" if done else "processing",
+                              "timestamp": moment.isoformat(), "last_update": moment.isoformat(),
+                              "result": DECISION if done else None}
+    return result
+
+
+def read_cost(get, ids, n=200):
+    start = time.perf_counter()
+    for i in range(n):
+        get(ids[i % len(ids)])
+    return (time.perf_counter() - start) / n * 1000
+
+
+def db_size(path):
+    """Taille de la base SQLite une fois le journal WAL recopié dans le fichier principal."""
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    return os.path.getsize(path)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    tmp = tempfile.mkdtemp()
+    now = datetime.utcnow()
+    data = records(count, days, now)
+    print(f"⏱️  {count:,} requests over {days} days, 7-day retention\n")
+
+    path = os.path.join(tmp, "db.sqlite3")
+    store = SqliteStore(path)
+    store.import_records(data)
+    before = db_size(path)
+    archive = Archive(os.path.join(tmp, "archive"))
+
+    start = time.perf_counter()
+    summary = compact(store, archive, RetentionPolicy(max_age_days=7))
+    elapsed = time.perf_counter() - start
+    store.vacuum()
+    after = db_size(path)
+    stats = archive.stats()
+    print(f"compaction       {elapsed:8.2f} s   {summary['archived']:,} archived into {stats['segments']} segments")
+    print(f"sqlite           {before / 1e6:8.1f} MB -> {after / 1e6:.1f} MB")
+    print(f"archive          {stats['bytes'] / 1e6:8.1f} MB   ({stats['bytes'] / max(summary['archived'], 1):.0f} "
+          f"bytes per request, sqlite {before / count:.0f})")
+
+    live = {rid for rid in data if store.get(rid) is not None}
+    archived = [rid for rid in data if rid not in live]
+    print(f"read (store)     {read_cost(store.get, sorted(live)):8.3f} ms")
+    print(f"read (archive)   {read_cost(archive.get, archived):8.3f} ms")
+
+    # Demandes en base toutes vérifiées, demandes archivées sur un échantillon (une lecture de segment chacune)
+    sample = random.Random(7).sample(archived, min(2000, len(archived)))
+    unreachable = sum(1 for rid in live if store.get(rid) != data[rid])
+    unreachable += sum(1 for rid in sample if archive.get(rid) != data[rid])
+    unreachable += len(archived) - stats["records"]
+    pending_archived = sum(1 for rid in archived if data[rid]["status"] != "done")
+    again = compact(store, archive, RetentionPolicy(max_age_days=7))
+
+    # Les suppressions d'un WalStore doivent survivre au rejeu du journal
+    wal = WalStore(os.path.join(tmp, "db.wal"))
+    wal.import_records(data)
+    compact(wal, Archive(os.path.join(tmp, "archive-wal")), RetentionPolicy(max_records=1000))
+    kept = wal.stats()["requests"]
+    wal.close()
+    replayed = WalStore(wal.path)
+    wal_ok = replayed.stats()["requests"] == kept and len(list(replayed.items())) == kept
+    replayed.close()
+    print(f"\nwal: {kept:,} requests kept with max_records=1000, replay {'matches' if wal_ok else 'differs'}")
+
+    if unreachable or pending_archived or again["archived"] or not wal_ok:
+        print(f"\n❌ {unreachable} unreachable, {pending_archived} pending requests archived, "
+              f"{again['archived']} archived twice")
+        sys.exit(1)
+    print("\n✅ Every request readable from the store or the archive")
@@ -0,0 +1,74 @@
+"""
+Latence par demande: clients suds recréés à chaque appel (ancien comportement)
+contre le pool partagé du composite.
+
+Prérequis: services enfants démarrés (python main.py).
+Usage: python benchmarks/bench_client_pool.py [iterations]
+"""
+import json
+import os
+import statistics
+import sys
+import time
+
+from suds.client import Client
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from composite_service.client_pool import ClientPool  # noqa: E402
+from composite_service.service_composite import IE_URL, CC_URL, PE_URL, DS_URL  # noqa: E402
+
+LOAN_TEXT = """
+Nom du Client: Marc Lefevre
+Adresse: 25 Avenue des Sciences, Lyon
+Email: marc.lefevre@email.com
+Numéro de Téléphone: +33677889900
+Montant du Prêt Demandé: 200000
+Revenu Mensuel: 6500
+Dépenses Mensuelles: 1500
+Description de la Propriété: Maison individuelle récente de 120m² avec jardin.
+"""
+
+
+def chain(call):
+    """Enchaîne IE -> CC -> PE -> DS avec la fonction d'appel fournie."""
+    extracted = call("ie", "extract_information", LOAN_TEXT)
+    cc = json.loads(call("cc", "check_credit", extracted))
+    pe = json.loads(call("pe", "evaluate_property", extracted))
+    parsed = json.loads(extracted)
+    call("ds", "make_decision", json.dumps({
+        "credit_score": cc.get("credit_score", 0),
+        "property_value": pe.get("property_value", 0),
+        "loan_amount": float(parsed.get("montant_pret", 0)),
+        "revenu_mensuel": parsed.get("revenu_mensuel", 0),
+        "depenses_mensuelles": parsed.get("depenses_mensuelles", 0),
+    }))
+
+
+def measure(label, call, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        chain(call)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{label:<22} mean={statistics.mean(samples):8.2f} ms  "
+          f"p50={statistics.median(samples):8.2f} ms  p95={p95:8.2f} ms")
+    return statistics.mean(samples)
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    urls = {"ie": IE_URL, "cc": CC_URL, "pe": PE_URL, "ds": DS_URL}
+
+    def fresh_clients(name, operation, *args):
+        # Comportement d'origine: nouveau Client (téléchargement + parsing du WSDL) à chaque appel
+        return getattr(Client(urls[name]).service, operation)(*args)
+
+    pool = ClientPool(urls)
+    pool.warm()
+
+    print(f"⏱️  {iterations} loan decisions (4 child calls each)\n")
+    before = measure("fresh Client() per call", fresh_clients, iterations)
+    after = measure("shared ClientPool", pool.call, iterations)
+    print(f"\n🚀 Speedup: x{before / after:.1f}")
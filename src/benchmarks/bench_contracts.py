@@ -0,0 +1,138 @@
+"""
+Contrat v1 (JSON indenté dans une chaîne) contre contrat v2 (types du WSDL, opérations
+*_v2): taille des messages SOAP et coût CPU par saut, côté client (suds + JSON) et côté
+service (Spyne + validation lxml + JSON). Les services sont appelés dans ce processus
+par un transport suds qui passe directement les requêtes à leur application WSGI, sans
+réseau, pour ne mesurer que la sérialisation. Vérifie aussi que v1 et v2 retournent les
+mêmes données.
+
+Usage: python benchmarks/bench_contracts.py [appels_par_opération]   (défaut: 300)
+"""
+import io
+import logging
+import os
+import random
+import sys
+import time
+from wsgiref.util import setup_testing_defaults
+
+from suds.client import Client
+from suds.transport import Reply, Transport
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spyne.server.wsgi import WsgiApplication  # noqa: E402
+from services import information_extraction, credit_check, property_evaluation, decision_service  # noqa: E402
+from composite_service.transport import OPERATIONS, SoapTransport  # noqa: E402
+from composite_service.service_composite import _decision_input  # noqa: E402
+
+logging.disable(logging.INFO)
+
+APPS = {
+    "ie": (information_extraction.app, "InformationExtractionService"),
+    "cc": (credit_check.app, "CreditCheckService"),
+    "pe": (property_evaluation.app, "PropertyEvaluationService"),
+    "ds": (decision_service.app, "DecisionService"),
+}
+LOAN_TEXT = """
+Nom du Client: Marc Lefevre
+Adresse: 25 Avenue des Sciences, Lyon
+Email: marc.lefevre@email.com
+Numéro de Téléphone: +33 6 12 34 56 78
+Montant du Prêt Demandé: 200000
+Revenu Mensuel: 6500
+Dépenses Mensuelles: 1500
+Description de la Propriété: Maison individuelle récente avec jardin. État du bien excellent & lumineux.
+"""
+
+
+class WsgiTransport(Transport):
+    """Transport suds qui appelle l'application WSGI dans le processus et mesure le service."""
+
+    def __init__(self, app):
+        Transport.__init__(self)
+        self.app = app
+        self.server_time = 0.0
+        self.sent = self.received = 0
+
+    def _call(self, method, url, body=b""):
+        path, _, query = url.partition("?")
+        environ = {"REQUEST_METHOD": method, "PATH_INFO": "/" + path.split("/", 3)[-1],
+                   "QUERY_STRING": query, "CONTENT_LENGTH": str(len(body)),
+                   "CONTENT_TYPE": "text/xml; charset=utf-8", "wsgi.input": io.BytesIO(body)}
+        setup_testing_defaults(environ)
+        status = []
+        start = time.perf_counter()
+        chunks = self.app(environ, lambda s, headers, exc_info=None: status.append(s))
+        data = b"".join(chunks)
+        self.server_time += time.perf_counter() - start
+        return int(status[0].split()[0]), data
+
+    def open(self, request):
+        return io.BytesIO(self._call("GET", request.url)[1])
+
+    def send(self, request):
+        code, data = self._call("POST", request.url, request.message)
+        self.sent += len(request.message)
+        self.received += len(data)
+        return Reply(code, {}, data)
+
+
+class LocalPool:
+    """Même interface que ClientPool (call), sur des clients suds branchés sur WsgiTransport."""
+
+    def __init__(self):
+        self.transports, self.clients = {}, {}
+        for stage, (app, path) in APPS.items():
+            transport = self.transports[stage] = WsgiTransport(WsgiApplication(app))
+            self.clients[stage] = Client(f"http://localhost/{path}?wsdl", transport=transport, cache=None)
+
+    def call(self, stage, operation, *args):
+        return getattr(self.clients[stage].service, operation)(*args)
+
+
+def run(pool, transport, payload, calls):
+    wsgi = pool.transports[transport.stage]
+    wsgi.server_time, wsgi.sent, wsgi.received = 0.0, 0, 0
+    start = time.perf_counter()
+    for _ in range(calls):
+        random.seed(0)  # PE est aléatoire: même tirage pour v1 et v2
+        result = transport(payload)
+    total = time.perf_counter() - start
+    return result, {
+        "request": wsgi.sent / calls, "response": wsgi.received / calls,
+        "client": (total - wsgi.server_time) / calls * 1e6, "server": wsgi.server_time / calls * 1e6,
+    }
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    pool = LocalPool()
+    print(f"⏱️  {calls} calls per operation, sizes in bytes per message, CPU in µs per call\n")
+    print(f"{'operation':<22}{'contract':>9}{'request':>9}{'response':>10}{'client':>9}{'service':>9}")
+
+    outputs = {}  # sortie v1 de chaque étape, entrée des suivantes
+    totals = {"v1": [0.0] * 4, "v2": [0.0] * 4}
+    for stage in ("ie", "cc", "pe", "ds"):
+        if stage == "ie":
+            payload = LOAN_TEXT
+        elif stage == "ds":
+            payload = _decision_input(outputs["ie"], outputs["cc"], outputs["pe"])
+        else:
+            payload = outputs["ie"]
+        results = {}
+        for contract in ("v1", "v2"):
+            results[contract], m = run(pool, SoapTransport(pool, stage, contract), payload, calls)
+            values = [m["request"], m["response"], m["client"], m["server"]]
+            totals[contract] = [t + v for t, v in zip(totals[contract], values)]
+            print(f"{OPERATIONS[stage][1]:<22}{contract:>9}{values[0]:9,.0f}{values[1]:10,.0f}"
+                  f"{values[2]:9,.0f}{values[3]:9,.0f}")
+        outputs[stage] = results["v1"]
+        expected = {k: v for k, v in results["v1"].items() if k != "texte_original"}
+        if results["v2"] != expected:
+            print(f"\n❌ {stage}: v2 result differs from v1\n{expected}\n{results['v2']}")
+            sys.exit(1)
+
+    print()
+    for contract, (request, response, client, server) in totals.items():
+        print(f"{'whole pipeline':<22}{contract:>9}{request:9,.0f}{response:10,.0f}{client:9,.0f}{server:9,.0f}")
+    print("\n✅ v1 and v2 return the same data on every operation")
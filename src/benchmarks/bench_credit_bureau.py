@@ -0,0 +1,63 @@
+"""
+Bureau de crédit: appels HTTP directs contre le même bureau derrière CachedBureau.
+Un bureau HTTP de remplacement (latence simulée) est lancé dans ce processus; les
+demandeurs sont tirés avec répétitions (quelques noms fréquents, beaucoup de noms
+rares) et interrogés depuis plusieurs threads, comme sous le pool de Twisted.
+
+Usage: python benchmarks/bench_credit_bureau.py [appels] [latence_s] [threads]
+       (défaut: 2000 appels, 0.02 s, 16 threads)
+"""
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.credit_bureau import CachedBureau, HttpBureau, SimulatedBureau, make_server  # noqa: E402
+
+PORT = 8010
+
+
+def workload(calls, seed=11):
+    """Noms tirés selon une loi de puissance: 500 demandeurs distincts, les premiers très fréquents."""
+    rng = random.Random(seed)
+    names = [f"Client {i:04d}" for i in range(500)]
+    weights = [1 / (rank + 1) for rank in range(len(names))]
+    return rng.choices(names, weights, k=calls)
+
+
+def run(label, bureau, names, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(bureau.lookup, names))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<8} {elapsed:7.2f} s  ({len(names) / elapsed:8,.0f} lookups/s)")
+    return results, elapsed
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+
+    server = make_server(PORT, latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{PORT}"
+    names = workload(calls)
+    print(f"⏱️  {calls:,} lookups ({len(set(names))} distinct names), bureau latency {latency * 1000:.0f} ms, "
+          f"{threads} threads\n")
+
+    expected, direct = run("direct", HttpBureau(url), names, threads)
+    cached_bureau = CachedBureau(HttpBureau(url), max_entries=10000, ttl=300)
+    results, cached = run("cached", cached_bureau, names, threads)
+    server.shutdown()
+
+    reference = SimulatedBureau()
+    if results != expected or any(r != reference.lookup(n) for r, n in zip(results, names)):
+        print("\n❌ Cached records differ from the bureau")
+        sys.exit(1)
+    print(f"\n✅ Identical records on all {calls:,} lookups")
+    print(f"📊 Cache: {cached_bureau.stats()}")
+    print(f"🚀 Speedup: x{direct / cached:.1f}")
@@ -0,0 +1,65 @@
+"""
+Score de crédit: boucle scalaire (score_applicant) contre moteur vectorisé (compute_credit_scores).
+Vérifie que les deux donnent exactement les mêmes scores sur tous les demandeurs générés.
+
+Usage: python benchmarks/bench_credit_scoring.py [nombre_de_demandeurs]   (défaut: 1 000 000)
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.credit_check import score_applicant, compute_credit_scores  # noqa: E402
+
+
+def generate(n, seed=42):
+    """Colonnes synthétiques réalistes (revenus, dépenses, montants, bureau...)."""
+    rng = np.random.default_rng(seed)
+    revenu = rng.integers(0, 15000, n).astype(np.float64)
+    return {
+        "revenu_mensuel": revenu,
+        "depenses_mensuelles": np.where(rng.random(n) < 0.05, 0.0, np.floor(revenu * rng.uniform(0.1, 1.3, n))),
+        "montant_pret": rng.integers(10000, 800000, n).astype(np.float64),
+        "age": rng.integers(18, 80, n),
+        "emploi_stable": rng.random(n) < 0.8,
+        "score_bureau": rng.integers(400, 851, n),
+        "retards_paiement": rng.integers(0, 4, n),
+        "dettes_en_cours": rng.integers(0, 6, n),
+    }
+
+
+def scalar_scores(cols):
+    rows = zip(*(cols[k].tolist() for k in (
+        "revenu_mensuel", "depenses_mensuelles", "montant_pret", "age", "emploi_stable",
+        "score_bureau", "retards_paiement", "dettes_en_cours")))
+    return [
+        score_applicant(revenu, depense, montant, age, emploi, {
+            "score_bureau": score, "retards_paiement": retards, "dettes_en_cours": dettes
+        })
+        for revenu, depense, montant, age, emploi, score, retards, dettes in rows
+    ]
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    cols = generate(n)
+    print(f"⏱️  Scoring {n:,} applicants\n")
+
+    start = time.perf_counter()
+    expected = scalar_scores(cols)
+    scalar_time = time.perf_counter() - start
+    print(f"scalar      {scalar_time:8.3f} s  ({n / scalar_time:12,.0f} applicants/s)")
+
+    start = time.perf_counter()
+    scores = compute_credit_scores(**cols)
+    vector_time = time.perf_counter() - start
+    print(f"vectorized  {vector_time:8.3f} s  ({n / vector_time:12,.0f} applicants/s)")
+
+    mismatches = int(np.count_nonzero(scores != np.asarray(expected)))
+    if mismatches:
+        print(f"\n❌ {mismatches} scores differ from the scalar function")
+        sys.exit(1)
+    print(f"\n✅ All {n:,} scores identical to score_applicant")
+    print(f"🚀 Speedup: x{scalar_time / vector_time:.1f}")
@@ -0,0 +1,109 @@
+"""
+Extraction d'informations: implémentation d'origine (8 re.search par appel, motifs
+reconstruits à chaque fois) contre le moteur compilé une seule fois (ExtractionEngine).
+Les textes sont longs et bruités (lignes parasites, espaces multiples, champs absents)
+et les deux implémentations doivent produire exactement les mêmes champs.
+
+Usage: python benchmarks/bench_extraction.py [nombre_de_textes]
+"""
+import logging
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.information_extraction import ENGINE, clean_text  # noqa: E402
+
+logging.disable(logging.WARNING)
+
+CITIES = ["Paris", "Lyon", "Marseille", "Toulouse", "Lille", "Nantes", "Bordeaux", "Montpellier"]
+NOISE = [
+    "Merci de traiter ma demande rapidement.",
+    "Référence dossier:   A-{n}   (transmis par l'agence)",
+    "Commentaire du conseiller\t: client fidèle depuis {n} ans.",
+    "PS : je reste disponible par téléphone le matin.",
+    "Pièces jointes : bulletins de salaire, avis d'imposition, relevés bancaires.",
+]
+
+
+def legacy_extract(text):
+    """Copie de l'extraction d'origine (avant ExtractionEngine), champ texte_original exclu."""
+    text = re.sub(r'\s+', ' ', text.replace('\n', ' ')).strip()
+    patterns = {
+        "nom": r"(?:Nom du Client|Nom)\s*:\s*([A-Za-zÀ-ÿ'\-\s]+)",
+        "adresse": r"(?:Adresse|Adresse du Bien)\s*:\s*(.*?)(?=\s*(?:Email|Montant|$))",
+        "email": r"(?:Email|Courriel)\s*:\s*([\w\.-]+@[\w\.-]+\.\w+)",
+        "telephone": r"(?:Numéro de Téléphone|Téléphone)\s*:\s*([\d\+\-\s]+)",
+        "montant_pret": r"(?:Montant du Prêt Demandé|Montant)\s*:\s*([\d\s]+)",
+        "revenu_mensuel": r"(?:Revenu Mensuel|Revenu)\s*:\s*([\d\s]+)",
+        "depenses_mensuelles": r"(?:Dépenses Mensuelles|Dépenses)\s*:\s*([\d\s]+)",
+        "description": r"(?:Description de la Propriété|Description)\s*:\s*(.*)"
+    }
+    data = {}
+    for key, pat in patterns.items():
+        match = re.search(pat, text, re.IGNORECASE)
+        if match:
+            value = re.sub(r'\s+', ' ', match.group(1).replace('\n', ' ')).strip()
+            if key in ["montant_pret", "revenu_mensuel", "depenses_mensuelles"]:
+                try:
+                    value = float(value.replace(" ", "").replace(",", "."))
+                except ValueError:
+                    value = 0.0
+            data[key] = value
+    defaults = {
+        "nom": "Inconnu", "adresse": "Non spécifiée", "email": "unknown@email.com", "telephone": "N/A",
+        "montant_pret": 0.0, "revenu_mensuel": 0.0, "depenses_mensuelles": 0.0,
+        "description": "Aucune description fournie"
+    }
+    for key, default in defaults.items():
+        data.setdefault(key, default)
+    return data
+
+
+def noisy_text(rng, n):
+    lines = [
+        f"Nom du Client :   {rng.choice(['Jeanne', 'Marc', 'Sophie', 'Julien'])} {rng.choice(['Petit', 'Durand', 'Martin'])}",
+        f"Adresse: {rng.randint(1, 99)} Rue des Fleurs, {rng.choice(CITIES)}",
+        f"EMAIL : client{n}@email.com",
+        f"Numéro de Téléphone: +33 6 {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)}",
+        f"Montant du Prêt Demandé: {rng.randint(50, 800)} 000",
+        f"Revenu Mensuel: {rng.randint(1000, 12000)}",
+        f"Dépenses Mensuelles: {rng.randint(300, 6000)}",
+        "Description de la Propriété: " + " ".join(rng.choice(
+            ["Maison", "appartement", "ancien", "rénové", "avec jardin", "proche", "des commerces", "travaux"]
+        ) for _ in range(rng.randint(20, 80))),
+    ]
+    rng.shuffle(lines[2:7])
+    if rng.random() < 0.2:
+        lines.pop(rng.randrange(len(lines) - 1))  # champ absent
+    for _ in range(rng.randint(5, 30)):
+        lines.insert(rng.randrange(len(lines)), rng.choice(NOISE).format(n=rng.randint(1, 9999)) + "   \n")
+    return "\n\n".join(lines)
+
+
+def run(label, func, texts):
+    start = time.perf_counter()
+    results = [func(text) for text in texts]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {elapsed:7.3f} s  ({len(texts) / elapsed:10,.0f} texts/s)")
+    return results, elapsed
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = random.Random(3)
+    texts = [noisy_text(rng, n) for n in range(count)]
+    avg_len = sum(map(len, texts)) / count
+    print(f"⏱️  {count:,} noisy texts (~{avg_len:,.0f} characters each)\n")
+
+    expected, before = run("original", legacy_extract, texts)
+    results, after = run("engine", lambda text: ENGINE.extract(clean_text(text)), texts)
+
+    mismatches = sum(1 for a, b in zip(expected, results) if a != b)
+    if mismatches:
+        print(f"\n❌ {mismatches} texts extracted differently")
+        sys.exit(1)
+    print(f"\n✅ Identical fields on all {count:,} texts")
+    print(f"🚀 Speedup: x{before / after:.1f}")
@@ -0,0 +1,185 @@
+"""
+Microbenchmarks des fonctions métier (sans réseau) avec contrôle de régression:
+clean_text, extract_information_data, compute_credit_score, evaluate_property_value,
+analyze_risk et apply_policies sont chronométrées sur des jeux de données fixes (demandes
+générées par benchmarks/loadgen.py avec une graine fixe, puis passées d'une étape à la
+suivante comme dans le composite).
+
+Pour chaque fonction: temps par appel (µs), meilleur et médiane de --repeat passages sur
+tout le jeu, et coût relatif (médiane du rapport au travail de calibration mesuré avant
+chaque passage). La comparaison à la référence porte sur le coût relatif, peu sensible
+à la vitesse de la machine au moment de l'exécution: une fonction plus lente de plus de
+--threshold (20 % par défaut, LOAN_BENCH_THRESHOLD) fait échouer l'exécution (code de
+sortie 1), si elle l'est encore à une seconde mesure.
+
+Usage:
+    python benchmarks/bench_functions.py --update          # mesure et enregistre la référence
+    python benchmarks/bench_functions.py                   # mesure et compare à la référence
+    python benchmarks/bench_functions.py --threshold 0.1 --only extract_information_data
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.loadgen import loan_text  # noqa: E402
+from services.information_extraction import clean_text, extract_information_data  # noqa: E402
+from services.credit_check import compute_credit_score  # noqa: E402
+from services.property_evaluation import evaluate_property_value  # noqa: E402
+from services.decision_service import analyze_risk, apply_policies  # noqa: E402
+
+logging.disable(logging.WARNING)
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(SRC, "logs", "bench_functions_baseline.json")
+DEFAULT_THRESHOLD = float(os.environ.get("LOAN_BENCH_THRESHOLD", "0.20"))
+
+
+def fixtures(size, seed=42):
+    """Entrées de chaque fonction: textes bruts, puis sorties de l'étape précédente."""
+    rng = random.Random(seed)
+    texts = [loan_text(rng) for _ in range(size)]
+    parsed = [extract_information_data(t) for t in texts]
+    random.seed(seed)
+    decisions = []
+    for p in parsed:
+        score, _ = compute_credit_score(p)
+        value, _ = evaluate_property_value(p)
+        decisions.append({"credit_score": score, "property_value": value, "loan_amount": p["montant_pret"],
+                          "revenu_mensuel": p["revenu_mensuel"], "depenses_mensuelles": p["depenses_mensuelles"],
+                          "emploi_stable": True})
+    risks = [analyze_risk(d) for d in decisions]
+    return {"texts": texts, "parsed": parsed, "decisions": decisions, "risks": risks}
+
+
+# nom -> (fonction, jeu de données)
+CASES = {
+    "clean_text": (clean_text, "texts"),
+    "extract_information_data": (extract_information_data, "texts"),
+    "compute_credit_score": (compute_credit_score, "parsed"),
+    "evaluate_property_value": (evaluate_property_value, "parsed"),
+    "analyze_risk": (analyze_risk, "decisions"),
+    "apply_policies": (apply_policies, "risks"),
+}
+
+
+def calibration(item):
+    """Travail de référence en Python pur (dict, flottants, chaînes), chronométré à côté de
+    chaque passage: la vitesse de la machine varie d'une exécution à l'autre (fréquence,
+    voisins sur une VM), le rapport fonction / référence beaucoup moins."""
+    total = 0.0
+    for key, value in item.items():
+        total += len(f"{key}={value}") * 1.5
+    return total
+
+
+def per_call(func, items):
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def measure(func, items, reference, repeat):
+    """Temps par appel (µs) de chaque passage sur `items`, et rapport au travail de référence
+    mesuré juste avant sur le jeu `reference`."""
+    timings, ratios = [], []
+    for _ in range(repeat):
+        gc.collect()
+        base = per_call(calibration, reference)
+        random.seed(0)  # evaluate_property_value tire surface, litige et ajustement au hasard
+        timings.append(per_call(func, items))
+        ratios.append(timings[-1] / base)
+    return timings, ratios
+
+
+def run(names, data, repeat):
+    results = {}
+    for name in names:
+        func, dataset = CASES[name]
+        func(data[dataset][0])  # premier appel (caches, imports paresseux) hors mesure
+        timings, ratios = measure(func, data[dataset], data["decisions"], repeat)
+        results[name] = {"best_us": round(min(timings), 3), "median_us": round(statistics.median(timings), 3),
+                         "relative": round(statistics.median(ratios), 4), "calls": len(data[dataset])}
+    return results
+
+
+def regressions(results, baseline, threshold):
+    """Lignes de comparaison et noms des fonctions plus lentes que la référence au-delà du seuil."""
+    lines, failed = [], []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            lines.append(f"{name:<26}{result['best_us']:8.2f} µs   (no baseline)")
+            continue
+        change = result["relative"] / reference["relative"] - 1
+        regressed = change > threshold
+        failed += [name] if regressed else []
+        lines.append(f"{name:<26}{reference['best_us']:8.2f} -> {result['best_us']:7.2f} µs   relative "
+                     f"{reference['relative']:7.3f} -> {result['relative']:7.3f}  {change * 100:+6.1f} %"
+                     f"{'  ❌ regression' if regressed else ''}")
+    return lines, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the business functions with a regression gate")
+    parser.add_argument("--size", type=int, default=2000, help="items per dataset (default 2000)")
+    parser.add_argument("--repeat", type=int, default=7, help="passes over each dataset (default 7)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="+", choices=sorted(CASES), help="benchmark these functions only")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="stored results to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before failing, as a fraction (default 0.20)")
+    parser.add_argument("--update", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--output", help="also write this run's results to this file")
+    args = parser.parse_args()
+
+    names = args.only or list(CASES)
+    print(f"⏱️  {len(names)} functions, {args.size} items, best of {args.repeat} passes\n")
+    results = run(names, fixtures(args.size, args.seed), args.repeat)
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPU",
+        "size": args.size, "repeat": args.repeat, "seed": args.seed,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update or not os.path.exists(args.baseline):
+        if args.only and os.path.exists(args.baseline):
+            # Mise à jour partielle: les autres fonctions gardent leur référence
+            with open(args.baseline, encoding="utf-8") as f:
+                report["results"] = dict(json.load(f)["results"], **results)
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        for name, result in results.items():
+            print(f"{name:<26}{result['best_us']:8.2f} µs  (median {result['median_us']:.2f}, relative {result['relative']:.3f})")
+        print(f"\n✅ Baseline written to {args.baseline}")
+        sys.exit(0)
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if (baseline.get("size"), baseline.get("seed")) != (args.size, args.seed):
+        print(f"⚠️  Baseline was measured with size={baseline.get('size')} seed={baseline.get('seed')}")
+    lines, failed = regressions(results, baseline["results"], args.threshold)
+    if failed:
+        # Un pic de charge de la machine peut ralentir un passage: on remesure avant d'échouer
+        results.update(run(failed, fixtures(args.size, args.seed), args.repeat))
+        lines, failed = regressions(results, baseline["results"], args.threshold)
+    print("\n".join(lines))
+    if failed:
+        print(f"\n❌ {len(failed)} function(s) slower than the baseline by more than {args.threshold:.0%}: "
+              f"{', '.join(failed)}")
+        sys.exit(1)
+    print(f"\n✅ No function slower than the baseline by more than {args.threshold:.0%}")
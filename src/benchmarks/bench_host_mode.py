@@ -0,0 +1,105 @@
+"""
+Mode hôte (host.py, un processus) contre le déploiement habituel (cinq processus):
+temps de démarrage à froid jusqu'à ce que les cinq WSDL répondent, mémoire résidente
+totale (RSS, Linux) et latence de submitRequest vue d'un client SOAP.
+
+Usage: python benchmarks/bench_host_mode.py [requêtes]   (défaut: 50)
+"""
+import os
+import subprocess
+import sys
+import time
+from urllib.request import urlopen
+
+from suds.client import Client
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SRC)
+from main import SERVICES, HOST_SERVICES  # noqa: E402
+
+COMPOSITE = "http://127.0.0.1:8000/LoanEvaluationService?wsdl"
+WSDLS = [f"http://127.0.0.1:{port}/{path}?wsdl" for _, _, port, path, _ in SERVICES]
+LOAN_TEXT = """
+Nom du Client: Marc Lefevre
+Adresse: 25 Avenue des Sciences, Lyon
+Email: marc.lefevre@email.com
+Montant du Prêt Demandé: 200000
+Revenu Mensuel: 6500
+Dépenses Mensuelles: 1500
+Description de la Propriété: Maison individuelle récente avec jardin. État du bien excellent.
+"""
+
+
+def ready(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urlopen(url, timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def rss_kb(pid):
+    """Mémoire résidente d'un processus (kB), 0 si indisponible."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def start(services):
+    """Lance `services` (format de main.py) en respectant leurs dépendances; retourne (processus, durée)."""
+    env = dict(os.environ)
+    env.pop("LOAN_TRANSPORT", None)
+    procs, done = [], set()
+    t0 = time.monotonic()
+    pending = list(services)
+    while pending:
+        wave = [s for s in pending if all(dep in done for dep in s[4])]
+        pending = [s for s in pending if s not in wave]
+        for name, script, port, path, _ in wave:
+            procs.append(subprocess.Popen([sys.executable, script], cwd=SRC, env=env,
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        for name, script, port, path, _ in wave:
+            if not ready(f"http://127.0.0.1:{port}/{path}?wsdl"):
+                raise RuntimeError(f"{name} did not start")
+            done.add(name)
+    if not all(ready(url) for url in WSDLS):
+        raise RuntimeError("some WSDL endpoints are not served")
+    return procs, time.monotonic() - t0
+
+
+def measure(label, services, requests):
+    procs, cold_start = start(services)
+    try:
+        client = Client(COMPOSITE)
+        client.service.submitRequest(LOAN_TEXT)  # premier appel: chargement des clients SOAP
+        start_time = time.perf_counter()
+        for _ in range(requests):
+            client.service.submitRequest(LOAN_TEXT)
+        latency = (time.perf_counter() - start_time) / requests * 1000
+        rss = sum(rss_kb(p.pid) for p in procs) / 1024
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.wait()
+    print(f"{label:<14} {len(procs)} process(es)  cold start {cold_start:5.2f} s  "
+          f"RSS {rss:6.1f} MB  submitRequest {latency:6.1f} ms")
+    time.sleep(1)
+    return cold_start, rss, latency
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(f"⏱️  Cold start, resident memory and latency over {requests} submitRequest calls\n")
+    before = measure("five services", SERVICES, requests)
+    after = measure("host mode", HOST_SERVICES, requests)
+    print(f"\n🚀 Saved: {before[0] - after[0]:.2f} s cold start, {before[1] - after[1]:.1f} MB RSS, "
+          f"{before[2] - after[2]:.1f} ms per request")
@@ -0,0 +1,126 @@
+"""
+waitForResult (composite_service/longpoll.py) avec de nombreux clients en attente.
+
+À lancer contre un composite en mode asynchrone, de préférence avec un seul worker de
+traitement pour que les demandes se terminent l'une après l'autre:
+
+    LOAN_ASYNC=1 LOAN_ASYNC_WORKERS=1 python composite_service/service_composite.py
+
+Soumet `demandes` demandes, puis ouvre `clients` connexions waitForResult réparties sur
+ces demandes. Pendant l'attente, getResult doit rester rapide (le pool Twisted n'est pas
+occupé par les attentes) et /metrics doit compter les attentes (loan_result_waiters).
+Mesure le délai de réponse de chaque client depuis la fin de sa demande (last_update), ou
+depuis son envoi si la demande était déjà terminée.
+Chaque réveil coûte une réponse Spyne: des centaines de clients sur une même demande se
+partagent le pool le temps de leurs réponses. Pour comparaison, un client qui interroge getResult toutes les 0,5 s attend en moyenne
+0,25 s de plus et envoie une requête par intervalle.
+
+Usage: python benchmarks/bench_long_poll.py [clients] [demandes]   (défaut: 1000 clients, 200 demandes)
+"""
+import asyncio
+import http.client
+import json
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.bench_workers import envelope  # noqa: E402
+from benchmarks.loadgen import percentile  # noqa: E402
+
+HOST, PORT, PATH = "127.0.0.1", 8000, "/LoanEvaluationService"
+TNS = "loan.composite"
+HEADERS = {"Content-Type": "text/xml; charset=utf-8", "SOAPAction": '""'}
+
+
+def call(operation, param, argument):
+    conn = http.client.HTTPConnection(HOST, PORT, timeout=60)
+    conn.request("POST", PATH, envelope(TNS, operation, param, argument), HEADERS)
+    payload = conn.getresponse().read()
+    conn.close()
+    return json.loads(ET.fromstring(payload).find(f".//{{{TNS}}}{operation}Result").text)
+
+
+def wait_body(request_id, timeout):
+    return (
+        '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" '
+        f'xmlns:tns="{TNS}"><soapenv:Body><tns:waitForResult><tns:request_id>{request_id}</tns:request_id>'
+        f'<tns:timeout>{timeout}</tns:timeout></tns:waitForResult></soapenv:Body></soapenv:Envelope>'
+    ).encode("utf-8")
+
+
+async def wait_for(request_id, timeout):
+    """Un client waitForResult sur sa propre connexion: (request_id, statut, envoi, réponse)."""
+    body = wait_body(request_id, timeout)
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    writer.write(f"POST {PATH} HTTP/1.1\r\nHost: {HOST}\r\nContent-Type: text/xml; charset=utf-8\r\n"
+                 f"SOAPAction: \"\"\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    sent = datetime.utcnow()
+    payload = await reader.read()
+    answered = datetime.utcnow()
+    writer.close()
+    match = re.search(rb"<tns:waitForResultResult>(.*?)</tns:waitForResultResult>", payload, re.S)
+    if match is None:
+        match = re.search(rb"waitForResultResult>(.*?)</", payload, re.S)
+    status = "invalid_response"
+    if match:
+        text = match.group(1).decode().replace("&quot;", '"').replace("&lt;", "<").replace("&amp;", "&")
+        status = json.loads(text).get("status", "unknown")
+    return request_id, status, sent, answered
+
+
+def waiters_gauge():
+    conn = http.client.HTTPConnection(HOST, PORT, timeout=10)
+    conn.request("GET", "/metrics")
+    text = conn.getresponse().read().decode()
+    conn.close()
+    values = [float(v) for v in re.findall(r"^loan_result_waiters(?:\{[^}]*\})? (\S+)$", text, re.M)]
+    return sum(values)
+
+
+async def main(clients, count):
+    ids = []
+    for k in range(count):
+        text = f"Nom du Client: Client {k} {time.time()}\nMontant du Prêt Demandé: {150000 + k}\nRevenu Mensuel: 4000"
+        ids.append(call("submitRequest", "request_text", text)["request_id"])
+    print(f"⏱️  {count} requests submitted, {clients} waitForResult clients\n")
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(wait_for(ids[i % count], 60)) for i in range(clients)]
+    await asyncio.sleep(1)
+    loop = asyncio.get_running_loop()
+    waiting = await loop.run_in_executor(None, waiters_gauge)
+    t0 = time.perf_counter()
+    status = (await loop.run_in_executor(None, call, "getResult", "request_id", ids[-1]))["status"]
+    get_ms = (time.perf_counter() - t0) * 1000
+    print(f"while waiting    loan_result_waiters={waiting:.0f}, getResult({status}) in {get_ms:.1f} ms")
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    errors = [r for r in results if isinstance(r, BaseException)]
+    answers = [r for r in results if not isinstance(r, BaseException)]
+    finished = {rid: datetime.fromisoformat(call("getResult", "request_id", rid)["last_update"]) for rid in ids}
+    # Délai de réponse à partir de la fin de la demande (ou de l'envoi, si elle était déjà terminée)
+    lags = sorted((answered - max(finished[rid], sent)).total_seconds() * 1000
+                  for rid, status, sent, answered in answers if status == "done")
+    woken = sum(1 for rid, _, sent, _ in answers if sent < finished[rid])
+    not_done = sum(1 for _, status, _, _ in answers if status != "done")
+    print(f"all answered in  {elapsed:.1f} s: {len(lags)} done ({woken} waited for completion), "
+          f"{not_done} not done, {len(errors)} errors")
+    if lags:
+        print(f"response delay   p50 {percentile(lags, 50):.0f} ms  p99 {percentile(lags, 99):.0f} ms  "
+              f"max {lags[-1]:.0f} ms")
+    if errors or not_done:
+        print(f"\n❌ {errors[:3]}")
+        sys.exit(1)
+    print(f"\n✅ {clients} clients woken by completion events, one request each")
+
+
+if __name__ == "__main__":
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(main(clients, count))
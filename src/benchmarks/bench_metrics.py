@@ -0,0 +1,124 @@
+"""
+Coût de l'instrumentation (services/metrics.py) sur le chemin chaud:
+- le même service (DecisionService, opération la plus légère) appelé dans ce processus
+  par WSGI, avec et sans instrument() (différence de l'ordre du bruit de mesure),
+- le coût direct des écouteurs: les événements qu'émet Spyne à chaque appel, déclenchés
+  sur une application instrumentée et sur une application nue,
+- le coût d'un timed() du composite,
+- le coût des écouteurs de traces (services/tracing.py, 4 spans écrits par appel).
+Vérifie aussi que les compteurs exposés sur /metrics correspondent aux appels faits.
+
+Usage: python benchmarks/bench_metrics.py [appels]   (défaut: 3000)
+"""
+import gc
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from wsgiref.util import setup_testing_defaults
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["LOAN_TRACE_FILE"] = os.path.join(tempfile.mkdtemp(), "traces.jsonl")
+from spyne import Application  # noqa: E402
+from spyne.protocol.soap import Soap11  # noqa: E402
+from spyne.server.wsgi import WsgiApplication  # noqa: E402
+from services import metrics, tracing  # noqa: E402
+from services.decision_service import DecisionService  # noqa: E402
+from benchmarks.bench_workers import envelope  # noqa: E402
+
+logging.disable(logging.INFO)
+
+TNS = "loan.services.decision"
+BODY = envelope(TNS, "make_decision", "data", json.dumps({
+    "credit_score": 720, "property_value": 250000, "loan_amount": 200000,
+    "revenu_mensuel": 6500, "depenses_mensuelles": 1500, "emploi_stable": True,
+}))
+ROUNDS = 5
+
+
+def wsgi_app(instrumented):
+    app = Application([DecisionService], tns=TNS, in_protocol=Soap11(validator="lxml"), out_protocol=Soap11())
+    if instrumented:
+        metrics.instrument(app, "ds")
+    return WsgiApplication(app)
+
+
+def call(app):
+    environ = {"REQUEST_METHOD": "POST", "PATH_INFO": "/DecisionService", "CONTENT_LENGTH": str(len(BODY)),
+               "CONTENT_TYPE": "text/xml; charset=utf-8", "wsgi.input": io.BytesIO(BODY)}
+    setup_testing_defaults(environ)
+    return b"".join(app(environ, lambda status, headers, exc_info=None: None))
+
+
+def per_call(apps, calls):
+    """Meilleure de ROUNDS mesures (µs par appel) pour chaque app, en alternant les apps
+    à chaque tour pour que la dérive du processus (tas, caches) les touche autant."""
+    best = [float("inf")] * len(apps)
+    for _ in range(ROUNDS):
+        for i, app in enumerate(apps):
+            gc.collect()
+            start = time.perf_counter()
+            for _ in range(calls):
+                call(app)
+            best[i] = min(best[i], (time.perf_counter() - start) / calls * 1e6)
+    return best
+
+
+def sample(text, line_prefix):
+    return next(float(line.split()[-1]) for line in text.splitlines() if line.startswith(line_prefix))
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    plain, instrumented = wsgi_app(False), wsgi_app(True)
+    call(plain), call(instrumented)
+    print(f"⏱️  make_decision through WSGI, best of {ROUNDS} x {calls} calls\n")
+    before, after = per_call([plain, instrumented], calls)
+    print(f"without metrics   {before:8.1f} µs/call")
+    print(f"with metrics      {after:8.1f} µs/call   overhead {after - before:+.1f} µs ({(after / before - 1) * 100:+.1f} %)")
+
+    n = 200_000
+    events = []
+    for app in (plain, instrumented):
+        manager = app.app.event_manager
+        ctx = SimpleNamespace(udc=None, method_name="bench", out_object=['{"approved": true}'])
+        start = time.perf_counter()
+        for _ in range(n):
+            manager.fire_event("method_call", ctx)
+            manager.fire_event("method_return_object", ctx)
+        events.append((time.perf_counter() - start) / n * 1e6)
+    print(f"listeners         {events[1] - events[0]:8.2f} µs/call (events fired on both apps: "
+          f"{events[0]:.2f} vs {events[1]:.2f} µs)")
+
+    traced = wsgi_app(False)
+    tracing.trace(traced.app, "ds")
+    timings = []
+    for app in (plain, traced):
+        manager = app.app.event_manager
+        start = time.perf_counter()
+        for _ in range(n // 4):
+            ctx = SimpleNamespace(udc=None, method_name="bench", in_header_doc=None, call_start=time.time())
+            for event in ("method_call", "method_return_object", "method_return_string"):
+                manager.fire_event(event, ctx)
+        timings.append((time.perf_counter() - start) / (n // 4) * 1e6)
+    tracing.WRITER.flush()
+    print(f"tracing           {timings[1] - timings[0]:8.2f} µs/call (4 spans, writer thread included)")
+
+    start = time.perf_counter()
+    for _ in range(n):
+        with metrics.timed("request", "store"):
+            pass
+    print(f"timed() stage     {(time.perf_counter() - start) / n * 1e6:8.2f} µs/stage")
+
+    text = metrics.REGISTRY.render()
+    served = sample(text, 'loan_operation_requests_total{service="ds",operation="make_decision"}')
+    counted = sample(text, 'loan_operation_seconds_count{service="ds",operation="make_decision"}')
+    expected = calls * ROUNDS + 1
+    if served != expected or counted != expected:
+        print(f"\n❌ /metrics reports {served:.0f} calls and {counted:.0f} observations, expected {expected}")
+        sys.exit(1)
+    print(f"\n✅ /metrics counted all {expected} calls")
@@ -0,0 +1,102 @@
+"""
+Notifications synchrones (ancien notify: un open/append/close, ou un envoi SMTP, dans le
+chemin de la requête) contre le Dispatcher (file + lots en arrière-plan): temps passé par
+l'appelant, temps jusqu'à la livraison complète, et absence de pertes avec un serveur
+SMTP de remplacement qui refuse une partie des messages.
+
+Usage: python benchmarks/bench_notifications.py [notifications]   (défaut: 2000)
+"""
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from composite_service.notifications import Dispatcher, FileSink, SmtpSink, StandInSmtpServer  # noqa: E402
+
+logging.disable(logging.WARNING)
+
+SMTP_LATENCY = 0.002  # secondes par message côté serveur
+
+
+def legacy_notify(path, request_id, to_email, message):
+    """notify historique de utils.py."""
+    now = datetime.utcnow().isoformat()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f"{now} | {request_id} | to={to_email} | {message}\n")
+
+
+def legacy_smtp(port, request_id, to_email, message):
+    """Envoi SMTP direct: une connexion par notification, dans le chemin de la requête."""
+    SmtpSink("127.0.0.1", port).send([(datetime.utcnow().isoformat(), request_id, to_email, message)])
+
+
+def smtp_server(latency=0.0, fail_rate=0.0):
+    server = StandInSmtpServer(0, latency, fail_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+
+def items(n):
+    return [(f"REQ{i:06d}", f"client{i}@email.com", "Votre demande est approuvée") for i in range(n)]
+
+
+def timed(label, send, notifications, drain=None):
+    start = time.perf_counter()
+    for notification in notifications:
+        send(*notification)
+    caller = time.perf_counter() - start
+    if drain:
+        drain()
+    total = time.perf_counter() - start
+    print(f"{label:<34}{caller / len(notifications) * 1e6:10.1f} µs/call{total:9.2f} s to deliver")
+    return caller
+
+
+def count_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for _ in f)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    notifications = items(n)
+    tmp = tempfile.mkdtemp()
+    print(f"⏱️  {n} notifications, time spent by the caller (submitRequest) and until delivered\n")
+
+    # --- Fichier --- #
+    legacy_path = os.path.join(tmp, "legacy.log")
+    before = timed("file, synchronous", lambda *a: legacy_notify(legacy_path, *a), notifications)
+    path = os.path.join(tmp, "notifications.log")
+    dispatcher = Dispatcher([FileSink(path)])
+    after = timed("file, dispatcher", dispatcher.notify, notifications, dispatcher.flush)
+    assert count_lines(path) == count_lines(legacy_path) == n, "file sink lost notifications"
+    print(f"{'':<34}caller x{before / after:.1f} faster\n")
+
+    # --- SMTP (serveur de remplacement, 2 ms par message) --- #
+    server, port = smtp_server(SMTP_LATENCY)
+    sync_n = notifications[:max(1, n // 10)]  # l'envoi synchrone est lent: échantillon
+    before = timed("smtp, synchronous (sample)", lambda *a: legacy_smtp(port, *a), sync_n) / len(sync_n)
+    server.messages.clear()
+    dispatcher = Dispatcher([SmtpSink("127.0.0.1", port)])
+    after = timed("smtp, dispatcher", dispatcher.notify, notifications, dispatcher.flush) / n
+    assert len(server.messages) == n, f"smtp sink delivered {len(server.messages)}/{n}"
+    print(f"{'':<34}caller x{before / after:.0f} faster\n")
+    server.shutdown()
+
+    # --- Pertes: 30 % des messages refusés (451), arrêt juste après le dernier notify --- #
+    server, port = smtp_server(fail_rate=0.3)
+    path = os.path.join(tmp, "flaky.log")
+    dispatcher = Dispatcher([FileSink(path), SmtpSink("127.0.0.1", port)], batch_size=50,
+                            max_retries=20, retry_delay=0.01, fallback_path=os.path.join(tmp, "failed.log"))
+    dispatcher.notify_many(notifications)
+    dispatcher.flush()
+    delivered = {bytes(m[2]).split(b"Your loan request ")[1][:9] for m in server.messages}
+    stats = dispatcher.stats()
+    print(f"flaky smtp (30 % refused)         {len(delivered)}/{n} delivered after {stats['retries']} retries, "
+          f"{count_lines(path)} lines in the log, {stats['failed']} sent to fallback")
+    assert len(delivered) == n and count_lines(path) == n, "notifications lost"
+    print("\n✅ No notification lost")
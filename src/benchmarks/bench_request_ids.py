@@ -0,0 +1,90 @@
+"""
+Identifiants de demandes (composite_service/ids.py):
+- débit du générateur dans un processus, comparé à l'ancien schéma (seconde + hash % 10000),
+- collisions: plusieurs processus forkés génèrent en même temps; aucun doublon attendu, et
+  la séquence de chaque processus doit être strictement croissante. L'ancien schéma est
+  rejoué sur des textes identiques à la même seconde pour compter ses collisions,
+- parcours par plage de temps d'une base SQLite remplie d'identifiants étalés sur une
+  journée, comparé à un filtre sur la colonne timestamp (non indexée).
+
+Usage: python benchmarks/bench_request_ids.py [identifiants_par_processus] [processus]
+       (défaut: 200 000 identifiants, 4 processus)
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from composite_service.ids import GENERATOR, PREFIX, _encode, id_time, new_id  # noqa: E402
+from composite_service.storage import SqliteStore  # noqa: E402
+
+
+def legacy_id(text):
+    """Schéma d'origine de new_request_id."""
+    return f"REQ_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{abs(hash(text)) % 10000}"
+
+
+def generate(count):
+    return [new_id() for _ in range(count)]
+
+
+def per_second(func, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return count / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    print(f"⏱️  request ids: {count:,} per process, {processes} processes\n")
+    print(f"ulid generator   {per_second(new_id, count):12,.0f} ids/s")
+    print(f"legacy scheme    {per_second(lambda: legacy_id('Nom du Client: Alice'), count):12,.0f} ids/s")
+
+    new_id()  # état hérité par les enfants (doit être réinitialisé au fork)
+    with get_context("fork").Pool(processes) as pool:
+        batches = pool.map(generate, [count] * processes)
+    ids = [i for batch in batches for i in batch]
+    duplicates = len(ids) - len(set(ids))
+    unordered = sum(any(a >= b for a, b in zip(batch, batch[1:])) for batch in batches)
+    legacy = [legacy_id("Nom du Client: Alice\nMontant: 200000") for _ in range(1000)]
+    print(f"\n{len(ids):,} ids from {processes} forked processes: {duplicates} duplicates, "
+          f"{unordered} processes with out-of-order ids")
+    print(f"legacy scheme: 1000 submissions of one text -> {len(set(legacy))} distinct ids")
+
+    # Base d'une journée de demandes, identifiants créés à leur instant de soumission
+    day = datetime(2025, 1, 1)
+    rows = 200_000
+    path = os.path.join(tempfile.mkdtemp(), "ids.sqlite3")
+    store = SqliteStore(path)
+    records = {}
+    for k in range(rows):
+        moment = day + timedelta(seconds=86400 * k / rows)
+        ms = int((moment - datetime(1970, 1, 1)).total_seconds() * 1000)
+        records[PREFIX + _encode((ms << 80) | k)] = {"status": "done", "timestamp": moment.isoformat(), "text": "x"}
+    store.import_records(records)
+    start, end = day + timedelta(hours=12), day + timedelta(hours=12, minutes=5)
+
+    t0 = time.perf_counter()
+    found = [rid for rid, _ in store.items_between(start, end)]
+    by_key = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    scanned = sqlite3.connect(path).execute(
+        "SELECT request_id, data FROM requests WHERE timestamp BETWEEN ? AND ? ORDER BY request_id",
+        (start.isoformat(), end.isoformat())).fetchall()
+    by_column = time.perf_counter() - t0
+    print(f"\n5-minute window in {rows:,} rows: key range {by_key * 1000:.1f} ms, "
+          f"timestamp filter {by_column * 1000:.1f} ms ({len(found)} vs {len(scanned)} rows)")
+
+    ok = (duplicates == 0 and unordered == 0 and found == [r[0] for r in scanned]
+          and abs((id_time(GENERATOR.new()) - datetime.utcnow()).total_seconds()) < 1)
+    if not ok:
+        print("\n❌ duplicate, out-of-order or misdated ids, or range scan mismatch")
+        sys.exit(1)
+    print("\n✅ unique, ordered ids; range scan matches the timestamp filter")
@@ -0,0 +1,155 @@
+"""
+Résilience des appels du composite (composite_service/resilience.py) face aux pannes du
+service d'évaluation des biens, injectées par un proxy (benchmarks/fault_proxy.py) placé
+entre le composite et PropertyEvaluationService.
+
+Lance les services enfants, le proxy (port 8013) et le composite, puis enchaîne les
+scénarios, chacun avec `demandes` submitRequest envoyées par 4 clients:
+- sain, 30 % d'erreurs, traîne lente (10 % des appels +1,5 s): comparés avec la couche de
+  résilience désactivée (pas de tentative, de couverture, de budget ni de disjoncteur),
+- service figé puis rétabli: le disjoncteur doit faire échouer les demandes vite (pas
+  d'accumulation de threads bloqués), puis se refermer.
+
+Les ports 8000 à 8004 doivent être libres.
+
+Usage: python benchmarks/bench_resilience.py [demandes]   (défaut: 80)
+"""
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SRC)
+from benchmarks.bench_host_mode import ready  # noqa: E402
+from benchmarks.fault_proxy import FaultProxy  # noqa: E402
+from benchmarks.loadgen import PATH, TNS, percentile, request_bodies  # noqa: E402
+from main import SERVICES  # noqa: E402
+
+PROXY_PORT = 8013
+HEADERS = {"Content-Type": "text/xml; charset=utf-8", "SOAPAction": '""'}
+BUDGET = 4.0
+# Disjoncteur au seuil par défaut (5 appels en échec); réouverture en 2 s pour le scénario de reprise
+RESILIENT = {"LOAN_REQUEST_BUDGET": str(BUDGET), "LOAN_HEDGE": "1", "LOAN_CALL_RETRIES": "2",
+             "LOAN_BREAKER_FAILURES": "5", "LOAN_BREAKER_RESET": "2"}
+DISABLED = {"LOAN_REQUEST_BUDGET": "0", "LOAN_HEDGE": "0", "LOAN_CALL_RETRIES": "0", "LOAN_BREAKER_FAILURES": "0"}
+
+
+def call(operation, body, timeout=60):
+    """(statut, message, secondes, résultat JSON) d'un appel au composite."""
+    start = time.perf_counter()
+    conn = http.client.HTTPConnection("127.0.0.1", 8000, timeout=timeout)
+    try:
+        conn.request("POST", PATH, body, HEADERS)
+        payload = conn.getresponse().read()
+        result = json.loads(ET.fromstring(payload).find(f".//{{{TNS}}}{operation}Result").text)
+        return result.get("status", "unknown"), result.get("message", ""), time.perf_counter() - start, result
+    except (OSError, http.client.HTTPException, ET.ParseError, AttributeError, ValueError) as e:
+        return "client_error", str(e), time.perf_counter() - start, None
+    finally:
+        conn.close()
+
+
+def run(bodies):
+    with ThreadPoolExecutor(4) as pool:
+        return list(pool.map(lambda body: call("submitRequest", body), bodies))
+
+
+def summary(label, results):
+    done = sorted(r[2] * 1000 for r in results if r[0] == "done")
+    failed = sorted(r[2] * 1000 for r in results if r[0] != "done")
+    line = f"{label:<28}{len(done):4}/{len(results)} done"
+    if done:
+        line += f"   p50 {percentile(done, 50):6.0f} ms  p99 {percentile(done, 99):6.0f} ms"
+    if failed:
+        line += f"   failures answered in p50 {percentile(failed, 50):.0f} ms"
+    print(line)
+    return len(done), failed
+
+
+def start_composite(env):
+    pe_url = f"http://127.0.0.1:{PROXY_PORT}/PropertyEvaluationService?wsdl"
+    proc = subprocess.Popen([sys.executable, "composite_service/service_composite.py"], cwd=SRC,
+                            env=dict(os.environ, LOAN_PE_URL=pe_url, LOAN_DEDUP_TTL="0", LOAN_TRANSPORT="soap", **env),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not ready("http://127.0.0.1:8000/LoanEvaluationService?wsdl"):
+        raise RuntimeError("composite did not start")
+    return proc
+
+
+def pe_stats():
+    """getResilienceStats du composite (opération sans paramètre)."""
+    body = (b'<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" '
+            b'xmlns:tns="loan.composite"><soapenv:Body><tns:getResilienceStats/></soapenv:Body></soapenv:Envelope>')
+    return call("getResilienceStats", body)[3] or {}
+
+
+def scenarios(proxy, bodies, count, resilient):
+    """Scénarios sain / erreurs / traîne lente; retourne {scénario: demandes abouties}."""
+    out = {}
+    proxy.configure(error_rate=0.0, slow_rate=0.0, hang=False)
+    out["healthy"] = summary("  healthy", run(bodies[:count]))[0]
+    proxy.configure(error_rate=0.3)
+    out["errors"] = summary("  30% errors", run(bodies[count:2 * count]))[0]
+    proxy.configure(error_rate=0.0, slow_rate=0.1, slow_delay=1.5)
+    out["slow"] = summary("  10% slow (+1.5 s)", run(bodies[2 * count:3 * count]))[0]
+    proxy.configure(slow_rate=0.0)
+    if resilient:
+        stats = pe_stats().get("pe", {})
+        print(f"  pe: {stats.get('retries')} retries, {stats.get('hedges')} hedges "
+              f"({stats.get('hedge_wins')} won), p95 {stats.get('p95_ms')} ms")
+    return out
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 80
+    bodies = request_bodies(7, 6 * count + 1)
+    children = [subprocess.Popen([sys.executable, script], cwd=SRC, stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.DEVNULL) for _, script, _, _, deps in SERVICES if not deps]
+    proxy = FaultProxy(PROXY_PORT, 8003).start()
+    composite = None
+    try:
+        for _, _, port, path, deps in SERVICES:
+            if not deps and not ready(f"http://127.0.0.1:{port}/{path}?wsdl"):
+                raise RuntimeError(f"{path} did not start")
+
+        print(f"⏱️  {count} requests per scenario, 4 clients, faults injected in front of PE\n")
+        print("without resilience layer")
+        composite = start_composite(DISABLED)
+        baseline = scenarios(proxy, bodies, count, False)
+        composite.terminate()
+        composite.wait()
+
+        print(f"\nwith resilience layer (budget {BUDGET:.0f} s, 2 retries, hedging, breaker)")
+        composite = start_composite(RESILIENT)
+        run(bodies[:count])  # p95 du service observé avant les pannes
+        resilient = scenarios(proxy, bodies[count:], count, True)
+
+        proxy.configure(hang=True)
+        _, failed = summary("  PE hung", run(bodies[4 * count:5 * count]))
+        stats = pe_stats().get("pe", {})
+        print(f"  pe: breaker {stats.get('breaker')}, opened {stats.get('breaker_opened')} times, "
+              f"{stats.get('rejected')} calls rejected without trying")
+        proxy.configure(hang=False)
+        time.sleep(2.5)  # durée d'ouverture du disjoncteur
+        # Appel d'essai seul: pendant qu'il est en vol, les autres appels restent refusés
+        trial = call("submitRequest", bodies[5 * count])
+        print(f"  trial call                  {trial[0]} in {trial[2] * 1000:.0f} ms")
+        recovered, _ = summary("  PE back", run(bodies[5 * count + 1:6 * count + 1]))
+        print(f"  pe: breaker {pe_stats().get('pe', {}).get('breaker')}")
+
+        ok = (resilient["errors"] >= 0.95 * count and resilient["errors"] >= baseline["errors"]
+              and failed and percentile(failed, 50) < BUDGET * 1000 and recovered >= 0.9 * count)
+        if not ok:
+            print("\n❌ retries, breaker or recovery did not behave as expected")
+            sys.exit(1)
+        print("\n✅ Errors absorbed by retries, hung service failed fast, breaker closed after recovery")
+    finally:
+        proxy.configure(hang=False)
+        for proc in children + ([composite] if composite else []):
+            proc.terminate()
+        proxy.stop()
@@ -0,0 +1,124 @@
+"""
+Backends de stockage du composite (composite_service/storage.py) sous écritures concurrentes:
+chaque demande fait deux écritures (create_request puis save_decision), depuis plusieurs
+threads comme les requêtes Twisted. Compare JSON, SQLite et le journal en mémoire (WalStore,
+write-behind et durable), puis le coût d'une lecture (getResult).
+
+Reprise après arrêt brutal: un processus écrit en mode durable et affiche chaque demande
+acquittée; il est tué (SIGKILL) en pleine écriture, puis le journal est rejoué: toutes les
+demandes acquittées doivent y être, avec leur décision.
+
+Usage: python benchmarks/bench_store.py [demandes] [threads]   (défaut: 4000 demandes, 8 threads)
+"""
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from composite_service.ids import new_id  # noqa: E402
+from composite_service.storage import JsonStore, SqliteStore, WalStore  # noqa: E402
+
+logging.disable(logging.INFO)
+
+TEXT = "Nom du Client: Alice Dupont\nMontant du Prêt Demandé: 180000\nRevenu Mensuel: 4200"
+DECISION = {"approved": True, "message": "Approved", "interest_rate": 3.4, "reasons": ["ok"] * 3}
+
+
+def one_request(store):
+    request_id = new_id()
+    now = datetime.utcnow().isoformat()
+    store.upsert(request_id, {"text": TEXT, "status": "processing", "timestamp": now, "last_update": now,
+                              "result": None})
+    store.upsert(request_id, {"result": DECISION, "status": "done", "last_update": now})
+    return request_id
+
+
+def load(store, requests, threads):
+    """Demandes par seconde avec `threads` threads; vérifie qu'aucune écriture n'est perdue."""
+    ids, lock = [], threading.Lock()
+
+    def worker(count):
+        mine = [one_request(store) for _ in range(count)]
+        with lock:
+            ids.extend(mine)
+
+    pool = [threading.Thread(target=worker, args=(requests // threads,)) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    lost = sum(1 for rid in ids if (store.get(rid) or {}).get("status") != "done")
+    return len(ids) / elapsed, lost, ids
+
+
+def read_cost(store, ids, n=20000):
+    start = time.perf_counter()
+    for i in range(n):
+        store.get(ids[i % len(ids)])
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def crash_child(path):
+    """Processus tué en cours d'écriture: une ligne par demande acquittée (durable)."""
+    store = WalStore(path, durable=True)
+    while True:
+        print(one_request(store), flush=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--crash-child":
+        crash_child(sys.argv[2])
+
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    tmp = tempfile.mkdtemp()
+    print(f"⏱️  {requests} requests (2 writes each) from {threads} threads\n")
+
+    backends = [
+        ("json", lambda: JsonStore(os.path.join(tmp, "db.json")), max(threads, requests // 20)),
+        ("sqlite", lambda: SqliteStore(os.path.join(tmp, "db.sqlite3")), requests),
+        ("wal write-behind", lambda: WalStore(os.path.join(tmp, "a.wal")), requests),
+        ("wal durable", lambda: WalStore(os.path.join(tmp, "b.wal"), durable=True), requests),
+    ]
+    for name, factory, count in backends:
+        store = factory()
+        rate, lost, ids = load(store, count, threads)
+        extra = ""
+        if isinstance(store, WalStore):
+            store.flush()
+            extra = f", {store.commits} fsyncs"
+        print(f"{name:<18}{rate:10,.0f} req/s  read {read_cost(store, ids):7.1f} µs  "
+              f"({count} requests, {lost} lost updates{extra})")
+        if isinstance(store, WalStore):
+            store.close()
+            replayed = WalStore(store.path)
+            missing = sum(1 for rid in ids if (replayed.get(rid) or {}).get("status") != "done")
+            replayed.close()
+            if missing:
+                print(f"❌ {missing} requests missing after replaying {store.path}")
+                sys.exit(1)
+
+    path = os.path.join(tmp, "crash.wal")
+    child = subprocess.Popen([sys.executable, __file__, "--crash-child", path], stdout=subprocess.PIPE, text=True)
+    time.sleep(2)
+    child.send_signal(signal.SIGKILL)
+    acknowledged = [line.strip() for line in child.stdout if line.strip()]
+    child.wait()
+    store = WalStore(path)
+    missing = [rid for rid in acknowledged if (store.get(rid) or {}).get("result") != DECISION]
+    print(f"\nSIGKILL during durable writes: {len(acknowledged)} acknowledged requests, "
+          f"{len(missing)} missing after replay ({store.stats()['requests']} in the log)")
+    store.close()
+    if missing:
+        print(json.dumps(missing[:5]))
+        sys.exit(1)
+    print("\n✅ No lost updates, replay complete")
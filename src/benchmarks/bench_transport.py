@@ -0,0 +1,77 @@
+"""
+Latence par décision: transport SOAP (4 appels HTTP) contre transport local (in-process).
+Vérifie aussi que les deux chemins produisent les mêmes sorties pour les étapes
+déterministes (IE, DS) et la même structure pour CC et PE (tirages aléatoires).
+
+Prérequis: services enfants démarrés (python main.py).
+Usage: python benchmarks/bench_transport.py [iterations]
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from composite_service.service_composite import CLIENTS  # noqa: E402
+from composite_service.transport import build_transports  # noqa: E402
+
+LOAN_TEXT = """
+Nom du Client: Jeanne Petit
+Adresse: 5 Rue des Fleurs, Paris
+Email: jeanne.petit@email.com
+Numéro de Téléphone: +33600111222
+Montant du Prêt Demandé: 300000
+Revenu Mensuel: 2000
+Dépenses Mensuelles: 1500
+Description de la Propriété: Petit appartement ancien, nécessite quelques travaux.
+"""
+
+STAGES = ("ie", "cc", "pe", "ds")
+
+
+def decide(transports):
+    parsed = transports["ie"](LOAN_TEXT)
+    cc = transports["cc"](parsed)
+    pe = transports["pe"](parsed)
+    decision_input = {
+        "credit_score": cc.get("credit_score", 0),
+        "property_value": pe.get("property_value", 0),
+        "loan_amount": float(parsed.get("montant_pret", 0)),
+        "revenu_mensuel": parsed.get("revenu_mensuel", 0),
+        "depenses_mensuelles": parsed.get("depenses_mensuelles", 0),
+        "emploi_stable": parsed.get("emploi_stable", True),
+    }
+    return parsed, cc, pe, decision_input, transports["ds"](decision_input)
+
+
+def measure(label, transports, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        decide(transports)
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<8} mean={statistics.mean(samples):8.3f} ms  p50={statistics.median(samples):8.3f} ms")
+    return statistics.mean(samples)
+
+
+def check_parity(soap, local):
+    s_parsed, s_cc, s_pe, _, _ = decide(soap)
+    l_parsed, l_cc, l_pe, decision_input, l_decision = decide(local)
+    assert s_parsed == l_parsed, "IE outputs differ"
+    assert soap["ds"](decision_input) == l_decision, "DS outputs differ"
+    assert s_cc.keys() == l_cc.keys() and s_cc["details"].keys() == l_cc["details"].keys(), "CC shapes differ"
+    assert s_pe.keys() == l_pe.keys() and s_pe["details"].keys() == l_pe["details"].keys(), "PE shapes differ"
+    print("✅ SOAP and local transports return identical results")
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    soap = build_transports(CLIENTS, {stage: "soap" for stage in STAGES})
+    local = build_transports(CLIENTS, {stage: "local" for stage in STAGES})
+    CLIENTS.warm()
+
+    check_parity(soap, local)
+    print(f"\n⏱️  {iterations} loan decisions\n")
+    before = measure("soap", soap, iterations)
+    after = measure("local", local, iterations)
+    print(f"\n🚀 Speedup: x{before / after:.1f}")
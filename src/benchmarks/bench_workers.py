@@ -0,0 +1,110 @@
+"""
+Débit d'un service selon le nombre de workers (services/hosting.py): le service est lancé
+avec --workers N puis chargé par plusieurs processus clients qui envoient la même
+enveloppe SOAP en boucle (connexions HTTP persistantes) pendant une durée fixe.
+
+Usage: python benchmarks/bench_workers.py [service] [durée_s] [clients]
+       service: ie, cc (défaut), pe ou ds; défaut 5 s et 16 processus clients
+"""
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+from multiprocessing import Pool
+from urllib.request import urlopen
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER_COUNTS = [1, 2, 4, 8]
+
+PARSED = {"nom": "Jeanne Petit", "adresse": "5 Rue des Fleurs, Paris", "montant_pret": 300000.0,
+          "revenu_mensuel": 2000.0, "depenses_mensuelles": 1500.0,
+          "description": "Petit appartement ancien, nécessite quelques travaux."}
+DECISION = {"credit_score": 42.5, "property_value": 250000.0, "loan_amount": 300000.0,
+            "revenu_mensuel": 2000.0, "depenses_mensuelles": 1500.0, "emploi_stable": True}
+LOAN_TEXT = "Nom du Client: Jeanne Petit\nMontant du Prêt Demandé: 300000\nRevenu Mensuel: 2000"
+
+# service -> (script, port, chemin, tns, opération, paramètre, argument)
+SERVICES = {
+    "ie": ("services/information_extraction.py", 8001, "InformationExtractionService",
+           "loan.services.information", "extract_information", "text", LOAN_TEXT),
+    "cc": ("services/credit_check.py", 8002, "CreditCheckService",
+           "loan.services.credit", "check_credit", "data", json.dumps(PARSED)),
+    "pe": ("services/property_evaluation.py", 8003, "PropertyEvaluationService",
+           "loan.services.property", "evaluate_property", "data", json.dumps(PARSED)),
+    "ds": ("services/decision_service.py", 8004, "DecisionService",
+           "loan.services.decision", "make_decision", "data", json.dumps(DECISION)),
+}
+
+
+def envelope(tns, operation, param, argument):
+    argument = argument.replace("&", "&amp;").replace("<", "&lt;")
+    return (
+        '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" '
+        f'xmlns:tns="{tns}"><soapenv:Body><tns:{operation}><tns:{param}>{argument}</tns:{param}>'
+        f'</tns:{operation}></soapenv:Body></soapenv:Envelope>'
+    ).encode("utf-8")
+
+
+def client_loop(args):
+    """Un processus client: envoie des requêtes jusqu'à `deadline`, retourne (ok, erreurs)."""
+    port, path, body, deadline = args
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    headers = {"Content-Type": "text/xml; charset=utf-8", "SOAPAction": '""'}
+    ok = errors = 0
+    while time.time() < deadline:
+        try:
+            conn.request("POST", f"/{path}", body, headers)
+            resp = conn.getresponse()
+            resp.read()
+            ok += resp.status == 200
+            errors += resp.status != 200
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.close()
+    return ok, errors
+
+
+def wait_ready(port, path, proc, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline and proc.poll() is None:
+        try:
+            with urlopen(f"http://127.0.0.1:{port}/{path}?wsdl", timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+if __name__ == "__main__":
+    stage = sys.argv[1] if len(sys.argv) > 1 else "cc"
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    clients = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+    script, port, path, tns, operation, param, argument = SERVICES[stage]
+    body = envelope(tns, operation, param, argument)
+    print(f"⏱️  {path}.{operation}: {clients} client processes, {duration:.0f} s per run, "
+          f"{os.cpu_count()} CPU cores\n")
+
+    baseline = None
+    for workers in WORKER_COUNTS:
+        proc = subprocess.Popen([sys.executable, script, "--workers", str(workers)], cwd=SRC,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            if not wait_ready(port, path, proc):
+                print(f"❌ {path} did not start with {workers} workers")
+                sys.exit(1)
+            deadline = time.time() + duration
+            with Pool(clients) as pool:
+                counts = pool.map(client_loop, [(port, path, body, deadline)] * clients)
+        finally:
+            proc.terminate()
+            proc.wait()
+        ok = sum(c[0] for c in counts)
+        errors = sum(c[1] for c in counts)
+        rate = ok / duration
+        baseline = baseline or rate
+        print(f"{workers} worker(s)  {rate:8,.0f} req/s  (x{rate / baseline:.2f}, {errors} errors)")
+        time.sleep(0.5)
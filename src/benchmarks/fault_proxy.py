@@ -0,0 +1,158 @@
+"""
+Service de remplacement qui injecte des pannes: proxy HTTP devant un service enfant, à
+utiliser à la place de son URL (LOAN_PE_URL, ...) pour tester la résilience du composite.
+
+Les WSDL (GET) passent sans panne, avec l'adresse du proxy comme adresse du service;
+chaque appel SOAP (POST) peut être:
+- retardé de `delay` secondes,
+- lent (`slow_rate`: probabilité, `slow_delay`: secondes en plus), pour la traîne de latence,
+- en erreur (`error_rate`: réponse HTTP 503 sans appel au service),
+- coupé (`reset_rate`: connexion fermée sans réponse),
+- bloqué (`hang`: aucune réponse avant `hang_seconds`, service figé).
+
+La configuration se lit et se change pendant l'exécution: GET / POST /_faults (JSON).
+
+Usage: python benchmarks/fault_proxy.py --listen 8013 --target 8003 [--error-rate 0.3] [--slow-rate 0.05]
+       LOAN_PE_URL=http://127.0.0.1:8013/PropertyEvaluationService?wsdl python composite_service/service_composite.py
+"""
+import argparse
+import http.client
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+DEFAULT_FAULTS = {"delay": 0.0, "slow_rate": 0.0, "slow_delay": 2.0, "error_rate": 0.0, "reset_rate": 0.0,
+                  "hang": False, "hang_seconds": 3600.0}
+
+
+class FaultProxy:
+    """Proxy `listen` -> `target` (127.0.0.1) avec pannes configurables et compteurs."""
+
+    def __init__(self, listen: int, target: int, **faults):
+        self.target = target
+        self.faults: Dict[str, Any] = dict(DEFAULT_FAULTS, **faults)
+        self.counts = {"calls": 0, "errors": 0, "resets": 0, "slow": 0, "hung": 0}
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+        self.server = ThreadingHTTPServer(("127.0.0.1", listen), self._handler())
+        self.server.daemon_threads = True
+
+    def configure(self, **faults) -> Dict[str, Any]:
+        with self._lock:
+            unknown = set(faults) - set(DEFAULT_FAULTS)
+            if unknown:
+                raise ValueError(f"Unknown faults: {sorted(unknown)}")
+            self.faults.update(faults)
+            return dict(self.faults)
+
+    def _draw(self) -> Dict[str, Any]:
+        """Pannes de cet appel, tirées selon la configuration courante."""
+        with self._lock:
+            f = dict(self.faults)
+            self.counts["calls"] += 1
+            draw = {
+                "hang": f["hang"],
+                "reset": self._rng.random() < f["reset_rate"],
+                "error": self._rng.random() < f["error_rate"],
+                "delay": f["delay"] + (f["slow_delay"] if self._rng.random() < f["slow_rate"] else 0.0),
+                "hang_seconds": f["hang_seconds"],
+            }
+            for event, key in (("hung", "hang"), ("resets", "reset"), ("errors", "error")):
+                self.counts[event] += bool(draw[key])
+            self.counts["slow"] += draw["delay"] > f["delay"]
+            return draw
+
+    def _handler(self):
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body: bytes, headers=()):
+                self.send_response(status)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True  # l'appelant a abandonné (délai expiré, couverture gagnante)
+
+            def _forward(self, body=None):
+                conn = http.client.HTTPConnection("127.0.0.1", proxy.target, timeout=60)
+                headers = {k: v for k, v in self.headers.items() if k.lower() not in ("connection", "keep-alive")}
+                conn.request(self.command, self.path, body, headers)
+                resp = conn.getresponse()
+                payload = resp.read()
+                conn.close()
+                if self.command == "GET":
+                    # Le WSDL annonce l'adresse du service: les appels doivent repasser par le proxy
+                    listen = proxy.server.server_address[1]
+                    payload = payload.replace(f"127.0.0.1:{proxy.target}/".encode(),
+                                              f"127.0.0.1:{listen}/".encode())
+                kept = [(k, v) for k, v in resp.getheaders()
+                        if k.lower() not in ("content-length", "connection", "transfer-encoding")]
+                self._reply(resp.status, payload, kept)
+
+            def do_GET(self):
+                if self.path == "/_faults":
+                    body = json.dumps({"faults": proxy.faults, "counts": proxy.counts}).encode()
+                    return self._reply(200, body, [("Content-Type", "application/json")])
+                self._forward()
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path == "/_faults":
+                    try:
+                        faults = proxy.configure(**json.loads(body or b"{}"))
+                    except (ValueError, TypeError) as e:
+                        return self._reply(400, str(e).encode())
+                    return self._reply(200, json.dumps(faults).encode(), [("Content-Type", "application/json")])
+                draw = proxy._draw()
+                if draw["hang"]:
+                    time.sleep(draw["hang_seconds"])
+                    self.close_connection = True
+                    return
+                if draw["reset"]:
+                    self.close_connection = True  # fermeture sans réponse
+                    return
+                if draw["delay"]:
+                    time.sleep(draw["delay"])
+                if draw["error"]:
+                    return self._reply(503, b"Injected fault", [("Content-Type", "text/plain")])
+                self._forward(body)
+
+        return Handler
+
+    def start(self) -> "FaultProxy":
+        threading.Thread(target=self.server.serve_forever, name="fault-proxy", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Fault-injecting proxy in front of a child service.")
+    parser.add_argument("--listen", type=int, default=8013)
+    parser.add_argument("--target", type=int, default=8003)
+    for name, default in DEFAULT_FAULTS.items():
+        if isinstance(default, bool):
+            parser.add_argument("--" + name.replace("_", "-"), action="store_true")
+        else:
+            parser.add_argument("--" + name.replace("_", "-"), type=float, default=default)
+    args = vars(parser.parse_args())
+    proxy = FaultProxy(args.pop("listen"), args.pop("target"), **args)
+    logging.info(f"[FaultProxy] 127.0.0.1:{proxy.server.server_address[1]} -> 127.0.0.1:{proxy.target} "
+                 f"with {proxy.faults}")
+    proxy.server.serve_forever()
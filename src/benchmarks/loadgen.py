@@ -0,0 +1,272 @@
+"""
+Générateur de charge du composite: envoie à submitRequest des demandes de prêt synthétiques
+(villes, revenus, montants et descriptions de biens variés, tirés d'une graine fixe) pendant
+une durée donnée, puis écrit un rapport JSON: débit, latences p50/p95/p99, taux d'erreur.
+
+Deux modes:
+- --concurrency N (boucle fermée): N clients envoient chacun une demande dès la réponse
+  précédente reçue; mesure le débit maximal à ce niveau de parallélisme.
+- --rate R (boucle ouverte): R demandes par seconde à intervalles fixes, quel que soit le
+  temps de réponse; la latence est comptée depuis l'instant d'envoi prévu, donc une file
+  qui s'allonge côté serveur se voit dans les percentiles (pas d'omission coordonnée).
+
+Les réponses de la période de chauffe (--warmup) ne sont pas comptées. Une réponse est en
+erreur si le statut HTTP n'est pas 200, si la requête échoue, ou si le JSON retourné a
+"status": "error". --baseline compare le rapport à un rapport précédent.
+
+Usage (services et composite lancés):
+    python benchmarks/loadgen.py --concurrency 8 --duration 30
+    python benchmarks/loadgen.py --rate 20 --duration 60 --output logs/load.json
+    python benchmarks/loadgen.py --rate 20 --baseline logs/load.json
+    python benchmarks/loadgen.py --sample 3          # affiche 3 demandes générées
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.bench_workers import envelope  # noqa: E402
+
+TNS = "loan.composite"
+PATH = "/LoanEvaluationService"
+RESULT_TAG = f"{{{TNS}}}submitRequestResult"
+
+# ---------------------------------------------------------------------
+# Demandes synthétiques
+# ---------------------------------------------------------------------
+FIRST_NAMES = ["Alice", "Julien", "Sophie", "Thomas", "Camille", "Nicolas", "Léa", "Hugo", "Chloé", "Antoine",
+               "Manon", "Lucas", "Émilie", "Pierre", "Inès", "Mathieu", "Sarah", "Louis", "Claire", "Karim"]
+LAST_NAMES = ["Dupont", "Martin", "Durand", "Bernard", "Petit", "Robert", "Richard", "Moreau", "Lefèvre", "Garnier",
+              "Fontaine", "Rousseau", "Blanc", "Guerin", "Muller", "Henry", "Roussel", "Nicolas", "Perrin", "Benali"]
+STREETS = ["rue des Lilas", "Boulevard Victor Hugo", "avenue Jean Jaurès", "rue du Lac", "place de la République",
+           "rue de la Paix", "chemin des Vignes", "rue Nationale", "quai des Chartrons", "allée des Tilleuls"]
+# Villes connues de l'évaluation des biens (prix au m² différents) et quelques autres (prix "autre")
+CITIES = ["Paris", "Lyon", "Marseille", "Toulouse", "Lille", "Nantes", "Bordeaux",
+          "Montpellier", "Rennes", "Strasbourg", "Nice", "Dijon"]
+PROPERTY_TYPES = [("Appartement", 25, 120), ("Maison", 70, 250), ("Studio", 15, 35), ("Duplex", 60, 150)]
+# Mots qui fixent l'état du bien dans l'inspection virtuelle (bon, moyen, mauvais, neutre)
+CONDITIONS = ["moderne", "entièrement rénové", "neuf", "ancien", "nécessitant des travaux", "vieux mais sain",
+              "délabré", "en mauvais état", "bien entretenu", "lumineux"]
+FEATURES = ["avec balcon", "avec parking", "avec jardin", "proche des transports", "en centre-ville",
+            "en périphérie", "avec terrasse", "au dernier étage", "avec cave", ""]
+
+
+def loan_text(rng: random.Random) -> str:
+    """Une demande de prêt au format des clients (client/client_test_template.py)."""
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    city = rng.choice(CITIES)
+    kind, min_m2, max_m2 = rng.choice(PROPERTY_TYPES)
+    # Revenus log-normaux (médiane ~3 700 €), dépenses de 20 à 70 % du revenu, montant de 3 à 12 ans de revenu
+    income = int(min(max(rng.lognormvariate(8.2, 0.45), 1300), 25000))
+    expenses = int(income * rng.uniform(0.2, 0.7))
+    amount = int(income * 12 * rng.uniform(3, 12) / 1000) * 1000
+    description = " ".join(filter(None, [
+        f"{kind} {rng.choice(CONDITIONS)} de {rng.randint(min_m2, max_m2)}m²", rng.choice(FEATURES),
+        f"situé à {city}."]))
+    return (
+        f"Nom du Client: {first} {last}\n"
+        f"Adresse: {rng.randint(1, 150)} {rng.choice(STREETS)}, {city}\n"
+        f"Email: {first.lower()}.{last.lower()}@email.com\n"
+        f"Numéro de Téléphone: +336{rng.randint(10000000, 99999999)}\n"
+        f"Montant du Prêt Demandé: {amount}\n"
+        f"Revenu Mensuel: {income}\n"
+        f"Dépenses Mensuelles: {expenses}\n"
+        f"Description de la Propriété: {description}\n"
+    )
+
+
+def request_bodies(seed: int, count: int):
+    """`count` enveloppes submitRequest distinctes, reproductibles pour une graine donnée."""
+    rng = random.Random(seed)
+    return [envelope(TNS, "submitRequest", "request_text", loan_text(rng)) for _ in range(count)]
+
+
+# ---------------------------------------------------------------------
+# Envoi
+# ---------------------------------------------------------------------
+def outcome(status, payload):
+    """Statut retourné par le composite ("done", "processing", "error", ...) ou "http_<code>"."""
+    if status != 200:
+        return f"http_{status}"
+    try:
+        text = ET.fromstring(payload).find(f".//{RESULT_TAG}").text
+        return json.loads(text).get("status", "unknown")
+    except (ET.ParseError, AttributeError, TypeError, ValueError):
+        return "invalid_response"
+
+
+class Sender:
+    """Une connexion HTTP persistante par thread d'envoi."""
+
+    def __init__(self, host, port, timeout):
+        self.host, self.port, self.timeout = host, port, timeout
+        self._local = threading.local()
+        self.headers = {"Content-Type": "text/xml; charset=utf-8", "SOAPAction": '"submitRequest"'}
+
+    def send(self, body):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            conn.request("POST", PATH, body, self.headers)
+            resp = conn.getresponse()
+            return outcome(resp.status, resp.read())
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            self._local.conn = None
+            return "timeout" if isinstance(e, TimeoutError) else "connection_error"
+
+
+def run_closed(sender, bodies, concurrency, start, end):
+    """Boucle fermée: (instant prévu, latence, issue) de chaque demande envoyée avant `end`."""
+    samples, lock = [], threading.Lock()
+
+    def client(index):
+        local, i = [], index
+        while True:
+            sent = time.perf_counter()
+            if sent >= end:
+                break
+            result = sender.send(bodies[i % len(bodies)])
+            local.append((sent, time.perf_counter() - sent, result))
+            i += concurrency
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples
+
+
+def run_open(sender, bodies, rate, start, end, max_in_flight):
+    """Boucle ouverte: une demande toutes les 1/rate s, latence mesurée depuis l'instant prévu."""
+    samples, lock = [], threading.Lock()
+
+    def fire(scheduled, body):
+        result = sender.send(body)
+        with lock:
+            samples.append((scheduled, time.perf_counter() - scheduled, result))
+
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="loadgen") as pool:
+        i = 0
+        while True:
+            scheduled = start + i / rate
+            if scheduled >= end:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, scheduled, bodies[i % len(bodies)])
+            i += 1
+    return samples
+
+
+# ---------------------------------------------------------------------
+# Rapport
+# ---------------------------------------------------------------------
+def percentile(sorted_values, q):
+    """Percentile au rang le plus proche (valeur effectivement observée)."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values))) - 1))]
+
+
+def report(samples, measured_from, duration, config):
+    kept = [s for s in samples if s[0] >= measured_from]
+    latencies = sorted(s[1] * 1000 for s in kept)
+    outcomes = Counter(s[2] for s in kept)
+    errors = sum(n for status, n in outcomes.items() if status not in ("done", "processing"))
+    ms = lambda v: round(v, 2) if v is not None else None  # noqa: E731
+    return {
+        "config": config,
+        "requests": len(kept),
+        "errors": errors,
+        "error_rate": round(errors / len(kept), 4) if kept else 0.0,
+        "throughput_rps": round((len(kept) - errors) / duration, 2),
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else None,
+            "max": ms(latencies[-1]) if latencies else None,
+        },
+        "outcomes": dict(outcomes),
+    }
+
+
+def compare(current, baseline):
+    """Lignes d'écart avec un rapport précédent (débit et percentiles)."""
+    def delta(new, old):
+        if new is None or not old:
+            return "n/a"
+        return f"{(new / old - 1) * 100:+.1f} %"
+
+    lines = [f"throughput  {baseline['throughput_rps']:>9} -> {current['throughput_rps']:<9} req/s  "
+             f"{delta(current['throughput_rps'], baseline['throughput_rps'])}"]
+    for key in ("p50", "p95", "p99"):
+        old, new = baseline["latency_ms"].get(key), current["latency_ms"].get(key)
+        lines.append(f"{key:<11} {old!s:>9} -> {new!s:<9} ms     {delta(new, old)}")
+    lines.append(f"error_rate  {baseline['error_rate']:>9} -> {current['error_rate']}")
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generator for LoanEvaluationService.submitRequest")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--concurrency", type=int, help="closed loop: number of concurrent clients (default 4)")
+    mode.add_argument("--rate", type=float, help="open loop: requests per second")
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds (default 20)")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds sent but not measured (default 3)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--max-in-flight", type=int, default=256, help="open loop: sending threads")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--texts", type=int, default=500, help="distinct loan texts cycled through")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument("--sample", type=int, metavar="N", help="print N generated loan texts and exit")
+    args = parser.parse_args()
+
+    if args.sample:
+        rng = random.Random(args.seed)
+        print("\n".join(loan_text(rng) for _ in range(args.sample)))
+        sys.exit(0)
+
+    concurrency = args.concurrency or (None if args.rate else 4)
+    bodies = request_bodies(args.seed, args.texts)
+    sender = Sender(args.host, args.port, args.timeout)
+    config = {"mode": "open" if args.rate else "closed", "rate": args.rate, "concurrency": concurrency,
+              "duration_s": args.duration, "warmup_s": args.warmup, "seed": args.seed, "texts": args.texts,
+              "target": f"http://{args.host}:{args.port}{PATH}"}
+    print(f"⏱️  submitRequest: {f'{args.rate:g} req/s' if args.rate else f'{concurrency} clients'}, "
+          f"{args.warmup:g} s warm-up + {args.duration:g} s measured", file=sys.stderr)
+
+    start = time.perf_counter()
+    measured_from = start + args.warmup
+    end = measured_from + args.duration
+    if args.rate:
+        samples = run_open(sender, bodies, args.rate, start, end, args.max_in_flight)
+    else:
+        samples = run_closed(sender, bodies, concurrency, start, end)
+
+    result = report(samples, measured_from, args.duration, config)
+    print(json.dumps(result, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            print("\n" + "\n".join(compare(result, json.load(f))), file=sys.stderr)
@@ -0,0 +1,44 @@
+import json
+from suds.client import Client
+
+# --- CONFIG --- #
+COMPOSITE = "http://127.0.0.1:8000/LoanEvaluationService?wsdl"
+client = Client(COMPOSITE)
+
+# --- Loan request texts (the last one is invalid on purpose) --- #
+loan_texts = [
+    """
+Nom du Client: Jeanne Petit
+Adresse: 5 Rue des Fleurs, Paris
+Email: jeanne.petit@email.com
+Montant du Prêt Demandé: 300000
+Revenu Mensuel: 2000
+Dépenses Mensuelles: 1500
+Description de la Propriété: Petit appartement ancien, nécessite quelques travaux.
+""",
+    """
+Nom du Client: Marc Lefevre
+Adresse: 25 Avenue des Sciences, Lyon
+Email: marc.lefevre@email.com
+Montant du Prêt Demandé: 200000
+Revenu Mensuel: 6500
+Dépenses Mensuelles: 1500
+Description de la Propriété: Maison individuelle récente avec jardin. État du bien excellent.
+""",
+    "",
+]
+
+# --- Submit the whole batch in one call --- #
+print(f"📨 Submitting a batch of {len(loan_texts)} loan requests...")
+response = json.loads(client.service.submitBatch(json.dumps(loan_texts)))
+
+if response.get("status") != "done":
+    print("❌ Error submitting batch:", response.get("message"))
+    exit()
+
+print(f"✅ {response['count']} processed, {response['failed']} failed\n")
+for item in response["results"]:
+    if item["status"] == "done":
+        print(f"  #{item['index']} {item['request_id']}: {item['decision'].get('message')}")
+    else:
+        print(f"  #{item['index']} ⚠️ {item.get('message')}")
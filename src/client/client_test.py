@@ -1,5 +1,4 @@
 import json
-import time
 from suds.client import Client
 
 # --- CONFIG --- #
@@ -23,24 +22,21 @@ print("📨 Submitting loan request (expected: rejection)...")
 response_json = client.service.submitRequest(loan_text)
 response = json.loads(response_json)
 
-if response.get("status") != "done":
+if response.get("status") not in ("done", "processing"):
     print("❌ Error submitting request:", response.get("message"))
     exit()
 
 request_id = response["request_id"]
 print(f"✅ Request submitted successfully! ID: {request_id}")
 
-# Note: The service already processed the decision synchronously,
-# but we simulate an asynchronous workflow by calling getResult separately.
+# Note: In the default (synchronous) mode the decision is already available; with
+# LOAN_ASYNC=1 the request is still "processing" and waitForResult returns once it is done.
 
-# --- 2️⃣ Wait (simulate delay if processing was async) --- #
-print("\n⏳ Waiting for processing to complete (simulated delay)...")
-time.sleep(2)
-
-# --- 3️⃣ Fetch results using getResult --- #
-print("\n📥 Fetching result using getResult...")
-result_json = client.service.getResult(request_id)
-result = json.loads(result_json)
+# --- 2️⃣ + 3️⃣ Wait for the result (up to 30 s) --- #
+print("\n📥 Waiting for the result using waitForResult...")
+result = json.loads(client.service.waitForResult(request_id, 30))
+if result.get("status") == "processing":
+    print("⏳ Still processing after 30 s")
 
 if result.get("status") == "error":
     print(f"⚠️ {result.get('message')}")
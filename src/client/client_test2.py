@@ -1,5 +1,4 @@
 import json
-import time
 from suds.client import Client
 
 # --- CONFIG --- #
@@ -31,15 +30,11 @@ request_id = response["request_id"]
 print(f"✅ Request submitted successfully! ID: {request_id}")
 
 # Note: The service already processed the decision synchronously,
-# but we simulate an asynchronous workflow by calling getResult separately.
+# but we simulate an asynchronous workflow by fetching the result separately.
 
-# --- 2️⃣ Wait (simulate delay if processing was async) --- #
-print("\n⏳ Waiting for processing to complete (simulated delay)...")
-time.sleep(2)
-
-# --- 3️⃣ Fetch results using getResult --- #
-print("\n📥 Fetching result using getResult...")
-result_json = client.service.getResult(request_id)
+# --- 2️⃣ + 3️⃣ Wait for the result (returns as soon as the request is done) --- #
+print("\n📥 Fetching result using waitForResult...")
+result_json = client.service.waitForResult(request_id, 30)
 result = json.loads(result_json)
 
 if result.get("status") == "error":
@@ -0,0 +1,191 @@
+"""
+Rétention et archivage de l'historique des demandes du composite.
+
+Les enregistrements expirés (plus vieux que `max_age_days`, ou au-delà des `max_records`
+plus récents) sortent du stockage et sont écrits dans des segments d'archive compressés
+et immuables: gzip JSONL, une ligne compacte {"id", "record"} par demande, triés par
+request_id, un segment par jour et par tranche de `segment_size` demandes:
+
+    archive/requests-20251018-000042.jsonl.gz   (lecture seule)
+    archive/index.json   {"segments": [{"file", "day", "count", "first_id", "last_id", ...}]}
+
+L'index permet de retrouver un request_id sans ouvrir les autres segments (getResult).
+Seules les demandes terminées (status "done") sont archivées. Un segment et l'index sont
+écrits dans un fichier temporaire puis renommés: un arrêt pendant l'archivage laisse au
+pire une demande à la fois dans le stockage et dans l'archive (le stockage fait foi).
+L'ajout de segments et la mise à jour de l'index se font sous un verrou exclusif du
+répertoire (archive/.lock), partagé entre processus: l'archivage périodique du composite
+et compact_db.py ne peuvent pas réutiliser le même numéro de segment.
+
+Archivage hors ligne: python composite_service/compact_db.py --days 30 --max-records 100000
+"""
+import gzip
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ModuleNotFoundError:  # Windows: verrou du processus seulement
+    fcntl = None
+
+try:
+    from composite_service.ids import id_time
+except ModuleNotFoundError:
+    from ids import id_time
+
+
+class Archive:
+    """Segments gzip JSONL d'un répertoire et leur index."""
+
+    def __init__(self, directory: str, segment_size: int = 10000):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.index_path = os.path.join(directory, "index.json")
+        self._lock = threading.Lock()
+        self._index: Dict[str, Any] = {"segments": []}
+        self._index_mtime = None
+
+    # --- Index --- #
+    def _load_index(self, force: bool = False) -> Dict[str, Any]:
+        """Index courant (relu s'il a été modifié, par exemple par l'archivage hors ligne)."""
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except FileNotFoundError:
+            return self._index
+        if force or mtime != self._index_mtime:
+            with open(self.index_path, encoding="utf-8") as f:
+                self._index = json.load(f)
+            self._index_mtime = mtime
+        return self._index
+
+    def _save_index(self, index: Dict[str, Any]):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.index_path)
+        self._index, self._index_mtime = index, os.stat(self.index_path).st_mtime_ns
+
+    def segments(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._load_index()["segments"])
+
+    # --- Écriture --- #
+    def add(self, records: Iterable[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Écrit `records` dans de nouveaux segments (par jour de création) et les indexe."""
+        by_day = defaultdict(list)
+        for request_id, record in records:
+            created = id_time(request_id)
+            by_day[created.strftime("%Y%m%d") if created else "unknown"].append((request_id, record))
+
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            lock_fd = os.open(os.path.join(self.directory, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_fd, fcntl.LOCK_EX)  # attend un autre processus qui archive
+                # Index relu sous verrou: les numéros de segment suivent ceux de l'autre processus
+                index = dict(self._load_index(force=True))
+                index["segments"] = list(index["segments"])
+                added = []
+                for day in sorted(by_day):
+                    items = sorted(by_day[day], key=lambda item: item[0])
+                    for start in range(0, len(items), self.segment_size):
+                        chunk = items[start:start + self.segment_size]
+                        added.append(self._write_segment(day, len(index["segments"]) + len(added), chunk))
+                index["segments"].extend(added)
+                self._save_index(index)
+            finally:
+                os.close(lock_fd)  # libère le verrou
+        return added
+
+    def _write_segment(self, day: str, number: int, items: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        name = f"requests-{day}-{number:06d}.jsonl.gz"
+        path = os.path.join(self.directory, name)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6, mtime=0) as f:
+                for request_id, record in items:
+                    f.write((json.dumps({"id": request_id, "record": record}, ensure_ascii=False,
+                                        separators=(",", ":")) + "\n").encode("utf-8"))
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.chmod(tmp, 0o444)  # segment immuable
+        os.replace(tmp, path)
+        return {"file": name, "day": day, "count": len(items), "first_id": items[0][0], "last_id": items[-1][0],
+                "bytes": os.path.getsize(path), "created": datetime.utcnow().isoformat()}
+
+    # --- Lecture --- #
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """Enregistrement archivé de `request_id` (None s'il n'est dans aucun segment)."""
+        prefix = f'{{"id":{json.dumps(request_id)},'.encode("utf-8")
+        for segment in reversed(self.segments()):  # le plus récent d'abord
+            if not segment["first_id"] <= request_id <= segment["last_id"]:
+                continue
+            with gzip.open(os.path.join(self.directory, segment["file"]), "rb") as f:
+                for line in f:
+                    # Chaque ligne commence par son id: pas de décodage JSON des autres lignes
+                    if line.startswith(prefix):
+                        return json.loads(line)["record"]
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        segments = self.segments()
+        return {"segments": len(segments), "records": sum(s["count"] for s in segments),
+                "bytes": sum(s["bytes"] for s in segments)}
+
+
+class RetentionPolicy:
+    """Demandes terminées à archiver: plus vieilles que `max_age_days` jours, ou au-delà
+    des `max_records` demandes les plus récentes (None: pas de limite)."""
+
+    def __init__(self, max_age_days: Optional[float] = None, max_records: Optional[int] = None):
+        self.max_age_days = max_age_days
+        self.max_records = max_records
+
+    def expired(self, store, now: Optional[datetime] = None) -> List[str]:
+        """request_id à archiver, les plus anciens d'abord."""
+        now = now or datetime.utcnow()
+        created = []
+        for request_id, record in store.items():
+            created.append((id_time(request_id) or datetime.min, request_id, record.get("status")))
+        created.sort()
+        expired = set()
+        if self.max_age_days is not None:
+            cutoff = now - timedelta(days=self.max_age_days)
+            expired.update(rid for moment, rid, _ in created if moment < cutoff)
+        if self.max_records is not None and len(created) > self.max_records:
+            expired.update(rid for _, rid, _ in created[:len(created) - self.max_records])
+        # Une demande encore en cours reste dans le stockage (la file asynchrone la reprendra)
+        return [rid for _, rid, status in created if rid in expired and status == "done"]
+
+
+def compact(store, archive: Archive, policy: RetentionPolicy, dry_run: bool = False,
+            batch_size: int = 10000) -> Dict[str, Any]:
+    """Déplace les demandes expirées du stockage vers l'archive; retourne un résumé."""
+    expired = policy.expired(store)
+    summary = {"expired": len(expired), "archived": 0, "segments": 0, "bytes": 0}
+    if dry_run:
+        return summary
+    for start in range(0, len(expired), batch_size):
+        ids = expired[start:start + batch_size]
+        found = store.get_many(ids)  # une lecture par lot (JsonStore relit tout le fichier à chaque get)
+        records = [(rid, found[rid]) for rid in ids if rid in found]
+        if not records:
+            continue
+        segments = archive.add(records)
+        # Supprimés du stockage seulement une fois les segments et l'index sur disque
+        store.delete_many([rid for rid, _ in records])
+        summary["archived"] += len(records)
+        summary["segments"] += len(segments)
+        summary["bytes"] += sum(s["bytes"] for s in segments)
+    if summary["archived"]:
+        logging.info(f"[Archive] Archived {summary['archived']} requests into {summary['segments']} segments "
+                     f"({summary['bytes']} bytes) in {archive.directory}")
+    return summary
@@ -0,0 +1,182 @@
+"""
+Pool de clients SOAP (suds) partagé par le composite:
+- chaque WSDL enfant est chargé une seule fois (pré-chauffage au démarrage),
+- chaque thread du pool Twisted travaille sur sa propre copie (clone) du client,
+- un client n'est reconstruit que si son WSDL change (vérifié périodiquement, et après un
+  appel en échec); chaque service a son propre verrou de chargement,
+- chaque message envoyé porte le contexte de trace courant dans un en-tête SOAP.
+"""
+import copy
+import hashlib
+import logging
+import socket
+import threading
+import time
+import urllib.request
+from typing import Dict, Optional
+
+from suds import WebFault
+from suds.client import Client, ServiceSelector
+from suds.options import Options
+from suds.plugin import MessagePlugin
+from suds.sax.element import Element
+from suds.transport.https import HttpAuthenticated
+
+from services import tracing
+
+# Intervalle minimal (secondes) entre deux vérifications du WSDL d'un service
+WSDL_CHECK_INTERVAL = 30.0
+# Délai (secondes) d'un appel sans délai explicite (valeur par défaut de suds)
+CALL_TIMEOUT = 90.0
+# Délai (secondes) du chargement d'un WSDL hors appel (pré-chauffage)
+WSDL_TIMEOUT = 5.0
+
+
+def wsdl_digest(url: str, timeout: float = 5.0) -> str:
+    """Télécharge le WSDL et retourne son empreinte SHA-1."""
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        return hashlib.sha1(resp.read()).hexdigest()
+
+
+class TraceHeaderPlugin(MessagePlugin):
+    """
+    Ajoute l'en-tête TraceContext (services/tracing.py) du span courant à chaque message.
+    (Les soapheaders de suds sont lus dans les options du WSDL, partagées entre clones:
+    un plugin, propre à chaque clone, est sûr entre threads.)
+    """
+
+    def marshalled(self, context):
+        values = tracing.header_values()
+        if values is None:
+            return
+        ns = ("lt", tracing.HEADER_NS)
+        header = Element(tracing.HEADER_NAME, ns=ns)
+        for name, value in values.items():
+            header.append(Element(name, ns=ns).setText(value))
+        context.envelope.getChild("Header").append(header)
+
+
+def clone_client(master: Client) -> Client:
+    """
+    Copie légère d'un client: partage le WSDL parsé, mais pas les options ni le transport.
+    (Client.clone() de suds-py3 échoue sur le deepcopy des options liées.)
+    """
+    clone = copy.copy(master)
+    clone.options = Options()
+    clone.set_options(transport=HttpAuthenticated(), cache=None, plugins=[TraceHeaderPlugin()])
+    clone.service = ServiceSelector(clone, master.wsdl.services)
+    clone.messages = dict(tx=None, rx=None)
+    return clone
+
+
+class ClientPool:
+    """Clients suds partagés, un par service enfant, clonés par thread."""
+
+    def __init__(self, urls: Dict[str, str], check_interval: float = WSDL_CHECK_INTERVAL):
+        self.urls = dict(urls)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()  # court: numéro de génération et tables ci-dessous
+        # Un verrou par service: le chargement d'un WSDL ne bloque pas les appels aux autres
+        self._locks = {name: threading.Lock() for name in self.urls}
+        self._masters = {}      # name -> (generation, Client, digest)
+        self._checked_at = {}   # name -> dernière vérification du WSDL
+        self._generation = 0
+        self._local = threading.local()
+
+    # --- Chargement --- #
+    def _build(self, name: str, timeout: float):
+        """Charge (ou recharge) le client maître de `name`. Appelé sous le verrou du service."""
+        url = self.urls[name]
+        digest = wsdl_digest(url, timeout)
+        # cache=None: le pool joue le rôle de cache, suds ne doit pas servir un WSDL périmé
+        client = Client(url, cache=None, timeout=timeout)
+        with self._lock:
+            self._generation += 1
+            self._masters[name] = entry = (self._generation, client, digest)
+            self._checked_at[name] = time.monotonic()
+        logging.info(f"[ClientPool] Loaded WSDL for {name} ({url})")
+        return entry
+
+    def _master(self, name: str, timeout: float = WSDL_TIMEOUT):
+        """Client maître de `name`; le chargement et la vérification du WSDL durent au plus `timeout` s."""
+        entry = self._masters.get(name)
+        if entry is not None and time.monotonic() - self._checked_at.get(name, 0) < self.check_interval:
+            return entry
+        lock = self._locks[name]
+        if entry is not None:
+            # Vérification due: un seul thread la fait, les autres gardent le client courant
+            if not lock.acquire(blocking=False):
+                return entry
+        elif not lock.acquire(timeout=timeout):
+            raise TimeoutError(f"Timed out waiting for the WSDL of {name}")
+        try:
+            entry = self._masters.get(name)
+            if entry is None:
+                return self._build(name, timeout)
+            if time.monotonic() - self._checked_at.get(name, 0) < self.check_interval:
+                return entry  # vérifié par un autre thread entre-temps
+            self._checked_at[name] = time.monotonic()
+            try:
+                digest = wsdl_digest(self.urls[name], timeout)
+            except Exception as e:
+                logging.warning(f"[ClientPool] WSDL check failed for {name}: {e}")
+                return entry
+            if digest != entry[2]:
+                logging.info(f"[ClientPool] WSDL changed for {name}, rebuilding client")
+                return self._build(name, timeout)
+            return entry
+        finally:
+            lock.release()
+
+    def warm(self, names=None):
+        """Charge les WSDL (tous par défaut); un service indisponible sera chargé au premier appel."""
+        for name in (self.urls if names is None else names):
+            try:
+                self._master(name)
+            except Exception as e:
+                logging.warning(f"[ClientPool] Could not warm {name}: {e}")
+
+    def invalidate(self, name: str):
+        """Fait revérifier le WSDL de `name` au prochain appel; le client n'est reconstruit que s'il a changé."""
+        with self._lock:
+            self._checked_at[name] = 0
+
+    # --- Utilisation --- #
+    def client(self, name: str, timeout: float = WSDL_TIMEOUT) -> Client:
+        """Retourne le clone propre au thread courant (options et transport non partagés)."""
+        generation, master, _ = self._master(name, timeout)
+        clones = getattr(self._local, "clones", None)
+        if clones is None:
+            clones = self._local.clones = {}
+        cached = clones.get(name)
+        if cached is None or cached[0] != generation:
+            cached = clones[name] = (generation, clone_client(master))
+        return cached[1]
+
+    def call(self, name: str, operation: str, *args, timeout: Optional[float] = None):
+        """
+        Appelle `operation` sur le service `name`; `timeout` (secondes) borne le tout: chargement
+        ou vérification du WSDL puis appel (socket). Après un échec autre qu'une expiration du
+        délai (service lent), le WSDL est revérifié au prochain appel.
+        """
+        timeout = timeout or CALL_TIMEOUT
+        deadline = time.monotonic() + timeout
+        client = self.client(name, timeout)
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise TimeoutError(f"No time left to call {name} after loading its WSDL")
+        client.set_options(timeout=left)
+        try:
+            return getattr(client.service, operation)(*args)
+        except WebFault:
+            raise  # fault SOAP renvoyé par le service: le client reste valide
+        except Exception as e:
+            if not _timed_out(e):
+                self.invalidate(name)
+            raise
+
+
+def _timed_out(error: Exception) -> bool:
+    # urllib enveloppe parfois le timeout du socket dans une URLError
+    return isinstance(error, (TimeoutError, socket.timeout)) or \
+        isinstance(getattr(error, "reason", None), (TimeoutError, socket.timeout))
@@ -0,0 +1,50 @@
+"""
+Archivage hors ligne: déplace les demandes terminées hors rétention du stockage vers
+l'archive compressée (composite_service/archive/, voir archive.py). getResult les retrouve
+ensuite dans l'archive.
+
+Usage: python composite_service/compact_db.py [--days 30] [--max-records 100000] [--dry-run] [--vacuum]
+Les limites par défaut viennent de LOAN_RETENTION_DAYS / LOAN_RETENTION_MAX_RECORDS, le
+backend de LOAN_STORE_BACKEND. Avec le backend "wal", arrêter le composite avant (le journal
+est verrouillé par le processus qui le tient).
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+try:
+    from composite_service.archive import Archive, RetentionPolicy, compact
+    from composite_service.storage import SqliteStore
+    from composite_service import utils
+except ModuleNotFoundError:
+    sys.path.append(os.path.dirname(__file__))
+    from archive import Archive, RetentionPolicy, compact
+    from storage import SqliteStore
+    import utils
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive expired requests and remove them from the store.")
+    parser.add_argument("--days", type=float, default=utils.RETENTION_DAYS, help="keep requests younger than this")
+    parser.add_argument("--max-records", type=int, default=utils.RETENTION_MAX_RECORDS,
+                        help="keep at most this many recent requests")
+    parser.add_argument("--archive", default=utils.ARCHIVE_DIR, help="archive directory")
+    parser.add_argument("--dry-run", action="store_true", help="only count the requests to archive")
+    parser.add_argument("--vacuum", action="store_true", help="reclaim SQLite space afterwards")
+    args = parser.parse_args()
+
+    if args.days is None and args.max_records is None:
+        parser.error("set --days and/or --max-records (or LOAN_RETENTION_DAYS / LOAN_RETENTION_MAX_RECORDS)")
+    store = utils.get_store()
+    archive = Archive(args.archive)
+    summary = compact(store, archive, RetentionPolicy(args.days, args.max_records), dry_run=args.dry_run)
+    if args.vacuum and isinstance(store, SqliteStore) and not args.dry_run:
+        store.vacuum()
+    if hasattr(store, "close"):
+        store.close()
+    summary["archive"] = archive.stats()
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,51 @@
+"""
+Événements de fin de traitement des demandes du composite: save_decision(s) publie les
+request_id terminés, les abonnés (waitForResult, voir longpoll.py) sont appelés aussitôt.
+
+Les callbacks sont appelés dans le thread qui a enregistré la décision (thread du pool
+Twisted ou worker du mode asynchrone): ils doivent rendre la main vite (par exemple
+reactor.callFromThread). Les événements sont propres au processus: une demande terminée
+par un autre worker n'est vue qu'en relisant le stockage.
+"""
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List
+
+
+class CompletionHub:
+    """Abonnements request_id -> callbacks, appelés une fois quand la demande est terminée."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[Callable[[str], None]]] = defaultdict(list)
+
+    def subscribe(self, request_id: str, callback: Callable[[str], None]):
+        with self._lock:
+            self._subscribers[request_id].append(callback)
+
+    def unsubscribe(self, request_id: str, callback: Callable[[str], None]):
+        with self._lock:
+            callbacks = self._subscribers.get(request_id)
+            if callbacks and callback in callbacks:
+                callbacks.remove(callback)
+                if not callbacks:
+                    del self._subscribers[request_id]
+
+    def publish(self, request_ids: Iterable[str]):
+        """Signale la fin des demandes `request_ids` (les abonnements correspondants sont retirés)."""
+        with self._lock:
+            if not self._subscribers:
+                return
+            fired = [(rid, self._subscribers.pop(rid)) for rid in request_ids if rid in self._subscribers]
+        for request_id, callbacks in fired:
+            for callback in callbacks:
+                try:
+                    callback(request_id)
+                except Exception as e:
+                    logging.error(f"[Completions] Callback for {request_id} failed: {e}")
+
+    def waiting(self) -> int:
+        """Nombre d'abonnements en cours."""
+        with self._lock:
+            return sum(len(callbacks) for callbacks in self._subscribers.values())
@@ -0,0 +1,143 @@
+"""
+Déduplication des demandes du composite: une demande dont le texte normalisé a déjà été
+traité il y a moins de `ttl` secondes reçoit la décision existante (et son request_id)
+sans rappeler les services ni créer de nouvel enregistrement.
+
+La clé est l'empreinte SHA-256 du texte normalisé (blancs regroupés comme par le service
+d'extraction), stable d'un processus et d'un redémarrage à l'autre. Les soumissions
+identiques simultanées sont regroupées: la première traite la demande, les autres
+attendent son résultat (compté dans `coalesced`). Les échecs ne sont pas mis en cache.
+
+Le cache est propre à chaque processus: avec plusieurs workers (hosting.py), un doublon
+traité par un autre worker est traité à nouveau.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def normalize(text: str) -> str:
+    """Texte tel que l'extraction le voit: blancs (espaces, tabulations, fins de ligne) regroupés."""
+    return " ".join((text or "").split())
+
+
+def request_digest(text: str) -> str:
+    """Empreinte hexadécimale (SHA-256) du texte normalisé."""
+    return hashlib.sha256(normalize(text).encode("utf-8")).hexdigest()
+
+
+class DecisionCache:
+    """Cache LRU + TTL des résultats par empreinte, avec regroupement des calculs en cours."""
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # empreinte -> (expiration, valeur)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.coalesced = self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, digest: str) -> Optional[Any]:
+        """Valeur encore valide pour `digest`, None sinon (sans regroupement: submitBatch)."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[digest]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, digest: str, value: Any):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._put(digest, value)
+
+    def forget(self, digest: str, value: Any = None):
+        """Retire l'entrée de `digest` (seulement si sa valeur est `value`, si elle est donnée)."""
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and (value is None or entry[1] == value):
+                del self._entries[digest]
+
+    def _put(self, digest, value):
+        self._entries[digest] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def run(self, digest: str, compute: Callable[[], Any],
+            cacheable: Callable[[Any], bool] = lambda value: True) -> Tuple[Any, str]:
+        """
+        Valeur pour `digest` et son origine: "hit" (cache), "coalesced" (calcul identique en
+        cours dans un autre thread) ou "miss" (calculée ici par `compute`, mise en cache si
+        `cacheable(valeur)`). Une exception de `compute` est transmise aux threads regroupés.
+        """
+        if not self.enabled:
+            with self._lock:
+                self.misses += 1
+            return compute(), "miss"
+
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return entry[1], "hit"
+                del self._entries[digest]
+            future = self._inflight.get(digest)
+            leader = future is None
+            if leader:
+                future = self._inflight[digest] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result(), "coalesced"
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[digest]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            # Mis en cache avant de quitter les calculs en cours: pas de fenêtre où un doublon recalculerait
+            del self._inflight[digest]
+            if cacheable(value):
+                self._put(digest, value)
+        future.set_result(value)
+        return value, "miss"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
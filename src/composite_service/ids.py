@@ -0,0 +1,115 @@
+"""
+Identifiants de demandes triables, uniques sans coordination entre processus (format ULID):
+
+    REQ_01JAB3Z9Q8N4W6X2C5V7T0RKHM
+        ^^^^^^^^^^                     48 bits: millisecondes depuis l'epoch Unix (UTC)
+                  ^^^^^^^^^^^^^^^^     80 bits: aléatoires (os.urandom)
+
+Encodage base32 de Crockford (26 caractères, sans I, L, O, U): l'ordre lexicographique
+des identifiants est leur ordre chronologique, à la milliseconde. Dans un processus, les
+identifiants d'une même milliseconde sont strictement croissants (partie aléatoire
+incrémentée). Entre processus (workers forkés, plusieurs machines), 80 bits aléatoires
+par milliseconde rendent une collision négligeable.
+
+Les identifiants historiques (REQ_AAAAMMJJHHMMSS_NNNN) sont eux aussi triés par seconde:
+`id_ranges` donne les plages de clés des deux formats pour un intervalle de temps, que le
+stockage parcourt sur sa clé primaire.
+"""
+import os
+import threading
+from datetime import datetime, timezone
+from time import time_ns
+from typing import List, Optional, Tuple
+
+PREFIX = "REQ_"
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_DECODE = {c: i for i, c in enumerate(ALPHABET)}
+_RANDOM_BITS = 80
+_RANDOM_MAX = (1 << _RANDOM_BITS) - 1
+# Paires de caractères pour 10 bits: 13 consultations de table par identifiant au lieu de 26 divisions
+_PAIRS = [ALPHABET[i >> 5] + ALPHABET[i & 31] for i in range(1024)]
+
+
+def _encode(value: int) -> str:
+    """Entier de 128 bits -> 26 caractères base32 (les 2 bits de tête sont nuls, 130 bits encodés)."""
+    return "".join(_PAIRS[(value >> shift) & 1023] for shift in range(120, -1, -10))
+
+
+class RequestIdGenerator:
+    """Générateur monotone par processus (réinitialisé après un fork)."""
+
+    def __init__(self, prefix: str = PREFIX):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # L'enfant ne doit pas continuer la séquence du parent (mêmes valeurs dans la même ms)
+        self._lock = threading.Lock()
+        self._last_ms = -1
+
+    def new(self) -> str:
+        ms = time_ns() // 1_000_000
+        with self._lock:
+            if ms <= self._last_ms:
+                # Même milliseconde (ou horloge reculée): on continue la séquence de la dernière ms
+                ms, random_part = self._last_ms, self._last_random + 1
+                if random_part > _RANDOM_MAX:
+                    ms, random_part = ms + 1, int.from_bytes(os.urandom(10), "big")
+            else:
+                random_part = int.from_bytes(os.urandom(10), "big")
+            self._last_ms, self._last_random = ms, random_part
+        return self.prefix + _encode((ms << _RANDOM_BITS) | random_part)
+
+
+GENERATOR = RequestIdGenerator()
+
+
+def new_id() -> str:
+    return GENERATOR.new()
+
+
+def lower_bound(moment: datetime, prefix: str = PREFIX) -> str:
+    """Plus petit identifiant possible à `moment` (bornes de parcours par plage de temps)."""
+    return prefix + _encode(_ms(moment) << _RANDOM_BITS)
+
+
+def upper_bound(moment: datetime, prefix: str = PREFIX) -> str:
+    """Plus grand identifiant possible à `moment`."""
+    return prefix + _encode((_ms(moment) << _RANDOM_BITS) | _RANDOM_MAX)
+
+
+def _ms(moment: datetime) -> int:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)  # les dates du stockage sont en UTC naïf
+    return int(moment.timestamp() * 1000)
+
+
+def id_ranges(start: datetime, end: datetime, prefix: str = PREFIX) -> List[Tuple[str, str]]:
+    """Plages [min, max] d'identifiants créés entre `start` et `end` (historiques d'abord, plus anciens)."""
+    return [
+        # Format historique à la seconde: "REQ_<AAAAMMJJHHMMSS>" est un préfixe commun, "_~" dépasse tout suffixe
+        (prefix + start.strftime("%Y%m%d%H%M%S"), prefix + end.strftime("%Y%m%d%H%M%S") + "_~"),
+        (lower_bound(start, prefix), upper_bound(end, prefix)),
+    ]
+
+
+def is_sortable(request_id: str, prefix: str = PREFIX) -> bool:
+    body = request_id[len(prefix):]
+    return request_id.startswith(prefix) and len(body) == 26 and all(c in _DECODE for c in body)
+
+
+def id_time(request_id: str, prefix: str = PREFIX) -> Optional[datetime]:
+    """Instant de création (UTC naïf) d'un identifiant, nouveau ou historique; None si illisible."""
+    if is_sortable(request_id, prefix):
+        value = 0
+        for c in request_id[len(prefix):len(prefix) + 10]:
+            value = value * 32 + _DECODE[c]
+        return datetime.fromtimestamp(value / 1000, timezone.utc).replace(tzinfo=None)
+    try:
+        return datetime.strptime(request_id[len(prefix):len(prefix) + 14], "%Y%m%d%H%M%S")
+    except ValueError:
+        return None
@@ -0,0 +1,99 @@
+"""
+File de traitement asynchrone du composite (mode LOAN_ASYNC).
+
+La file durable est le stockage lui-même: une demande acceptée est enregistrée avec
+status=processing avant d'entrer dans la file en mémoire, et les demandes encore en
+processing au démarrage sont remises en file (recover). Un pool borné de threads
+consomme la file et appelle `process(request_id)` pour chaque demande.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Any
+
+
+class QueueFull(Exception):
+    """La file a atteint sa capacité maximale."""
+
+
+class JobQueue:
+    """File bornée (`max_pending`) consommée par `workers` threads."""
+
+    def __init__(self, process: Callable[[str], None], workers: int = 4, max_pending: int = 1000):
+        self.process = process
+        self.workers = workers
+        self.max_pending = max_pending
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=max_pending)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._started_at = None
+        self.busy = 0
+        self.busy_time = 0.0
+        self.processed = 0
+        self.failed = 0
+        self.recovered = 0
+
+    def start(self):
+        """Démarre les threads de traitement (une seule fois)."""
+        with self._lock:
+            if self._threads:
+                return
+            self._started_at = time.monotonic()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"loan-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, request_id: str):
+        """Met une demande déjà enregistrée en file; lève QueueFull si la file est pleine."""
+        try:
+            self._queue.put_nowait(request_id)
+        except queue.Full:
+            raise QueueFull(f"Job queue is full ({self.max_pending} pending requests)")
+
+    def recover(self, request_ids: Iterable[str]) -> int:
+        """Remet en file des demandes restées en processing (bloque si la file est pleine)."""
+        count = 0
+        for request_id in request_ids:
+            self._queue.put(request_id)
+            count += 1
+        with self._lock:
+            self.recovered += count
+        return count
+
+    def _work(self):
+        while True:
+            request_id = self._queue.get()
+            with self._lock:
+                self.busy += 1
+            start = time.monotonic()
+            ok = True
+            try:
+                self.process(request_id)
+            except Exception as e:
+                ok = False
+                logging.error(f"[Jobs] Unhandled error on {request_id}: {e}", exc_info=True)
+            finally:
+                with self._lock:
+                    self.busy -= 1
+                    self.busy_time += time.monotonic() - start
+                    self.processed += 1
+                    self.failed += 0 if ok else 1
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+            capacity = uptime * self.workers
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_pending": self.max_pending,
+                "workers": self.workers,
+                "busy_workers": self.busy,
+                "utilization": round(self.busy_time / capacity, 4) if capacity else 0.0,
+                "processed": self.processed,
+                "failed": self.failed,
+                "recovered": self.recovered,
+                "uptime": round(uptime, 1),
+            }
@@ -0,0 +1,158 @@
+"""
+waitForResult en attente longue sans thread bloqué: la ressource Twisted placée devant
+l'application WSGI du composite garde les requêtes waitForResult dans le réacteur jusqu'à
+la fin de la demande (événement de CompletionHub, voir completions.py) ou l'expiration du
+délai, puis seulement les transmet à l'application Spyne, qui répond aussitôt avec l'état
+courant. Une attente coûte une connexion et un abonnement, pas un thread du pool Twisted
+(10 threads par défaut): des milliers de clients peuvent attendre en même temps.
+
+L'état des demandes est relu dans le pool en un seul appel pour toutes les attentes
+arrivées pendant un même tour du réacteur, puis toutes les `recheck` secondes pour
+l'ensemble des attentes: ce dernier réveille les demandes terminées par un autre
+processus (plusieurs workers).
+Les autres requêtes (WSDL, autres opérations) passent directement à l'application WSGI.
+"""
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+from lxml import etree
+from twisted.internet import defer, threads
+from twisted.web.resource import Resource
+from twisted.web.server import NOT_DONE_YET
+
+_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+
+
+class _Waiter:
+    """Une requête HTTP waitForResult en attente."""
+
+    def __init__(self, resource: "LongPollResource", request, request_id: str):
+        self.resource = resource
+        self.request = request
+        self.request_id = request_id
+        self.timer = None
+        self.active = True
+
+    def on_complete(self, request_id: str):
+        # Appelé dans le thread qui a enregistré la décision
+        self.resource.reactor.callFromThread(self.wake)
+
+    def stop(self) -> bool:
+        """Retire l'attente (une seule fois); faux si elle était déjà terminée."""
+        if not self.active:
+            return False
+        self.active = False
+        self.resource.hub.unsubscribe(self.request_id, self.on_complete)
+        if self.timer is not None and self.timer.active():
+            self.timer.cancel()
+        self.resource.waiters.pop(self.request, None)
+        return True
+
+    def wake(self, *_):
+        """Demande terminée ou délai écoulé: l'application Spyne répond avec l'état courant."""
+        if self.stop():
+            self.resource.wsgi.render(self.request)
+
+
+class LongPollResource(Resource):
+    """Ressource Twisted devant `wsgi` (WSGIResource) qui fait attendre `operation` dans le réacteur."""
+
+    isLeaf = True
+
+    def __init__(self, wsgi: Resource, hub, is_finished: Callable[[str], bool], namespace: str = "loan.composite",
+                 operation: str = "waitForResult", default_timeout: float = 30.0, max_timeout: float = 60.0,
+                 recheck: float = 1.0):
+        super().__init__()
+        from twisted.internet import reactor  # dans le worker, après un éventuel fork
+        self.reactor = reactor
+        self.wsgi = wsgi
+        self.hub = hub
+        self.is_finished = is_finished
+        self.tag = f"{{{namespace}}}{operation}"
+        self.marker = operation.encode("ascii")
+        self.default_timeout = default_timeout
+        self.max_timeout = max_timeout
+        self.recheck = recheck
+        self.waiters: Dict[object, _Waiter] = {}
+        self._fresh: List[_Waiter] = []  # attentes pas encore vérifiées (une lecture groupée par tour)
+        self._sweeping = False
+
+    def render(self, request):
+        if request.method == b"POST":
+            body = request.content.read()
+            request.content.seek(0)  # l'application WSGI relit le corps
+            if self.marker in body:
+                args = self._parse(body)
+                if args is not None:
+                    self._wait(request, *args)
+                    return NOT_DONE_YET
+        return self.wsgi.render(request)
+
+    def _parse(self, body: bytes) -> Optional[Tuple[str, Optional[float]]]:
+        """(request_id, timeout) d'un appel waitForResult; None si ce n'en est pas un (Spyne répondra)."""
+        try:
+            call = etree.fromstring(body, _PARSER).find(f".//{self.tag}")
+        except etree.XMLSyntaxError:
+            return None
+        if call is None:
+            return None
+        args = {etree.QName(child).localname: (child.text or "").strip() for child in call}
+        if not args.get("request_id"):
+            return None
+        try:
+            timeout = float(args["timeout"]) if args.get("timeout") else None
+        except ValueError:
+            return None
+        return args["request_id"], timeout
+
+    def _wait(self, request, request_id: str, timeout: Optional[float]):
+        timeout = self.default_timeout if timeout is None else timeout
+        timeout = min(max(timeout, 0.0), self.max_timeout)
+        waiter = _Waiter(self, request, request_id)
+        self.waiters[request] = waiter
+        # Abonné avant la première lecture: une fin de traitement entre les deux n'est pas perdue
+        self.hub.subscribe(request_id, waiter.on_complete)
+        waiter.timer = self.reactor.callLater(timeout, waiter.wake)
+        request.notifyFinish().addErrback(lambda _: waiter.stop())  # client déconnecté
+        if not self._fresh:
+            self.reactor.callLater(0, self._check_fresh)
+        self._fresh.append(waiter)
+        self._schedule_sweep()
+
+    def _check_fresh(self):
+        fresh, self._fresh = self._fresh, []
+        self._check(fresh)
+
+    def _check(self, waiters):
+        """Relit (dans le pool, un seul appel) l'état des demandes attendues; réveille celles terminées."""
+        ids = {w.request_id for w in waiters if w.active}
+        if not ids:
+            return defer.succeed(None)
+
+        def finished():
+            return {rid for rid in ids if self.is_finished(rid)}
+
+        def wake(done):
+            for waiter in waiters:
+                if waiter.request_id in done:
+                    waiter.wake()
+
+        def failed(failure):
+            logging.error(f"[LongPoll] Status check failed: {failure.getErrorMessage()}")
+            for waiter in waiters:
+                waiter.wake()  # l'application Spyne répondra avec l'erreur
+
+        return threads.deferToThreadPool(self.reactor, self.reactor.getThreadPool(), finished) \
+            .addCallbacks(wake, failed)
+
+    def _schedule_sweep(self):
+        if self.recheck > 0 and not self._sweeping and self.waiters:
+            self._sweeping = True
+            self.reactor.callLater(self.recheck, self._sweep)
+
+    def _sweep(self):
+        def done(_):
+            self._sweeping = False
+            self._schedule_sweep()
+
+        self._check(list(self.waiters.values())).addBoth(done)
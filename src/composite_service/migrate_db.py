@@ -0,0 +1,40 @@
+"""
+Migration ponctuelle: importe database.json (backend historique) dans la base SQLite.
+Le composite le fait seul à la création de la base (première ouverture); ce script sert
+à réimporter le fichier, ou à migrer vers un autre chemin.
+
+Usage: python composite_service/migrate_db.py [--json database.json] [--sqlite database.sqlite3]
+Les enregistrements déjà présents dans SQLite avec le même request_id sont remplacés.
+"""
+import argparse
+import logging
+import os
+import sys
+
+try:
+    from composite_service.storage import JsonStore, SqliteStore
+    from composite_service.utils import DB_PATH, SQLITE_PATH
+except ModuleNotFoundError:
+    sys.path.append(os.path.dirname(__file__))
+    from storage import JsonStore, SqliteStore
+    from utils import DB_PATH, SQLITE_PATH
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def migrate(json_path: str, sqlite_path: str) -> int:
+    """Copie tous les enregistrements de `json_path` vers `sqlite_path`; retourne leur nombre."""
+    if not os.path.exists(json_path):
+        raise FileNotFoundError(f"No JSON database at {json_path}")
+    records = JsonStore(json_path).read_db()["requests"]
+    return SqliteStore(sqlite_path).import_records(records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import database.json into the SQLite store.")
+    parser.add_argument("--json", default=DB_PATH, help="source JSON database")
+    parser.add_argument("--sqlite", default=SQLITE_PATH, help="target SQLite database")
+    args = parser.parse_args()
+
+    count = migrate(args.json, args.sqlite)
+    logging.info(f"[Migration] Imported {count} requests from {args.json} into {args.sqlite}")
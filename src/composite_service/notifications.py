@@ -0,0 +1,358 @@
+"""
+Envoi des notifications du composite en arrière-plan:
+- `notify` ne fait que mettre le message en file (ne bloque pas submitRequest),
+- un thread regroupe les messages et les envoie par lots (taille ou intervalle atteint),
+- chaque sink (fichier, SMTP) réessaie ses lots en échec avec un délai croissant, puis
+  les écrit dans un fichier de secours: aucun message n'est perdu,
+- la file est vidée à l'arrêt du processus (atexit); si les sinks échouent encore au bout
+  du délai, le lot en cours et le reste de la file partent dans le fichier de secours, et
+  une notification arrivée après l'arrêt est envoyée directement par l'appelant.
+
+Un sink expose `send(lot)`, qui retourne le nombre de messages livrés (SendError en cas
+d'échec partiel), et peut refuser des messages avec `accepts(notification)`.
+
+Sinks fournis: FileSink (notifications.log, format historique) et SmtpSink. Un serveur
+SMTP de remplacement permet de tester l'envoi hors ligne:
+    python composite_service/notifications.py --port 8025 --latency 0.02
+"""
+import argparse
+import atexit
+import logging
+import os
+import queue
+import random
+import smtplib
+import socketserver
+import threading
+import time
+from datetime import datetime
+from email.message import EmailMessage
+from typing import List, Optional, Tuple
+
+# (horodatage, request_id, destinataire, message)
+Notification = Tuple[str, str, str, str]
+
+
+class SendError(Exception):
+    """Échec d'envoi partiel: `remaining` contient les notifications encore à envoyer."""
+
+    def __init__(self, message: str, remaining: List[Notification]):
+        super().__init__(message)
+        self.remaining = remaining
+
+
+class FileSink:
+    """Ajoute les notifications à un fichier texte, une ligne par message, un ajout par lot."""
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def send(self, batch: List[Notification]) -> int:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(f"{now} | {request_id} | to={to_email} | {message}\n"
+                         for now, request_id, to_email, message in batch)
+        return len(batch)
+
+
+class SmtpSink:
+    """Envoie un e-mail par notification, une seule connexion SMTP par lot."""
+
+    name = "smtp"
+
+    def __init__(self, host: str, port: int = 25, sender: str = "noreply@loan.local", timeout: float = 10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.timeout = timeout
+
+    @staticmethod
+    def accepts(notification: Notification) -> bool:
+        # Les demandes en erreur n'ont pas d'adresse ("unknown"): rien à envoyer par e-mail
+        return "@" in notification[2]
+
+    def send(self, batch: List[Notification]) -> int:
+        batch = [n for n in batch if self.accepts(n)]
+        if not batch:
+            return 0
+        sent = 0
+        try:
+            with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+                for now, request_id, to_email, message in batch:
+                    mail = EmailMessage()
+                    mail["From"] = self.sender
+                    mail["To"] = to_email
+                    mail["Subject"] = f"Loan request {request_id}: {message}"
+                    mail.set_content(f"{now}\n\nYour loan request {request_id}: {message}\n")
+                    smtp.send_message(mail)
+                    sent += 1
+        except (smtplib.SMTPException, OSError) as e:
+            # Les messages déjà acceptés ne sont pas renvoyés (pas de doublons au retry)
+            raise SendError(str(e), batch[sent:]) from e
+        return sent
+
+
+class Dispatcher:
+    """
+    File de notifications vidée par un thread: lots de `batch_size` messages au plus,
+    envoyés au plus tard `flush_interval` secondes après leur arrivée. Un lot en échec
+    est retenté `max_retries` fois (délai doublé à chaque fois) puis écrit dans
+    `fallback_path`.
+
+    Compteurs, une fois par notification: `sent` (livrée par chaque sink qui l'accepte),
+    `failed` (au moins un sink ne l'a pas livrée: écrite dans le fichier de secours);
+    `delivered` donne les messages livrés par sink.
+    """
+
+    def __init__(self, sinks, batch_size: int = 100, flush_interval: float = 1.0,
+                 max_retries: int = 5, retry_delay: float = 0.5, fallback_path: Optional[str] = None):
+        self.sinks = list(sinks)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.fallback = FileSink(fallback_path) if fallback_path else None
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        self._abort = threading.Event()  # arrêt hors délai: plus de nouvelle tentative
+        self._in_flight: Optional[List[Notification]] = None  # lot en cours d'envoi par le thread
+        self.sent = self.retries = self.failed = 0
+        self.delivered = {sink.name: 0 for sink in self.sinks}
+
+    # --- Producteurs --- #
+    def notify(self, request_id: str, to_email: str, message: str):
+        self.notify_many([(request_id, to_email, message)])
+
+    def notify_many(self, notifications):
+        now = datetime.utcnow().isoformat()
+        self._ensure_thread()
+        batch = [(now, request_id, to_email, message) for request_id, to_email, message in notifications]
+        with self._lock:
+            if not self._closed:
+                for notification in batch:
+                    self._queue.put(notification)
+                return
+        # Après flush(): plus de thread pour vider la file, l'appelant envoie lui-même
+        if batch:
+            self._deliver(batch)
+
+    def _ensure_thread(self):
+        # Après un fork, le thread du parent n'existe pas dans l'enfant: on en démarre un
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                    self._closed = False
+                    self._abort = threading.Event()
+                    self._in_flight = None
+                    self._thread = threading.Thread(target=self._run, name="notifications", daemon=True)
+                    self._thread.start()
+                    self._pid = os.getpid()
+
+    # --- Consommateur --- #
+    def _next_batch(self) -> List[Notification]:
+        """Attend un premier message puis complète le lot jusqu'à la taille ou l'intervalle."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and batch[-1] is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            stop = batch[-1] is None
+            batch = [n for n in batch if n is not None]
+            if batch:
+                with self._lock:
+                    self._in_flight = batch
+                self._deliver(batch, in_flight=True)
+            if stop:
+                return
+
+    def _deliver(self, batch: List[Notification], in_flight: bool = False):
+        """Envoie le lot à chaque sink; ce qu'un sink n'a pas livré part dans le fichier de secours."""
+        delivered, failed = set(), {}  # id(notification) livrées par au moins un sink / en échec
+        for sink in self.sinks:
+            accepts = getattr(sink, "accepts", None)
+            pending = [n for n in batch if accepts is None or accepts(n)]
+            delay, failures = self.retry_delay, 0
+            while pending and not self._abort.is_set():
+                try:
+                    self.delivered[sink.name] += sink.send(pending)
+                    delivered.update(map(id, pending))
+                    pending = []
+                except Exception as e:
+                    remaining = getattr(e, "remaining", pending)
+                    left = set(map(id, remaining))
+                    done = [n for n in pending if id(n) not in left]
+                    self.delivered[sink.name] += len(done)
+                    delivered.update(map(id, done))
+                    self.retries += 1
+                    if done:
+                        # Envoi partiel: le sink répond, on reprend tout de suite sans pénalité
+                        pending, delay, failures = remaining, self.retry_delay, 0
+                        continue
+                    failures += 1
+                    if failures > self.max_retries:
+                        logging.error(f"[Notify] {sink.name}: {len(pending)} notifications not sent: {e}")
+                        break
+                    logging.warning(f"[Notify] {sink.name} failed ({e}), retry in {delay:.1f}s")
+                    self._abort.wait(delay)  # interrompu par un flush hors délai
+                    delay *= 2
+            failed.update((id(n), n) for n in pending)
+
+        with self._lock:
+            if in_flight:
+                if self._in_flight is None:
+                    return  # flush() hors délai a déjà écrit ce lot dans le fichier de secours
+                self._in_flight = None
+            self.sent += sum(1 for n in batch if id(n) in delivered and id(n) not in failed)
+            self.failed += len(failed)
+        if failed:
+            self._write_fallback(list(failed.values()))
+
+    def _write_fallback(self, notifications: List[Notification]):
+        if self.fallback:
+            self.fallback.send(notifications)
+        else:
+            logging.error(f"[Notify] {len(notifications)} notifications lost (no fallback file)")
+
+    def flush(self, timeout: float = 30):
+        """Arrête le thread après l'envoi de tout ce qui est en file (appelé à l'arrêt)."""
+        if self._pid != os.getpid() or self._closed:
+            return
+        with self._lock:
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            return
+        # Sinks encore en échec au bout de `timeout`: plus de nouvelle tentative; le lot en cours
+        # (ou ce qu'un envoi bloqué n'a pas fini) et le reste de la file vont au fichier de secours
+        self._abort.set()
+        self._thread.join(min(1.0, timeout))
+        with self._lock:
+            left, self._in_flight = list(self._in_flight or []), None
+            while not self._queue.empty():
+                left.append(self._queue.get_nowait())
+            left = [n for n in left if n is not None]
+            self.failed += len(left)
+        if left:
+            logging.error(f"[Notify] shutdown timeout, {len(left)} notifications written to the fallback file")
+            self._write_fallback(left)
+
+    def stats(self):
+        return {"pending": self._queue.qsize(), "sent": self.sent, "retries": self.retries,
+                "failed": self.failed, "delivered": dict(self.delivered), "sinks": [s.name for s in self.sinks]}
+
+
+def build_dispatcher(log_path: str, sinks: str = "file", smtp_host: str = "127.0.0.1", smtp_port: int = 25,
+                     smtp_from: str = "noreply@loan.local", **options) -> Dispatcher:
+    """Dispatcher avec les sinks listés dans `sinks` ("file", "smtp" ou "file,smtp")."""
+    available = {
+        "file": lambda: FileSink(log_path),
+        "smtp": lambda: SmtpSink(smtp_host, smtp_port, smtp_from),
+    }
+    names = [name.strip() for name in sinks.split(",") if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown notification sink(s) {unknown} (expected file and/or smtp)")
+    dispatcher = Dispatcher([available[name]() for name in names],
+                            fallback_path=os.path.splitext(log_path)[0] + ".failed.log", **options)
+    atexit.register(dispatcher.flush)
+    return dispatcher
+
+
+# ---------------------------------------------------------------------
+# Stand-in SMTP server (tests et benchmarks hors ligne)
+# ---------------------------------------------------------------------
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """Sous-ensemble du protocole SMTP suffisant pour smtplib (EHLO, MAIL, RCPT, DATA...)."""
+
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+    def handle(self):
+        server = self.server
+        self.reply("220 loan-smtp stand-in ready")
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command[:4].upper()
+            if verb in ("HELO", "EHLO"):
+                self.reply("250 loan-smtp")
+            elif verb == "MAIL":
+                sender, recipients = command[10:].strip(), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command[8:].strip())
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                for raw in iter(self.rfile.readline, b""):
+                    if raw in (b".\r\n", b".\n"):
+                        break
+                    data.append(raw)
+                if server.latency:
+                    time.sleep(server.latency)
+                if random.random() < server.fail_rate:
+                    self.reply("451 Temporary failure, try again later")
+                    continue
+                with server.lock:
+                    server.messages.append((sender, recipients, b"".join(data)))
+                    count = len(server.messages)
+                logging.info(f"[SMTP] Message for {', '.join(recipients)} ({count} received)")
+                self.reply("250 OK: queued")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            elif verb in ("RSET", "NOOP"):
+                sender, recipients = (None, []) if verb == "RSET" else (sender, recipients)
+                self.reply("250 OK")
+            else:
+                self.reply("502 Command not implemented")
+
+
+class StandInSmtpServer(socketserver.ThreadingTCPServer):
+    """Serveur SMTP en mémoire: messages reçus dans `messages`, latence et taux d'échec réglables."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int, latency: float = 0.0, fail_rate: float = 0.0, host: str = "127.0.0.1"):
+        super().__init__((host, port), _SmtpHandler)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.messages = []
+        self.lock = threading.Lock()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in SMTP server")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per message")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of messages refused (451)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = StandInSmtpServer(args.port, args.latency, args.fail_rate)
+    logging.info(f"[SMTP] Stand-in SMTP server on 127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
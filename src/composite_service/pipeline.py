@@ -0,0 +1,128 @@
+"""
+Orchestration du composite sous forme de petit graphe de dépendances:
+- chaque étape déclare les étapes dont elle dépend,
+- les étapes indépendantes s'exécutent en parallèle (ex: CC et PE après IE),
+- chaque étape a son propre délai maximal; une étape hors délai est abandonnée mais garde
+  son thread jusqu'à sa fin: chaque étape a donc au plus `max_in_flight` appels en vol, et
+  au-delà un nouvel appel échoue aussitôt (PipelineBusy) au lieu d'attendre un thread. Un
+  service lent n'occupe que les threads de son étape, pas ceux des autres,
+- `observe(nom, secondes, échec)` reçoit la durée de chaque étape (métriques),
+- les étapes voient les variables de contexte de l'appelant (contextvars: trace courante).
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class StageTimeout(Exception):
+    """Une étape n'a pas répondu dans le délai qui lui est imparti."""
+
+
+class PipelineBusy(Exception):
+    """Trop d'appels de l'étape encore en vol (dont des appels abandonnés après leur délai)."""
+
+
+class Stage:
+    """Étape du pipeline: `func(results)` reçoit les entrées et les sorties des étapes requises."""
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Any],
+                 requires: Iterable[str] = (), timeout: Optional[float] = None):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+        self.timeout = timeout
+
+
+class Pipeline:
+    """Exécute un ensemble d'étapes dès que leurs dépendances sont satisfaites."""
+
+    def __init__(self, stages: List[Stage], max_in_flight: int = 16,
+                 observe: Optional[Callable[[str, float, bool], None]] = None):
+        self.stages = {s.name: s for s in stages}
+        self.observe = observe
+        self.max_in_flight = max_in_flight
+        for stage in stages:
+            for dep in stage.requires:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' requires unknown stage '{dep}'")
+        # Autant de threads que de places: une étape admise ne fait jamais la queue
+        self._in_flight = {name: 0 for name in self.stages}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight * len(stages), thread_name_prefix="pipeline")
+
+    def _submit(self, stage: Stage, results: Dict[str, Any]):
+        """Lance `stage` sur une place libre de l'étape, PipelineBusy s'il n'y en a plus."""
+        with self._lock:
+            if self._in_flight[stage.name] >= self.max_in_flight:
+                raise PipelineBusy(f"Stage '{stage.name}' has {self.max_in_flight} calls in flight")
+            self._in_flight[stage.name] += 1
+        context = contextvars.copy_context()
+        try:
+            if self.observe:
+                future = self._executor.submit(context.run, self._call, stage, results)
+            else:
+                future = self._executor.submit(context.run, stage.func, results)
+        except BaseException:
+            self._release(stage.name)
+            raise
+        future.add_done_callback(lambda _: self._release(stage.name))  # aussi à l'annulation
+        return future
+
+    def _release(self, name: str):
+        with self._lock:
+            self._in_flight[name] -= 1
+
+    def in_flight(self) -> Dict[str, int]:
+        """Appels en vol par étape (y compris ceux abandonnés après leur délai)."""
+        with self._lock:
+            return dict(self._in_flight)
+
+    def _call(self, stage: Stage, results: Dict[str, Any]):
+        """Exécute une étape et transmet sa durée à `observe`."""
+        start = time.perf_counter()
+        try:
+            output = stage.func(results)
+        except BaseException:
+            self.observe(stage.name, time.perf_counter() - start, True)
+            raise
+        self.observe(stage.name, time.perf_counter() - start, False)
+        return output
+
+    def run(self, **inputs) -> Dict[str, Any]:
+        """Exécute le graphe et retourne {nom_étape: sortie} (plus les entrées)."""
+        results = dict(inputs)
+        pending = dict(self.stages)
+        running = {}  # future -> (stage, deadline)
+
+        try:
+            while pending or running:
+                # Lancer toutes les étapes dont les dépendances sont prêtes
+                for name, stage in list(pending.items()):
+                    if all(dep in results for dep in stage.requires):
+                        del pending[name]
+                        deadline = time.monotonic() + stage.timeout if stage.timeout else None
+                        running[self._submit(stage, dict(results))] = (stage, deadline)
+
+                if not running:
+                    raise RuntimeError(f"Unresolvable stage dependencies: {sorted(pending)}")
+
+                deadlines = [d for _, d in running.values() if d is not None]
+                wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                done, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    stage, _ = running.pop(future)
+                    results[stage.name] = future.result()  # propage l'exception de l'étape
+
+                now = time.monotonic()
+                for future, (stage, deadline) in running.items():
+                    if deadline is not None and now >= deadline and not future.done():
+                        raise StageTimeout(f"Stage '{stage.name}' timed out after {stage.timeout}s")
+        finally:
+            # Les étapes encore en vol sont abandonnées (leur résultat sera ignoré)
+            for future in running:
+                future.cancel()
+
+        return results
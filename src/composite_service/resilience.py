@@ -0,0 +1,288 @@
+"""
+Résilience des appels du composite vers les services enfants (autour des transports SOAP):
+- budget par demande (`request_budget`): chaque étape reçoit le temps restant divisé par le
+  nombre d'étapes qui restent sur le chemin critique (IE -> CC | PE -> DS); le temps non
+  utilisé par une étape rapide profite aux suivantes,
+- délai par tentative (timeout du socket suds) et tentatives bornées, séparées par une
+  attente aléatoire (full jitter) pour ne pas relancer tous les appels en même temps,
+- requête de couverture (hedging, optionnelle): si une tentative dépasse le p95 observé du
+  service, une seconde part en parallèle et la première réponse est retenue,
+- disjoncteur par service: après `failures` appels consécutifs en échec (toutes tentatives
+  épuisées), les appels échouent aussitôt (CircuitOpen) pendant `reset` secondes, puis un
+  appel d'essai décide de la réouverture.
+
+Une faute SOAP renvoyée par un service (WebFault) est une réponse: ni réessayée, ni comptée
+comme panne. Les services enfants sont sans effet de bord, une seconde tentative est sûre.
+"""
+import contextlib
+import contextvars
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+from suds import WebFault
+
+
+class CircuitOpen(Exception):
+    """Le disjoncteur du service est ouvert: appel refusé sans tentative."""
+
+
+class DeadlineExceeded(Exception):
+    """Aucune tentative n'a abouti dans le temps alloué à l'étape."""
+
+
+# Échéance (time.monotonic) de la demande en cours; les étapes du pipeline en héritent
+_DEADLINE: contextvars.ContextVar = contextvars.ContextVar("loan_deadline", default=None)
+
+
+@contextlib.contextmanager
+def request_budget(seconds: Optional[float]):
+    """Fixe l'échéance des appels faits dans ce bloc (None ou 0: pas de budget)."""
+    token = _DEADLINE.set(time.monotonic() + seconds if seconds else None)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+class LatencyWindow:
+    """Dernières durées d'appels réussis d'un service, pour son p95."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self._samples = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        samples = sorted(self._samples)
+        if len(samples) < self.min_samples:
+            return None
+        return samples[int(0.95 * (len(samples) - 1))]
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur fermé / ouvert / semi-ouvert (un seul appel d'essai à la fois). `failures`
+    compte des appels en échec, tentatives comprises: une tentative réessayée avec succès
+    n'est pas un échec.
+    """
+
+    def __init__(self, name: str, failures: int = 5, reset: float = 10.0):
+        self.name = name
+        self.failures = failures
+        self.reset = reset
+        self._lock = threading.Lock()
+        self._consecutive = 0
+        self._opened_at = None
+        self._probing = False
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half_open" if time.monotonic() - self._opened_at >= self.reset else "open"
+
+    def allow(self) -> bool:
+        """Lève CircuitOpen si l'appel doit échouer sans être tenté; True si c'est l'appel d'essai."""
+        if self.failures <= 0:
+            return False
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if time.monotonic() - self._opened_at >= self.reset and not self._probing:
+                self._probing = True  # semi-ouvert: cet appel sert d'essai
+                return True
+        raise CircuitOpen(f"Circuit open for {self.name}")
+
+    def success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logging.info(f"[Resilience] Circuit closed for {self.name}")
+            self._consecutive = 0
+            self._opened_at = None
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self._consecutive += 1
+            if self._probing or (self._opened_at is None and 0 < self.failures <= self._consecutive):
+                if self._opened_at is None:
+                    self.opened += 1
+                    logging.warning(f"[Resilience] Circuit opened for {self.name} "
+                                    f"after {self._consecutive} consecutive failed calls")
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class _HedgePool:
+    """
+    Threads des tentatives couvertes (partagés par tous les services). Une tentative perdante
+    garde son thread jusqu'à son délai: `submit` ne lance une tentative que sur un thread
+    libre et retourne None sinon (l'appelant tente sans couverture), rien ne fait la queue.
+    """
+
+    def __init__(self, size: int = 16):
+        self.size = size
+        self._busy = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="hedge")
+
+    def submit(self, fn, *args):
+        with self._lock:
+            if self._busy >= self.size:
+                return None
+            self._busy += 1
+        future = self._executor.submit(contextvars.copy_context().run, fn, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _):
+        with self._lock:
+            self._busy -= 1
+
+
+_HEDGE_POOL = _HedgePool()
+
+
+class ResilientTransport:
+    """
+    Enveloppe un transport (`transport(payload, timeout=...)` et `transport.batch(...)`) d'une
+    étape. `levels` est le nombre d'étapes restant sur le chemin critique à partir de celle-ci.
+    Sans budget de demande, l'étape dispose de `default_timeout` secondes (`batch_timeout`
+    pour les appels par lot de submitBatch).
+    """
+
+    def __init__(self, transport, stage: str, levels: int = 1, retries: int = 2, backoff: float = 0.05,
+                 hedge: bool = False, hedge_ratio: float = 0.1, breaker: Optional[CircuitBreaker] = None,
+                 default_timeout: float = 30.0, batch_timeout: float = 300.0,
+                 observe: Optional[Callable[[str, str], None]] = None):
+        self.transport = transport
+        self.mode = transport.mode
+        self.stage = stage
+        self.levels = levels
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge = hedge
+        self.hedge_ratio = hedge_ratio
+        self.breaker = breaker or CircuitBreaker(stage)
+        self.default_timeout = default_timeout
+        self.batch_timeout = batch_timeout
+        self.observe = observe or (lambda stage, event: None)
+        self.latency = LatencyWindow()
+        self._lock = threading.Lock()
+        self.counts = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "failed": 0, "rejected": 0}
+
+    def __call__(self, payload):
+        return self._run(lambda timeout: self.transport(payload, timeout=timeout), self.hedge)
+
+    def batch(self, payloads: list) -> list:
+        return self._run(lambda timeout: self.transport.batch(payloads, timeout=timeout), False, self.batch_timeout)
+
+    def _count(self, event: str):
+        with self._lock:
+            self.counts[event] += 1
+        self.observe(self.stage, event)
+
+    def _stage_deadline(self, timeout: Optional[float]) -> float:
+        now = time.monotonic()
+        deadline = _DEADLINE.get()
+        if deadline is None:
+            return now + (timeout or self.default_timeout)
+        return now + max(0.0, deadline - now) / self.levels
+
+    def _run(self, attempt: Callable[[float], Any], hedge: bool, timeout: Optional[float] = None):
+        self._count("calls")
+        deadline = self._stage_deadline(timeout)
+        error = None
+        for number in range(self.retries + 1):
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            try:
+                probe = self.breaker.allow()
+            except CircuitOpen:
+                self._count("rejected")
+                raise
+            try:
+                # Le temps restant est partagé entre les tentatives encore possibles
+                result = self._attempt(attempt, left / (self.retries + 1 - number), hedge)
+            except WebFault:
+                self.breaker.success()  # le service a répondu
+                raise
+            except Exception as e:
+                error = e
+                if probe:
+                    # Essai en échec: le disjoncteur se rouvre, la tentative suivante est refusée
+                    self.breaker.failure()
+                if number < self.retries:
+                    self._count("retries")
+                    time.sleep(min(random.uniform(0, self.backoff * 2 ** number),
+                                   max(0.0, deadline - time.monotonic())))
+                continue
+            self.breaker.success()
+            return result
+        self._count("failed")
+        if error is None:
+            raise DeadlineExceeded(f"Stage '{self.stage}': no time left in the request budget")
+        if not probe:
+            self.breaker.failure()  # un échec par appel, une fois les tentatives épuisées
+        raise DeadlineExceeded(f"Stage '{self.stage}' failed within its deadline: {error}") from error
+
+    def _attempt(self, attempt: Callable[[float], Any], timeout: float, hedge: bool):
+        start = time.perf_counter()
+        p95 = self.latency.p95() if hedge else None
+        if p95 is None or p95 >= timeout or not self._may_hedge():
+            result = attempt(timeout)
+        else:
+            result = self._hedged(attempt, timeout, p95)
+        self.latency.record(time.perf_counter() - start)
+        return result
+
+    def _may_hedge(self) -> bool:
+        with self._lock:
+            return self.counts["hedges"] < self.hedge_ratio * self.counts["calls"]
+
+    def _hedged(self, attempt: Callable[[float], Any], timeout: float, delay: float):
+        """
+        Tentative principale, puis une seconde si elle n'a pas répondu après `delay` secondes.
+        Sans thread de couverture libre, la tentative se fait sans couverture.
+        """
+        start = time.monotonic()
+        first = _HEDGE_POOL.submit(attempt, timeout)
+        if first is None:
+            return attempt(timeout)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        second = _HEDGE_POOL.submit(attempt, max(0.001, timeout - (time.monotonic() - start)))
+        if second is None:
+            return first.result(timeout=max(0.0, timeout - (time.monotonic() - start)))
+        self._count("hedges")
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, timeout - (time.monotonic() - start)),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error or TimeoutError(f"Stage '{self.stage}' timed out after {timeout:.3f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.latency.p95()
+        with self._lock:
+            return dict(self.counts, breaker=self.breaker.state, breaker_opened=self.breaker.opened,
+                        p95_ms=round(p95 * 1000, 1) if p95 is not None else None)
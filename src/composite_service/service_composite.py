@@ -1,120 +1,420 @@
 import sys, logging, json, os
-from spyne import Application, rpc, ServiceBase, Unicode
+from functools import partial
+from spyne import Application, rpc, ServiceBase, Unicode, Double
 from spyne.protocol.soap import Soap11
 from spyne.server.wsgi import WsgiApplication
-from spyne.util.wsgi_wrapper import run_twisted
-from suds.client import Client
-
-# Import utilitaires (robuste pour exécution en package ou directe)
-try:
-    from composite_service.utils import (
-        new_request_id, create_request, save_decision, get_request, notify
-    )
-except ModuleNotFoundError:
-    sys.path.append(os.path.dirname(__file__))
-    from utils import new_request_id, create_request, save_decision, get_request, notify
+
+# Exécution directe (python composite_service/service_composite.py): rendre les packages
+# composite_service et services importables depuis src/
+if __package__ in (None, ""):
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from composite_service.utils import (
+    new_request_id, create_request, save_decision, get_request, notify,
+    create_requests, save_decisions, notify_many, pending_requests, start_retention, is_finished,
+    COMPLETIONS, DISPATCHER, check_workers
+)
+from composite_service.client_pool import ClientPool
+from composite_service.pipeline import Pipeline, PipelineBusy, Stage
+from composite_service.transport import build_transports
+from composite_service.jobs import JobQueue, QueueFull
+from composite_service.dedup import DecisionCache, request_digest
+from composite_service.longpoll import LongPollResource
+from composite_service.resilience import (
+    CircuitBreaker, CircuitOpen, DeadlineExceeded, ResilientTransport, request_budget
+)
+from services.hosting import serve, worker_count
+from services.metrics import REGISTRY, instrument, observe_stage, timed
+from services.tracing import trace, span, set_request_id
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-# URLs des services enfants (attendus en local)
-IE_URL = "http://127.0.0.1:8001/InformationExtractionService?wsdl"
-CC_URL = "http://127.0.0.1:8002/CreditCheckService?wsdl"
-PE_URL = "http://127.0.0.1:8003/PropertyEvaluationService?wsdl"
-DS_URL = "http://127.0.0.1:8004/DecisionService?wsdl"
+# URLs des services enfants (attendus en local; LOAN_IE_URL ... LOAN_DS_URL pour les déplacer)
+IE_URL = os.environ.get("LOAN_IE_URL", "http://127.0.0.1:8001/InformationExtractionService?wsdl")
+CC_URL = os.environ.get("LOAN_CC_URL", "http://127.0.0.1:8002/CreditCheckService?wsdl")
+PE_URL = os.environ.get("LOAN_PE_URL", "http://127.0.0.1:8003/PropertyEvaluationService?wsdl")
+DS_URL = os.environ.get("LOAN_DS_URL", "http://127.0.0.1:8004/DecisionService?wsdl")
+
+# Clients SOAP partagés par tout le processus (chargés une fois, clonés par thread)
+CLIENTS = ClientPool({"ie": IE_URL, "cc": CC_URL, "pe": PE_URL, "ds": DS_URL})
+
+# Transport par étape: "soap" (défaut), "local" (logique métier appelée dans ce processus)
+# ou "auto" (local si le service est sur cette machine). LOAN_TRANSPORT fixe le mode de
+# toutes les étapes, LOAN_TRANSPORT_IE / _CC / _PE / _DS le surchargent étape par étape.
+DEFAULT_TRANSPORT = os.environ.get("LOAN_TRANSPORT", "soap")
+# Contrat SOAP: "v1" (opérations historiques, JSON dans une chaîne) ou "v2" (opérations
+# typées *_v2, voir services/contracts.py)
+CONTRACT = os.environ.get("LOAN_CONTRACT", "v1")
+
+# Délai maximal (secondes) par étape du pipeline
+STAGE_TIMEOUTS = {"ie": 30, "cc": 30, "pe": 30, "ds": 30}
+
+# submitBatch: nombre maximal de demandes par appel aux services enfants, et délai par étape
+BATCH_CHUNK_SIZE = 500
+BATCH_STAGE_TIMEOUT = 300
+
+# Résilience des appels SOAP (voir resilience.py): budget d'une demande (s, 0 = délais par
+# étape seuls), tentatives par appel et attente de base entre elles (s), requête de couverture
+# au-delà du p95 du service (LOAN_HEDGE=1), disjoncteur (échecs consécutifs, durée d'ouverture)
+REQUEST_BUDGET = float(os.environ.get("LOAN_REQUEST_BUDGET", "20"))
+CALL_RETRIES = int(os.environ.get("LOAN_CALL_RETRIES", "2"))
+CALL_BACKOFF = float(os.environ.get("LOAN_CALL_BACKOFF", "0.05"))
+HEDGE = os.environ.get("LOAN_HEDGE", "0").lower() in ("1", "true", "yes")
+BREAKER_FAILURES = int(os.environ.get("LOAN_BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.environ.get("LOAN_BREAKER_RESET", "10"))
+# Étapes restant sur le chemin critique IE -> (CC || PE) -> DS, à partir de chacune
+CRITICAL_PATH = {"ie": 3, "cc": 2, "pe": 2, "ds": 1}
+
+CHILD_CALL_EVENTS = REGISTRY.counter(
+    "loan_child_call_events_total", "Resilience events of calls to child services", ["service", "event"])
+
+
+def _resilient(stage, transport):
+    """Appels SOAP avec délais, tentatives, couverture et disjoncteur; les appels locaux restent directs."""
+    if transport.mode != "soap":
+        return transport
+    return ResilientTransport(
+        transport, stage, CRITICAL_PATH[stage], retries=CALL_RETRIES, backoff=CALL_BACKOFF, hedge=HEDGE,
+        breaker=CircuitBreaker(stage, BREAKER_FAILURES, BREAKER_RESET), default_timeout=STAGE_TIMEOUTS[stage],
+        batch_timeout=BATCH_STAGE_TIMEOUT,
+        observe=lambda service, event: CHILD_CALL_EVENTS.labels(service, event).inc())
+
+
+TRANSPORTS = {stage: _resilient(stage, transport) for stage, transport in build_transports(CLIENTS, {
+    stage: os.environ.get(f"LOAN_TRANSPORT_{stage.upper()}", DEFAULT_TRANSPORT)
+    for stage in ("ie", "cc", "pe", "ds")
+}, CONTRACT).items()}
+
+# Mode asynchrone (LOAN_ASYNC=1): submitRequest enregistre la demande et retourne aussitôt
+# son request_id; LOAN_ASYNC_WORKERS threads la traitent, getResult donne le résultat.
+ASYNC_MODE = os.environ.get("LOAN_ASYNC", "0").lower() in ("1", "true", "yes")
+ASYNC_WORKERS = int(os.environ.get("LOAN_ASYNC_WORKERS", "4"))
+ASYNC_MAX_PENDING = int(os.environ.get("LOAN_ASYNC_MAX_PENDING", "1000"))
+
+# Appels en vol par étape du pipeline: un par thread du pool Twisted (10 par défaut) et par
+# worker asynchrone, plus une marge pour les étapes abandonnées après leur délai (service
+# lent). Au-delà, l'étape échoue aussitôt (PipelineBusy) au lieu d'attendre un thread.
+PIPELINE_IN_FLIGHT = int(os.environ.get("LOAN_PIPELINE_IN_FLIGHT", str(10 + ASYNC_WORKERS + 8)))
+
+# Déduplication: un texte déjà traité depuis moins de LOAN_DEDUP_TTL secondes (0 = désactivé)
+# reçoit la décision existante et son request_id, sans nouvel appel aux services
+DEDUP_TTL = float(os.environ.get("LOAN_DEDUP_TTL", "300"))
+DEDUP_SIZE = int(os.environ.get("LOAN_DEDUP_SIZE", "10000"))
+DEDUP = DecisionCache(DEDUP_TTL, DEDUP_SIZE)
+
+# waitForResult: délai d'attente par défaut et maximal (s), et relecture du stockage pour les
+# demandes terminées par un autre worker (s, 0 = seulement les événements de ce processus)
+WAIT_TIMEOUT = float(os.environ.get("LOAN_WAIT_TIMEOUT", "30"))
+WAIT_MAX_TIMEOUT = float(os.environ.get("LOAN_WAIT_MAX_TIMEOUT", "60"))
+WAIT_RECHECK = float(os.environ.get("LOAN_WAIT_RECHECK", "1.0"))
+
+
+# --- Étapes du pipeline --- #
+def _extract(results):
+    parsed = TRANSPORTS["ie"](results["request_text"])
+    logging.debug(f"[Composite] IE output: {parsed}")
+    return parsed
+
+
+def _check_credit(results):
+    cc_result = TRANSPORTS["cc"](results["ie"])
+    logging.debug(f"[Composite] CC output: {cc_result}")
+    return cc_result
+
+
+def _evaluate_property(results):
+    pe_result = TRANSPORTS["pe"](results["ie"])
+    logging.debug(f"[Composite] PE output: {pe_result}")
+    return pe_result
+
+
+def _decision_input(parsed, cc_result, pe_result):
+    """Construit l'entrée attendue par DecisionService."""
+    return {
+        "credit_score": cc_result.get("credit_score", 0),
+        "property_value": pe_result.get("property_value", 0),
+        "loan_amount": float(parsed.get("montant_pret", 0)),
+        # optional: forward income/expenses for better risk calculation
+        "revenu_mensuel": parsed.get("revenu_mensuel", 0),
+        "depenses_mensuelles": parsed.get("depenses_mensuelles", 0),
+        "emploi_stable": parsed.get("emploi_stable", True),
+    }
+
+
+def _decide(results):
+    decision = TRANSPORTS["ds"](_decision_input(results["ie"], results["cc"], results["pe"]))
+    logging.debug(f"[Composite] Decision output: {decision}")
+    return decision
+
+
+# --- Étapes du pipeline par lot (une liste d'entrées par appel) --- #
+def _extract_batch(results):
+    return TRANSPORTS["ie"].batch(results["texts"])
+
+
+def _check_credit_batch(results):
+    return TRANSPORTS["cc"].batch(results["ie"])
+
+
+def _evaluate_property_batch(results):
+    return TRANSPORTS["pe"].batch(results["ie"])
+
+
+def _decide_batch(results):
+    inputs = [_decision_input(*item) for item in zip(results["ie"], results["cc"], results["pe"])]
+    return TRANSPORTS["ds"].batch(inputs)
+
+
+def _traced(name, func):
+    """Étape exécutée dans un span: les appels SOAP de l'étape en portent le contexte."""
+    def run(results):
+        with span(name, "composite"):
+            return func(results)
+    return run
+
+
+# IE -> (CC || PE) -> DS : CC et PE ne dépendent que de la sortie de IE
+PIPELINE = Pipeline([
+    Stage("ie", _traced("ie", _extract), timeout=STAGE_TIMEOUTS["ie"]),
+    Stage("cc", _traced("cc", _check_credit), requires=["ie"], timeout=STAGE_TIMEOUTS["cc"]),
+    Stage("pe", _traced("pe", _evaluate_property), requires=["ie"], timeout=STAGE_TIMEOUTS["pe"]),
+    Stage("ds", _traced("ds", _decide), requires=["ie", "cc", "pe"], timeout=STAGE_TIMEOUTS["ds"]),
+], max_in_flight=PIPELINE_IN_FLIGHT, observe=partial(observe_stage, "request"))
+
+BATCH_PIPELINE = Pipeline([
+    Stage("ie", _traced("ie", _extract_batch), timeout=BATCH_STAGE_TIMEOUT),
+    Stage("cc", _traced("cc", _check_credit_batch), requires=["ie"], timeout=BATCH_STAGE_TIMEOUT),
+    Stage("pe", _traced("pe", _evaluate_property_batch), requires=["ie"], timeout=BATCH_STAGE_TIMEOUT),
+    Stage("ds", _traced("ds", _decide_batch), requires=["ie", "cc", "pe"], timeout=BATCH_STAGE_TIMEOUT),
+], max_in_flight=PIPELINE_IN_FLIGHT, observe=partial(observe_stage, "batch"))
+
+
+def _process_chunk(texts, offset):
+    """Traite une tranche de submitBatch; retourne un résultat par texte, dans l'ordre."""
+    results = [None] * len(texts)
+    ids, digests = {}, {}
+    for i, text in enumerate(texts):
+        if not isinstance(text, str) or not text.strip():
+            results[i] = {"status": "error", "index": offset + i, "message": "Empty or invalid request text."}
+            continue
+        digests[i] = request_digest(text)
+        cached = DEDUP.get(digests[i])
+        if cached is not None:
+            request_id, decision = cached
+            results[i] = {"status": "done", "index": offset + i, "request_id": request_id, "decision": decision,
+                          "duplicate": True}
+        else:
+            ids[i] = new_request_id()
+    if not ids:
+        return results
+
+    with timed("batch", "store"), span("store", "composite"):
+        create_requests({ids[i]: texts[i] for i in ids})
+    try:
+        stages = BATCH_PIPELINE.run(texts=[texts[i] for i in ids])
+    except Exception as e:
+        logging.error(f"[Composite] Error processing batch chunk at {offset}: {e}", exc_info=True)
+        error_result = {"approved": False, "message": f"Internal error: {str(e)}"}
+        save_decisions({request_id: error_result for request_id in ids.values()})
+        notify_many([(request_id, "unknown", error_result["message"]) for request_id in ids.values()])
+        for i, request_id in ids.items():
+            results[i] = {"status": "error", "index": offset + i, "request_id": request_id, "message": str(e)}
+        return results
+
+    decisions, notifications = {}, []
+    for i, parsed, decision in zip(ids, stages["ie"], stages["ds"]):
+        request_id = ids[i]
+        decisions[request_id] = decision
+        notifications.append((request_id, parsed.get("email", "unknown@email.com"),
+                              decision.get("message", "Result ready")))
+        if decision.get("status") == "error":
+            results[i] = {"status": "error", "index": offset + i, "request_id": request_id,
+                          "message": decision.get("message")}
+        else:
+            results[i] = {"status": "done", "index": offset + i, "request_id": request_id, "decision": decision}
+            DEDUP.put(digests[i], (request_id, decision))
+    with timed("batch", "store"), span("store", "composite"):
+        save_decisions(decisions)
+    with timed("batch", "notify"), span("notify", "composite"):
+        notify_many(notifications)
+    return results
+
+
+# --- Traitement d'une demande (synchrone ou par les workers du mode asynchrone) --- #
+def _run_request(request_id, request_text):
+    """IE -> (CC || PE) -> DS, puis enregistre et notifie la décision; la retourne."""
+    logging.info(f"[Composite] Start processing request {request_id}")
+    with request_budget(REQUEST_BUDGET):
+        results = PIPELINE.run(request_text=request_text)
+    parsed = results["ie"]
+    decision = results["ds"]
+
+    # Enregistrer et notifier
+    with timed("request", "store"), span("store", "composite"):
+        save_decision(request_id, decision)
+
+    # Message simple pour notification: Approved ou Rejected (use decision["message"] if present)
+    notif_msg = decision.get("message", "Result ready")
+    with timed("request", "notify"), span("notify", "composite"):
+        notify(request_id, parsed.get("email", "unknown@email.com"), notif_msg)
+    return decision
+
+
+def _save_error(request_id, error):
+    """Enregistre un résultat d'erreur minimal (le traitement de la demande a échoué)."""
+    error_result = {
+        "approved": False,
+        "message": f"Internal error: {str(error)}"
+    }
+    save_decision(request_id, error_result)
+    notify(request_id, "unknown", error_result["message"])
+
+
+def _process_job(request_id):
+    """Traite une demande de la file asynchrone à partir de son enregistrement."""
+    record = get_request(request_id)
+    if not record or record.get("status") != "processing":
+        return  # déjà traitée (reprise après arrêt)
+    try:
+        with span("job", "composite", request_id=request_id):
+            _run_request(request_id, record["text"])
+    except Exception as e:
+        # La demande avait été mise en cache à sa mise en file: un doublon doit être retraité
+        DEDUP.forget(request_digest(record["text"]), (request_id, None))
+        _save_error(request_id, e)
+        raise
+
+
+JOBS = JobQueue(_process_job, workers=ASYNC_WORKERS, max_pending=ASYNC_MAX_PENDING)
+
+
+def _submit(request_text):
+    """Enregistre une nouvelle demande puis la traite (ou la met en file): (request_id, décision)."""
+    # Générer et créer l'enregistrement
+    request_id = new_request_id()
+    set_request_id(request_id)
+    with timed("request", "store"), span("store", "composite"):
+        create_request(request_id, request_text)
+    try:
+        if ASYNC_MODE:
+            JOBS.submit(request_id)
+            logging.info(f"[Composite] Queued request {request_id}")
+            return request_id, None
+        return request_id, _run_request(request_id, request_text)
+    except Exception as e:
+        try:
+            # Enregistrer quand même un résultat d'erreur pour ce request_id
+            _save_error(request_id, e)
+        except Exception:
+            pass
+        raise
+
+
+def _cacheable(result):
+    """
+    Seules les décisions abouties (ou les demandes acceptées en file) servent aux doublons;
+    une demande en file qui échoue est retirée du cache par _process_job.
+    """
+    decision = result[1]
+    return decision is None or decision.get("status") != "error"
+
+
+def _result(request_id):
+    rec = get_request(request_id)
+    if not rec:
+        return json.dumps({"status": "error", "message": f"No request found for {request_id}"})
+    return json.dumps(rec, ensure_ascii=False)
 
 
 class LoanEvaluationComposite(ServiceBase):
     @rpc(Unicode, _returns=Unicode)
     def submitRequest(ctx, request_text):
         """
-        Traite synchroniquement la demande entière et retourne la décision finale.
+        Traite la demande entière et retourne la décision finale.
         - Crée request_id
         - Sauvegarde l'enregistrement initial (status=processing)
-        - Appelle IE -> CC -> PE -> DS
+        - Appelle IE -> (CC || PE) -> DS via le pipeline
         - Enregistre la décision, notifie, et retourne la décision + request_id
+        En mode asynchrone, retourne dès l'enregistrement initial (status=processing):
+        le résultat est ensuite disponible par getResult.
+        Un texte déjà soumis depuis moins de LOAN_DEDUP_TTL secondes (ou en cours de
+        traitement) reçoit le request_id et la décision existants ("duplicate": true).
         """
         try:
-            # Générer et créer l'enregistrement
-            request_id = new_request_id(request_text)
-            create_request(request_id, request_text)
-            logging.info(f"[Composite] Start processing request {request_id}")
-
-            # Instancier clients SOAP
-            ie = Client(IE_URL)
-            cc = Client(CC_URL)
-            pe = Client(PE_URL)
-            ds = Client(DS_URL)
-
-            # 1) Information Extraction (renvoie JSON string)
-            extracted_json = ie.service.extract_information(request_text)
-            # parsed sera dict
-            parsed = json.loads(extracted_json)
-            logging.info(f"[Composite] IE output: {parsed}")
-
-            # 2) Credit Check: envoie JSON string (extracted_json)
-            cc_response_json = cc.service.check_credit(extracted_json)
-            cc_result = json.loads(cc_response_json)
-            logging.info(f"[Composite] CC output: {cc_result}")
-
-            # 3) Property Evaluation: envoie JSON string (extracted_json)
-            pe_response_json = pe.service.evaluate_property(extracted_json)
-            pe_result = json.loads(pe_response_json)
-            logging.info(f"[Composite] PE output: {pe_result}")
-
-            # 4) Decision: construit l'entrée attendue par DecisionService
-            decision_input = {
-                "credit_score": cc_result.get("credit_score", 0),
-                "property_value": pe_result.get("property_value", 0),
-                "loan_amount": float(parsed.get("montant_pret", 0)),
-                # optional: forward income/expenses for better risk calculation
-                "revenu_mensuel": parsed.get("revenu_mensuel", 0),
-                "depenses_mensuelles": parsed.get("depenses_mensuelles", 0),
-                "emploi_stable": parsed.get("emploi_stable", True),
-                # embed raw sub-results for auditing
-                "credit_check": cc_result,
-                "property_evaluation": pe_result
-            }
-            decision_json = ds.service.make_decision(json.dumps(decision_input))
-            decision = json.loads(decision_json)
-            logging.info(f"[Composite] Decision output: {decision}")
-
-            # Enregistrer et notifier
-            save_decision(request_id, decision)
-
-            # Message simple pour notification: Approved ou Rejected (use decision["message"] if present)
-            notif_msg = decision.get("message", "Result ready")
-            notify(request_id, parsed.get("email", "unknown@email.com"), notif_msg)
+            (request_id, decision), origin = DEDUP.run(
+                request_digest(request_text), partial(_submit, request_text), cacheable=_cacheable)
+        except Exception as e:
+            # Surcharge ou service en panne: pas de trace complète
+            expected = isinstance(e, (QueueFull, PipelineBusy, CircuitOpen, DeadlineExceeded))
+            logging.error(f"[Composite] Error processing request: {e}", exc_info=not expected)
+            return json.dumps({"status": "error", "message": str(e)})
 
+        response = {"status": "processing" if ASYNC_MODE else "done", "request_id": request_id}
+        if not ASYNC_MODE:
             # Retour complet synchronique
-            return json.dumps({
-                "status": "done",
-                "request_id": request_id,
-                "decision": decision
-            }, ensure_ascii=False)
+            response["decision"] = decision
+        if origin != "miss":
+            set_request_id(request_id)
+            logging.info(f"[Composite] Duplicate of request {request_id} ({origin})")
+            response["duplicate"] = True
+        return json.dumps(response, ensure_ascii=False)
 
+    @rpc(Unicode, _returns=Unicode)
+    def submitBatch(ctx, request_texts):
+        """
+        Traite un lot de demandes (liste JSON de textes) et retourne un résultat par demande.
+        - Chaque tranche de BATCH_CHUNK_SIZE demandes coûte un appel par service enfant
+        - Les échecs sont rapportés élément par élément (status=error), sans bloquer le reste
+        """
+        try:
+            texts = json.loads(request_texts)
+            if not isinstance(texts, list):
+                raise ValueError("expected a JSON list of request texts")
         except Exception as e:
-            logging.error(f"[Composite] Error processing request: {e}", exc_info=True)
-            # Save minimal error result
-            error_result = {
-                "approved": False,
-                "message": f"Internal error: {str(e)}"
-            }
-            try:
-                # Try to save decision anyway with a request_id if present
-                if 'request_id' in locals():
-                    save_decision(request_id, error_result)
-                    notify(request_id, "unknown", error_result["message"])
-            except Exception:
-                pass
-            return json.dumps({"status": "error", "message": str(e)})
+            return json.dumps({"status": "error", "message": f"Invalid batch: {e}"})
+
+        logging.info(f"[Composite] Start processing batch of {len(texts)} requests")
+        results = []
+        for start in range(0, len(texts), BATCH_CHUNK_SIZE):
+            results.extend(_process_chunk(texts[start:start + BATCH_CHUNK_SIZE], start))
+
+        failed = sum(1 for r in results if r["status"] == "error")
+        return json.dumps({
+            "status": "done",
+            "count": len(results),
+            "failed": failed,
+            "results": results
+        }, ensure_ascii=False)
 
     @rpc(Unicode, _returns=Unicode)
     def getResult(ctx, request_id):
         """Récupère l'enregistrement sauvegardé pour request_id (status + result)."""
-        rec = get_request(request_id)
-        if not rec:
-            return json.dumps({"status": "error", "message": f"No request found for {request_id}"})
-        return json.dumps(rec, ensure_ascii=False)
+        return _result(request_id)
+
+    @rpc(Unicode, Double, _returns=Unicode)
+    def waitForResult(ctx, request_id, timeout):
+        """
+        Comme getResult, mais attend que la demande soit terminée, au plus `timeout` secondes
+        (LOAN_WAIT_TIMEOUT par défaut, LOAN_WAIT_MAX_TIMEOUT au maximum). L'attente a lieu
+        dans le réacteur (longpoll.py): cette méthode n'est appelée qu'une fois la demande
+        terminée ou le délai écoulé, et retourne l'état courant ("processing" si le délai a expiré).
+        """
+        return _result(request_id)
+
+    @rpc(_returns=Unicode)
+    def getQueueStats(ctx):
+        """État de la file asynchrone: profondeur, workers occupés, utilisation, compteurs."""
+        return json.dumps(dict(JOBS.stats(), mode="async" if ASYNC_MODE else "sync"))
+
+    @rpc(_returns=Unicode)
+    def getResilienceStats(ctx):
+        """Par service appelé en SOAP: appels, tentatives, couvertures, échecs, état du disjoncteur, p95."""
+        return json.dumps({stage: t.stats() for stage, t in TRANSPORTS.items() if isinstance(t, ResilientTransport)})
+
+    @rpc(_returns=Unicode)
+    def getDedupStats(ctx):
+        """Compteurs de la déduplication (hits, misses, regroupements, taux de hit)."""
+        return json.dumps(DEDUP.stats())
 
 
 # --- Application SOAP --- #
@@ -124,8 +424,46 @@ app = Application(
     in_protocol=Soap11(validator='lxml'),
     out_protocol=Soap11()
 )
+instrument(app, "composite")
+trace(app, "composite")
+REGISTRY.gauge_callback("loan_async_queue_depth", "Requests waiting for an async worker",
+                        lambda: JOBS.stats()["queue_depth"])
+REGISTRY.gauge_callback("loan_notifications_pending", "Notifications waiting to be sent",
+                        lambda: DISPATCHER.stats()["pending"])
+REGISTRY.gauge_callback("loan_result_waiters", "waitForResult calls waiting for their request",
+                        COMPLETIONS.waiting)
+REGISTRY.gauge_callback("loan_pipeline_in_flight", "Pipeline stage calls in flight, abandoned ones included",
+                        lambda: sum(PIPELINE.in_flight().values()))
+REGISTRY.gauge_callback("loan_circuits_open", "Child services whose circuit breaker is open",
+                        lambda: sum(isinstance(t, ResilientTransport) and t.breaker.state == "open"
+                                    for t in TRANSPORTS.values()))
+REGISTRY.gauge_callback("loan_dedup_hit_rate", "Share of submissions answered by the dedup cache",
+                        lambda: DEDUP.stats()["hit_rate"])
+
+
+def long_poll(resource):
+    """Ressource Twisted de l'application: waitForResult attend dans le réacteur (voir longpoll.py)."""
+    return LongPollResource(resource, COMPLETIONS, is_finished, default_timeout=WAIT_TIMEOUT,
+                            max_timeout=WAIT_MAX_TIMEOUT, recheck=WAIT_RECHECK)
+
+
+def start_worker(index):
+    """Démarre les threads du mode asynchrone dans chaque worker; seul le premier reprend la file
+    et archive les demandes hors rétention."""
+    if ASYNC_MODE:
+        JOBS.start()
+        recovered = JOBS.recover(pending_requests()) if index == 0 else 0
+        logging.info(f"[Composite] Async mode: {ASYNC_WORKERS} workers, {recovered} pending requests recovered")
+    if index == 0 and start_retention():
+        logging.info("[Composite] Retention: archiving expired requests in the background")
 
 
 if __name__ == '__main__':
+    check_workers(worker_count("composite"))
     logging.info("[Composite] Running on port 8000")
-    sys.exit(run_twisted([(WsgiApplication(app), b'LoanEvaluationService')], 8000))
+    logging.info("[Composite] Transports: " + ", ".join(f"{k}={t.mode}" for k, t in TRANSPORTS.items())
+                 + f" (contract {CONTRACT})")
+    # Les WSDL sont chargés avant un éventuel fork: les workers héritent des clients prêts
+    CLIENTS.warm([stage for stage, t in TRANSPORTS.items() if t.mode == "soap"])
+    sys.exit(serve([(WsgiApplication(app), b'LoanEvaluationService', long_poll)], 8000, "composite",
+                   on_start=start_worker))
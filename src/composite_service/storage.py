@@ -0,0 +1,492 @@
+"""
+Backends de stockage des demandes du composite (même API pour tous):
+- JsonStore: fichier database.json historique (réécrit en entier à chaque écriture),
+- SqliteStore: base SQLite indexée sur request_id (lecture et écriture ligne à ligne),
+- WalStore: enregistrements en mémoire, journal en ajout seul écrit par lots (un seul
+  processus composite).
+
+Un enregistrement est un dict {text, status, timestamp, last_update, result, ...}.
+Les request_id sont triés par date de création (composite_service/ids.py): `items_between`
+parcourt une plage de temps sur la clé, sans lire les autres enregistrements.
+"""
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ModuleNotFoundError:  # Windows: pas de verrou de fichier, un seul composite à lancer
+    fcntl = None
+
+try:
+    from composite_service.ids import id_ranges
+except ModuleNotFoundError:
+    from ids import id_ranges
+
+
+class JsonStore:
+    """Tous les enregistrements dans un seul fichier JSON {"requests": {...}}."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _ensure(self):
+        if not os.path.exists(self.path):
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"requests": {}}, f, indent=2, ensure_ascii=False)
+
+    def read_db(self) -> Dict[str, Any]:
+        self._ensure()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                db = json.load(f)
+                if "requests" not in db:
+                    db["requests"] = {}
+                return db
+        except (json.JSONDecodeError, FileNotFoundError):
+            self.write_db({"requests": {}})
+            return {"requests": {}}
+
+    def write_db(self, db: Dict[str, Any]):
+        self._ensure()
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(db, f, indent=2, ensure_ascii=False)
+
+    def upsert(self, request_id: str, fields: Dict[str, Any]):
+        """Fusionne `fields` dans l'enregistrement (créé s'il n'existe pas)."""
+        with self._lock:
+            db = self.read_db()
+            db["requests"].setdefault(request_id, {}).update(fields)
+            self.write_db(db)
+
+    def upsert_many(self, updates: Dict[str, Dict[str, Any]]):
+        """Comme `upsert`, pour plusieurs enregistrements en une seule réécriture du fichier."""
+        with self._lock:
+            db = self.read_db()
+            for request_id, fields in updates.items():
+                db["requests"].setdefault(request_id, {}).update(fields)
+            self.write_db(db)
+
+    def delete_many(self, request_ids: List[str]) -> int:
+        """Supprime les enregistrements `request_ids` (une seule réécriture); retourne le nombre supprimé."""
+        with self._lock:
+            db = self.read_db()
+            deleted = sum(1 for rid in request_ids if db["requests"].pop(rid, None) is not None)
+            self.write_db(db)
+        return deleted
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        return self.read_db().get("requests", {}).get(request_id)
+
+    def get_many(self, request_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Enregistrements existants parmi `request_ids` (une seule lecture du fichier)."""
+        requests = self.read_db().get("requests", {})
+        return {rid: requests[rid] for rid in request_ids if rid in requests}
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        return iter(self.read_db().get("requests", {}).items())
+
+    def ids_with_status(self, status: str) -> List[str]:
+        """request_id des enregistrements dans l'état `status`, du plus ancien au plus récent."""
+        found = [(rec.get("timestamp") or "", rid) for rid, rec in self.items() if rec.get("status") == status]
+        return [rid for _, rid in sorted(found)]
+
+    def items_between(self, start: datetime, end: datetime,
+                      limit: Optional[int] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Enregistrements créés entre `start` et `end` (UTC), du plus ancien au plus récent."""
+        requests = self.read_db().get("requests", {})
+        ordered = sorted(requests)
+        found = [rid for low, high in id_ranges(start, end) for rid in ordered if low <= rid <= high]
+        return iter([(rid, requests[rid]) for rid in found[:limit]])
+
+
+class SqliteStore:
+    """Une ligne par demande, clé primaire (donc indexée) sur request_id."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS requests (
+            request_id  TEXT PRIMARY KEY,
+            status      TEXT,
+            timestamp   TEXT,
+            last_update TEXT,
+            data        TEXT NOT NULL
+        )
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(self.SCHEMA)
+        conn.execute("CREATE INDEX IF NOT EXISTS requests_status ON requests (status)")
+
+    def _conn(self) -> sqlite3.Connection:
+        """Une connexion par thread (les connexions sqlite3 ne se partagent pas entre threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(request_id: str, record: Dict[str, Any]):
+        return (request_id, record.get("status"), record.get("timestamp"),
+                record.get("last_update"), json.dumps(record, ensure_ascii=False))
+
+    def upsert(self, request_id: str, fields: Dict[str, Any]):
+        """Fusionne `fields` dans l'enregistrement (créé s'il n'existe pas)."""
+        self.upsert_many({request_id: fields})
+
+    def upsert_many(self, updates: Dict[str, Dict[str, Any]]):
+        """Comme `upsert`, pour plusieurs enregistrements dans une seule transaction."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for request_id, fields in updates.items():
+                row = conn.execute("SELECT data FROM requests WHERE request_id = ?", (request_id,)).fetchone()
+                record = json.loads(row[0]) if row else {}
+                record.update(fields)
+                conn.execute(
+                    "INSERT OR REPLACE INTO requests (request_id, status, timestamp, last_update, data) "
+                    "VALUES (?, ?, ?, ?, ?)", self._row(request_id, record)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete_many(self, request_ids: List[str]) -> int:
+        """Supprime les enregistrements `request_ids` dans une seule transaction; retourne le nombre supprimé."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            deleted = 0
+            for start in range(0, len(request_ids), 500):
+                chunk = request_ids[start:start + 500]
+                deleted += conn.execute(
+                    f"DELETE FROM requests WHERE request_id IN ({','.join('?' * len(chunk))})", chunk).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return deleted
+
+    def vacuum(self):
+        """Rend au système la place des enregistrements supprimés."""
+        self._conn().execute("VACUUM")
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT data FROM requests WHERE request_id = ?", (request_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, request_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Enregistrements existants parmi `request_ids` (une requête par tranche de 500)."""
+        conn = self._conn()
+        found = {}
+        for start in range(0, len(request_ids), 500):
+            chunk = request_ids[start:start + 500]
+            found.update((rid, json.loads(data)) for rid, data in conn.execute(
+                f"SELECT request_id, data FROM requests WHERE request_id IN ({','.join('?' * len(chunk))})", chunk))
+        return found
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for request_id, data in self._conn().execute("SELECT request_id, data FROM requests ORDER BY request_id"):
+            yield request_id, json.loads(data)
+
+    def ids_with_status(self, status: str) -> List[str]:
+        """request_id des enregistrements dans l'état `status`, du plus ancien au plus récent."""
+        rows = self._conn().execute(
+            "SELECT request_id FROM requests WHERE status = ? ORDER BY timestamp, request_id", (status,)
+        )
+        return [row[0] for row in rows]
+
+    def items_between(self, start: datetime, end: datetime,
+                      limit: Optional[int] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Enregistrements créés entre `start` et `end` (UTC), du plus ancien au plus récent
+        (parcours de plages de la clé primaire)."""
+        remaining = -1 if limit is None else limit
+        for low, high in id_ranges(start, end):
+            if remaining == 0:
+                return
+            rows = self._conn().execute(
+                "SELECT request_id, data FROM requests WHERE request_id BETWEEN ? AND ? ORDER BY request_id LIMIT ?",
+                (low, high, remaining)).fetchall()
+            remaining -= len(rows) if remaining > 0 else 0
+            for request_id, data in rows:
+                yield request_id, json.loads(data)
+
+    def import_records(self, records: Dict[str, Dict[str, Any]]) -> int:
+        """Insère (ou remplace) un lot d'enregistrements dans une seule transaction."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO requests (request_id, status, timestamp, last_update, data) "
+                "VALUES (?, ?, ?, ?, ?)", (self._row(rid, rec) for rid, rec in records.items())
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(records)
+
+
+class WalStore:
+    """
+    Table des enregistrements en mémoire (lectures sans accès disque), dont chaque écriture
+    est journalisée dans un fichier en ajout seul: une ligne JSON par mise à jour,
+    {"id": ..., "set": {champs}} (fusion), {"id": ..., "put": {enregistrement}} ou
+    {"id": ..., "del": true} (suppression, archivage).
+
+    Un thread écrit les lignes en attente par lots, un write et un fsync par lot (group
+    commit). Par défaut l'écriture rend la main dès la mise à jour en mémoire et le lot
+    regroupe les écritures de `fsync_interval` secondes (write-behind: un arrêt brutal perd
+    au plus le dernier intervalle). Avec `durable`, chaque écriture attend le fsync de son
+    lot et le thread n'attend pas l'intervalle: un lot regroupe les écritures arrivées
+    pendant le fsync précédent.
+
+    Au démarrage, le journal est rejoué (une dernière ligne tronquée par un arrêt brutal est
+    ignorée et coupée). Quand il dépasse `checkpoint_entries` lignes et le double du nombre
+    d'enregistrements, il est réécrit en un instantané (une ligne "put" par enregistrement).
+    Un seul processus peut ouvrir le journal: un verrou exclusif sur `<path>.lock` (POSIX)
+    fait échouer une seconde ouverture, par un autre worker ou un autre programme.
+    """
+
+    def __init__(self, path: str, fsync_interval: float = 0.05, durable: bool = False,
+                 checkpoint_entries: int = 100000):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.durable = durable
+        self.checkpoint_entries = checkpoint_entries
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._ids: List[str] = []  # request_id triés (identifiants croissants: ajout en fin)
+        self._pending: List[Tuple[str, str, Dict[str, Any]]] = []
+        self._cond = threading.Condition()
+        self._queued = self._committed = 0  # numéros de la dernière ligne mise en file / écrite et fsyncée
+        self._closed = False
+        self.commits = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock_fd = self._lock(path + ".lock")
+        self.log_entries = self._replay()
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._thread = threading.Thread(target=self._run, name="wal-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # --- Journal --- #
+    @staticmethod
+    def _lock(lock_path: str) -> Optional[int]:
+        """Verrou exclusif du journal, gardé jusqu'à close() (libéré aussi à la fin du processus)."""
+        if fcntl is None:
+            return None
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            raise RuntimeError(f"{lock_path} is held by another process: the 'wal' store is single-process")
+        return fd
+
+    def _replay(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        entries, valid_end = 0, 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    op = next(op for op in ("set", "put", "del") if op in entry)
+                    self._apply(entry["id"], op, entry[op])
+                except (ValueError, KeyError, TypeError, StopIteration):
+                    break  # ligne incomplète: écriture interrompue par un arrêt brutal
+                entries += 1
+                valid_end += len(line)
+        if valid_end < os.path.getsize(self.path):
+            logging.warning(f"[Store] Truncating incomplete tail of {self.path} at byte {valid_end}")
+            os.truncate(self.path, valid_end)
+        logging.info(f"[Store] Replayed {entries} log entries ({len(self._records)} requests) from {self.path}")
+        return entries
+
+    def _apply(self, request_id: str, op: str, fields: Any):
+        if op == "del":
+            if self._records.pop(request_id, None) is not None:
+                self._ids.pop(bisect_left(self._ids, request_id))
+            return
+        record = self._records.get(request_id)
+        if record is None:
+            record = self._records[request_id] = {}
+            if not self._ids or request_id > self._ids[-1]:
+                self._ids.append(request_id)
+            else:
+                insort(self._ids, request_id)
+        elif op == "put":
+            record.clear()
+        record.update(fields)
+
+    def _write(self, op: str, updates: Dict[str, Any]):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"Store {self.path} is closed")
+            for request_id, fields in updates.items():
+                self._apply(request_id, op, fields)
+                self._pending.append((request_id, op, fields))
+            self._queued += len(updates)
+            seq = self._queued
+            self._cond.notify_all()
+            if self.durable:
+                while self._committed < seq and not self._closed:
+                    self._cond.wait()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+                batch, self._pending, seq = self._pending, [], self._queued
+                checkpoint = (self.log_entries + len(batch) > self.checkpoint_entries
+                              and self.log_entries + len(batch) > 2 * len(self._records))
+                snapshot = {rid: dict(rec) for rid, rec in self._records.items()} if checkpoint else None
+            started = time.monotonic()
+            try:
+                if checkpoint:
+                    self._checkpoint(snapshot)
+                else:
+                    self._append(batch)
+            except OSError as e:
+                # Lot remis en tête de file, réessayé au prochain tour; les écritures durables attendent
+                logging.error(f"[Store] Could not write {len(batch)} log entries to {self.path}: {e}")
+                with self._cond:
+                    if self._closed:
+                        logging.error(f"[Store] {len(batch)} updates lost at shutdown")
+                        return
+                    self._pending[:0] = batch
+            else:
+                with self._cond:
+                    self._committed = seq
+                    self.commits += 1
+                    self._cond.notify_all()
+            if not self.durable:
+                # Fenêtre de regroupement: les écritures de l'intervalle partagent le prochain fsync
+                time.sleep(max(0.0, self.fsync_interval - (time.monotonic() - started)))
+
+    def _append(self, batch):
+        # Sérialisé ici, hors du chemin de la requête
+        os.write(self._fd, "".join(
+            json.dumps({"id": rid, op: fields}, ensure_ascii=False) + "\n" for rid, op, fields in batch
+        ).encode("utf-8"))
+        os.fsync(self._fd)
+        self.log_entries += len(batch)
+
+    def _checkpoint(self, snapshot: Dict[str, Dict[str, Any]]):
+        """Remplace le journal par un instantané des enregistrements (qui inclut le lot en cours)."""
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for rid in sorted(snapshot):
+                f.write(json.dumps({"id": rid, "put": snapshot[rid]}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        old, self._fd = self._fd, os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        os.close(old)
+        self.log_entries = len(snapshot)
+        logging.info(f"[Store] Checkpointed {len(snapshot)} requests into {self.path}")
+
+    def flush(self):
+        """Attend que toutes les écritures déjà faites soient sur disque."""
+        with self._cond:
+            seq = self._queued
+            self._cond.notify_all()
+            while self._committed < seq and self._thread.is_alive():
+                self._cond.wait(0.1)
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        os.close(self._fd)
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+
+    # --- API commune aux backends --- #
+    def upsert(self, request_id: str, fields: Dict[str, Any]):
+        """Fusionne `fields` dans l'enregistrement (créé s'il n'existe pas)."""
+        self._write("set", {request_id: fields})
+
+    def upsert_many(self, updates: Dict[str, Dict[str, Any]]):
+        """Comme `upsert`, pour plusieurs enregistrements (même lot du journal)."""
+        self._write("set", updates)
+
+    def import_records(self, records: Dict[str, Dict[str, Any]]) -> int:
+        """Insère (ou remplace) un lot d'enregistrements."""
+        self._write("put", records)
+        return len(records)
+
+    def delete_many(self, request_ids: List[str]) -> int:
+        """Supprime les enregistrements `request_ids`; retourne le nombre supprimé."""
+        with self._cond:
+            present = [rid for rid in request_ids if rid in self._records]
+        self._write("del", {rid: True for rid in present})
+        return len(present)
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            record = self._records.get(request_id)
+            return dict(record) if record is not None else None
+
+    def get_many(self, request_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Enregistrements existants parmi `request_ids`."""
+        with self._cond:
+            return {rid: dict(self._records[rid]) for rid in request_ids if rid in self._records}
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        with self._cond:
+            return iter([(rid, dict(self._records[rid])) for rid in self._ids])
+
+    def ids_with_status(self, status: str) -> List[str]:
+        """request_id des enregistrements dans l'état `status`, du plus ancien au plus récent."""
+        with self._cond:
+            found = [(rec.get("timestamp") or "", rid) for rid, rec in self._records.items()
+                     if rec.get("status") == status]
+        return [rid for _, rid in sorted(found)]
+
+    def items_between(self, start: datetime, end: datetime,
+                      limit: Optional[int] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Enregistrements créés entre `start` et `end` (UTC), du plus ancien au plus récent
+        (recherche dichotomique dans les identifiants triés)."""
+        with self._cond:
+            found = [rid for low, high in id_ranges(start, end)
+                     for rid in self._ids[bisect_left(self._ids, low):bisect_right(self._ids, high)]]
+            return iter([(rid, dict(self._records[rid])) for rid in found[:limit]])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {"requests": len(self._records), "log_entries": self.log_entries,
+                    "pending": len(self._pending), "commits": self.commits, "durable": self.durable}
+
+
+BACKENDS = {"json": JsonStore, "sqlite": SqliteStore, "wal": WalStore}
+
+
+def open_store(backend: str, path: str, **options):
+    """Instancie le backend `backend` ("json", "sqlite" ou "wal") sur le fichier `path`
+    (`options`: paramètres propres au backend)."""
+    try:
+        cls = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown storage backend '{backend}' (expected one of {sorted(BACKENDS)})")
+    return cls(path, **options)
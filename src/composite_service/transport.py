@@ -0,0 +1,111 @@
+"""
+Transport des appels du composite vers les services enfants, configurable par étape:
+- "soap": appel SOAP via le pool de clients (services dans d'autres processus),
+- "local": appel direct de la logique métier du service, dans le processus du composite,
+- "auto": "local" si l'URL du service pointe sur la machine locale, sinon "soap".
+
+Chaque transport prend l'entrée de l'étape (texte pour IE, dict pour les autres)
+et retourne la sortie du service sous forme de dict; `batch` fait de même pour une
+liste d'entrées en un seul appel. En SOAP, `timeout` borne la durée de l'appel
+(délais, tentatives et disjoncteurs: voir resilience.py).
+
+En SOAP, le contrat "v1" utilise les opérations historiques (JSON dans une chaîne) et
+le contrat "v2" les opérations typées *_v2 (services/contracts.py).
+"""
+import importlib
+import json
+from typing import Optional
+from urllib.parse import urlparse
+
+from services.contracts import (
+    ExtractedInfo, Applicant, CreditResult, PropertyResult, DecisionInput, Decision, as_dict, pick
+)
+
+# Par étape: module du service, puis opération SOAP et fonction métier, unitaires et par lot
+OPERATIONS = {
+    "ie": ("services.information_extraction", "extract_information", "extract_information_data",
+           "extract_information_batch", "extract_information_batch_data"),
+    "cc": ("services.credit_check", "check_credit", "check_credit_data",
+           "check_credit_batch", "check_credit_batch_data"),
+    "pe": ("services.property_evaluation", "evaluate_property", "evaluate_property_data",
+           "evaluate_property_batch", "evaluate_property_batch_data"),
+    "ds": ("services.decision_service", "make_decision", "make_decision_data",
+           "make_decision_batch", "make_decision_batch_data"),
+}
+
+# Contrat v2 par étape: opération typée, type d'entrée (None = texte brut), type de sortie
+CONTRACTS_V2 = {
+    "ie": ("extract_information_v2", None, ExtractedInfo),
+    "cc": ("check_credit_v2", Applicant, CreditResult),
+    "pe": ("evaluate_property_v2", Applicant, PropertyResult),
+    "ds": ("make_decision_v2", DecisionInput, Decision),
+}
+
+LOCAL_HOSTS = {"127.0.0.1", "localhost", "::1"}
+
+
+class SoapTransport:
+    """Appel SOAP: JSON dans des chaînes (contrat v1) ou types du WSDL (contrat v2)."""
+
+    mode = "soap"
+
+    def __init__(self, pool, stage: str, contract: str = "v1"):
+        if contract not in ("v1", "v2"):
+            raise ValueError(f"Unknown contract '{contract}' (expected v1 or v2)")
+        self.pool = pool
+        self.stage = stage
+        self.contract = contract
+        _, self.operation, _, self.batch_operation, _ = OPERATIONS[stage]
+        self.operation_v2, self.input_type, self.output_type = CONTRACTS_V2[stage]
+
+    def __call__(self, payload, timeout: Optional[float] = None):
+        if self.contract == "v2":
+            arg = payload if self.input_type is None else pick(payload, self.input_type)
+            return as_dict(self.pool.call(self.stage, self.operation_v2, arg, timeout=timeout), self.output_type)
+        arg = payload if isinstance(payload, str) else json.dumps(payload)
+        return json.loads(self.pool.call(self.stage, self.operation, arg, timeout=timeout))
+
+    def batch(self, payloads: list, timeout: Optional[float] = None) -> list:
+        results = json.loads(self.pool.call(self.stage, self.batch_operation, json.dumps(payloads), timeout=timeout))
+        if not isinstance(results, list):
+            # Lot rejeté en entier par le service (ex: JSON invalide)
+            raise RuntimeError(f"{self.batch_operation} failed: {results}")
+        return results
+
+
+class LocalTransport:
+    """Appel direct de la fonction métier, sans enveloppe SOAP ni aller-retour JSON."""
+
+    mode = "local"
+
+    def __init__(self, stage: str):
+        module, _, func, _, batch_func = OPERATIONS[stage]
+        module = importlib.import_module(module)
+        self.stage = stage
+        self.func = getattr(module, func)
+        self.batch_func = getattr(module, batch_func)
+
+    def __call__(self, payload):
+        return self.func(payload)
+
+    def batch(self, payloads: list) -> list:
+        return self.batch_func(payloads)
+
+
+def resolve_mode(mode: str, url: str) -> str:
+    if mode == "auto":
+        return "local" if urlparse(url).hostname in LOCAL_HOSTS else "soap"
+    if mode not in ("soap", "local"):
+        raise ValueError(f"Unknown transport mode '{mode}' (expected soap, local or auto)")
+    return mode
+
+
+def build_transports(pool, modes: dict, contract: str = "v1") -> dict:
+    """Construit {étape: transport} à partir de {étape: "soap" | "local" | "auto"}."""
+    transports = {}
+    for stage, mode in modes.items():
+        if resolve_mode(mode, pool.urls[stage]) == "local":
+            transports[stage] = LocalTransport(stage)
+        else:
+            transports[stage] = SoapTransport(pool, stage, contract)
+    return transports
@@ -1,87 +1,219 @@
 """
 Utilitaires du service composite (simplifié pour exécution synchrone):
-- Gestion de la base de données JSON,
-- Génération d'identifiants avec timestamp,
-- Notifications simulées.
+- Accès au stockage des demandes (SQLite par défaut, JSON historique possible),
+- Génération d'identifiants triés par date (uniques entre workers),
+- Événements de fin de traitement (waitForResult),
+- Rétention: archivage des anciennes demandes (archive.py), toujours lisibles par getResult,
+- Notifications (fichier et/ou SMTP), envoyées en arrière-plan par lots.
 """
-import json
+import logging
 import os
+import threading
+import time
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+
+try:
+    from composite_service.storage import open_store
+    from composite_service.notifications import build_dispatcher
+    from composite_service.ids import new_id
+    from composite_service.archive import Archive, RetentionPolicy, compact
+    from composite_service.completions import CompletionHub
+except ModuleNotFoundError:
+    from storage import open_store
+    from notifications import build_dispatcher
+    from ids import new_id
+    from archive import Archive, RetentionPolicy, compact
+    from completions import CompletionHub
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "database.json")
+SQLITE_PATH = os.path.join(os.path.dirname(__file__), "database.sqlite3")
+WAL_PATH = os.path.join(os.path.dirname(__file__), "database.wal")
 LOG_PATH = os.path.join(os.path.dirname(__file__), "notifications.log")
 
-
-# --- Base JSON --- #
-def ensure_db():
+# Backend de stockage: "sqlite" (par défaut), "json" (fichier database.json historique) ou
+# "wal" (en mémoire + journal database.wal, un seul processus composite)
+STORE_BACKEND = os.environ.get("LOAN_STORE_BACKEND", "sqlite")
+# Backend "wal": intervalle des fsync groupés (s), et attente du fsync par chaque écriture
+WAL_FSYNC_INTERVAL = float(os.environ.get("LOAN_WAL_FSYNC_INTERVAL", "0.05"))
+WAL_DURABLE = os.environ.get("LOAN_WAL_DURABLE", "0").lower() in ("1", "true", "yes")
+
+# Rétention: les demandes terminées plus vieilles que LOAN_RETENTION_DAYS jours, ou au-delà des
+# LOAN_RETENTION_MAX_RECORDS plus récentes, partent dans l'archive compressée (0 = pas de limite).
+# LOAN_RETENTION_INTERVAL > 0: archivage périodique (secondes) par le composite, sinon compact_db.py
+ARCHIVE_DIR = os.environ.get("LOAN_ARCHIVE_DIR", os.path.join(os.path.dirname(__file__), "archive"))
+RETENTION_DAYS = float(os.environ.get("LOAN_RETENTION_DAYS", "0")) or None
+RETENTION_MAX_RECORDS = int(os.environ.get("LOAN_RETENTION_MAX_RECORDS", "0")) or None
+RETENTION_INTERVAL = float(os.environ.get("LOAN_RETENTION_INTERVAL", "0"))
+
+# Notifications: sinks "file" (notifications.log, par défaut), "smtp" ou "file,smtp"
+NOTIFY_SINKS = os.environ.get("LOAN_NOTIFY_SINKS", "file")
+NOTIFY_BATCH = int(os.environ.get("LOAN_NOTIFY_BATCH", "100"))
+NOTIFY_INTERVAL = float(os.environ.get("LOAN_NOTIFY_INTERVAL", "1.0"))
+SMTP_HOST = os.environ.get("LOAN_SMTP_HOST", "127.0.0.1")
+SMTP_PORT = int(os.environ.get("LOAN_SMTP_PORT", "25"))
+SMTP_FROM = os.environ.get("LOAN_SMTP_FROM", "noreply@loan.local")
+
+_store = None
+_store_lock = threading.Lock()
+
+# Demandes terminées dans ce processus (réveille les waitForResult en attente)
+COMPLETIONS = CompletionHub()
+
+
+# --- Stockage --- #
+def get_store():
+    """Retourne le backend de stockage du processus (ouvert au premier appel)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if STORE_BACKEND == "wal":
+                    _store = open_store("wal", WAL_PATH, fsync_interval=WAL_FSYNC_INTERVAL, durable=WAL_DURABLE)
+                elif STORE_BACKEND == "sqlite":
+                    created = not os.path.exists(SQLITE_PATH)
+                    _store = open_store("sqlite", SQLITE_PATH)
+                    if created:
+                        _import_json_db(_store)
+                else:
+                    _store = open_store(STORE_BACKEND, DB_PATH)
+    return _store
+
+
+def _import_json_db(store):
+    """
+    Première ouverture de la base SQLite: reprend les demandes de database.json (backend
+    historique, défaut des versions précédentes) pour que getResult les retrouve.
+    """
     if not os.path.exists(DB_PATH):
-        with open(DB_PATH, "w", encoding="utf-8") as f:
-            json.dump({"requests": {}}, f, indent=2, ensure_ascii=False)
-
-
-def read_db() -> Dict[str, Any]:
-    ensure_db()
+        return
     try:
-        with open(DB_PATH, "r", encoding="utf-8") as f:
-            db = json.load(f)
-            if "requests" not in db:
-                db["requests"] = {}
-            return db
-    except (json.JSONDecodeError, FileNotFoundError):
-        write_db({"requests": {}})
-        return {"requests": {}}
+        records = open_store("json", DB_PATH).read_db().get("requests", {})
+        if records:
+            store.import_records(records)
+            logging.info(f"[Store] Imported {len(records)} requests from {DB_PATH} into the new {SQLITE_PATH}")
+    except Exception as e:
+        logging.error(f"[Store] Could not import {DB_PATH} into {SQLITE_PATH}: {e} "
+                      f"(run composite_service/migrate_db.py)")
 
 
-def write_db(db: Dict[str, Any]):
-    ensure_db()
-    with open(DB_PATH, "w", encoding="utf-8") as f:
-        json.dump(db, f, indent=2, ensure_ascii=False)
+def check_workers(workers: int):
+    """Arrête le démarrage si le backend ne supporte pas `workers` processus (composite ou hôte)."""
+    if STORE_BACKEND == "wal" and workers > 1:
+        # Chaque worker aurait sa propre copie des enregistrements en mémoire et le même journal
+        raise SystemExit("The 'wal' store is single-process: run the composite with one worker "
+                         "or use LOAN_STORE_BACKEND=sqlite")
 
 
 # --- Lifecycle helpers --- #
-def new_request_id(request_text: str) -> str:
-    """Génère un identifiant contenant un timestamp et un court hash."""
-    now = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    short_hash = abs(hash(request_text)) % 10000
-    return f"REQ_{now}_{short_hash}"
+def new_request_id() -> str:
+    """Génère un identifiant unique trié par date de création (REQ_ + ULID, voir ids.py)."""
+    return new_id()
 
 
 def create_request(request_id: str, text: str):
     """Crée une entrée initiale (status 'done' sera mis après traitement)."""
-    db = read_db()
-    db["requests"].setdefault(request_id, {})
-    db["requests"][request_id].update({
+    get_store().upsert(request_id, {
         "text": text,
         "status": "processing",   # on traite immédiatement en synchrone
         "timestamp": datetime.utcnow().isoformat(),
         "last_update": datetime.utcnow().isoformat(),
         "result": None
     })
-    write_db(db)
 
 
 def save_decision(request_id: str, decision: Dict[str, Any]):
     """Enregistre la décision finale et marque 'done'."""
-    db = read_db()
-    db["requests"].setdefault(request_id, {})
-    db["requests"][request_id].update({
+    get_store().upsert(request_id, {
         "result": decision,
         "status": "done",
         "last_update": datetime.utcnow().isoformat()
     })
-    write_db(db)
+    COMPLETIONS.publish([request_id])
+
+
+def create_requests(texts: Dict[str, str]):
+    """Crée les entrées initiales d'un lot {request_id: texte} en une seule écriture."""
+    now = datetime.utcnow().isoformat()
+    get_store().upsert_many({
+        request_id: {"text": text, "status": "processing", "timestamp": now, "last_update": now, "result": None}
+        for request_id, text in texts.items()
+    })
+
+
+def save_decisions(decisions: Dict[str, Dict[str, Any]]):
+    """Enregistre les décisions d'un lot {request_id: décision} en une seule écriture."""
+    now = datetime.utcnow().isoformat()
+    get_store().upsert_many({
+        request_id: {"result": decision, "status": "done", "last_update": now}
+        for request_id, decision in decisions.items()
+    })
+    COMPLETIONS.publish(decisions)
 
 
 def get_request(request_id: str) -> Dict[str, Any]:
-    db = read_db()
-    return db.get("requests", {}).get(request_id)
+    """Enregistrement de `request_id`, cherché dans l'archive s'il n'est plus dans le stockage."""
+    record = get_store().get(request_id)
+    if record is None:
+        record = ARCHIVE.get(request_id)
+        if record is not None:
+            record["archived"] = True
+    return record
+
+
+def is_finished(request_id: str) -> bool:
+    """Vrai si la demande n'est plus en cours (terminée, archivée ou inconnue)."""
+    record = get_store().get(request_id)
+    return record is None or record.get("status") != "processing"
+
+
+def requests_between(start: datetime, end: datetime, limit: Optional[int] = None):
+    """(request_id, enregistrement) créés entre `start` et `end` (UTC), les plus anciens d'abord."""
+    return get_store().items_between(start, end, limit)
+
+
+def pending_requests() -> List[str]:
+    """Demandes acceptées mais pas encore traitées (status 'processing'), les plus anciennes d'abord."""
+    return get_store().ids_with_status("processing")
+
+
+# --- Rétention --- #
+ARCHIVE = Archive(ARCHIVE_DIR)
+
+
+def compact_store(dry_run: bool = False) -> Dict[str, Any]:
+    """Archive les demandes hors rétention (LOAN_RETENTION_*) et les retire du stockage."""
+    return compact(get_store(), ARCHIVE, RetentionPolicy(RETENTION_DAYS, RETENTION_MAX_RECORDS), dry_run)
+
+
+def start_retention():
+    """Archivage périodique en arrière-plan (LOAN_RETENTION_INTERVAL > 0 et une limite définie)."""
+    if RETENTION_INTERVAL <= 0 or (RETENTION_DAYS is None and RETENTION_MAX_RECORDS is None):
+        return None
+
+    def run():
+        while True:
+            time.sleep(RETENTION_INTERVAL)
+            try:
+                compact_store()
+            except Exception as e:
+                logging.error(f"[Archive] Retention pass failed: {e}")
+
+    thread = threading.Thread(target=run, name="loan-retention", daemon=True)
+    thread.start()
+    return thread
+
+
+# --- Notifications --- #
+DISPATCHER = build_dispatcher(LOG_PATH, NOTIFY_SINKS, SMTP_HOST, SMTP_PORT, SMTP_FROM,
+                              batch_size=NOTIFY_BATCH, flush_interval=NOTIFY_INTERVAL)
 
 
-# --- Notifications (simple log) --- #
 def notify(request_id: str, to_email: str, message: str):
-    """Écrit une ligne dans notifications.log (timestamp | id | to=... | message)."""
-    now = datetime.utcnow().isoformat()
-    entry = f"{now} | {request_id} | to={to_email} | {message}\n"
-    with open(LOG_PATH, "a", encoding="utf-8") as f:
-        f.write(entry)
+    """Met la notification en file; le fichier notifications.log garde le format timestamp | id | to=... | message."""
+    DISPATCHER.notify(request_id, to_email, message)
+
+
+def notify_many(notifications):
+    """Comme `notify` pour une liste de (request_id, to_email, message)."""
+    DISPATCHER.notify_many(notifications)
@@ -0,0 +1,44 @@
+"""
+Mode hôte: les cinq applications Spyne dans un seul processus et un seul réacteur.
+
+Le même site (les cinq services) écoute sur les ports 8000 à 8004, donc les URL
+habituelles (http://127.0.0.1:8002/CreditCheckService?wsdl, ...) restent valables pour
+les clients SOAP externes. Le composite appelle les services dans le processus
+(LOAN_TRANSPORT=local par défaut) au lieu de passer par HTTP en local.
+
+Usage: python host.py [--workers N]
+"""
+import logging
+import os
+import sys
+
+# Transport local par défaut (à fixer avant l'import du composite, qui le lit à l'import)
+os.environ.setdefault("LOAN_TRANSPORT", "local")
+
+from spyne.server.wsgi import WsgiApplication  # noqa: E402
+
+from services import information_extraction, credit_check, property_evaluation, decision_service  # noqa: E402
+from services.hosting import serve, worker_count  # noqa: E402
+from composite_service import service_composite  # noqa: E402
+from composite_service.utils import check_workers  # noqa: E402
+
+# (application Spyne, chemin) de chaque service, comme dans leurs points d'entrée
+APPS = [
+    (WsgiApplication(service_composite.app), b'LoanEvaluationService', service_composite.long_poll),
+    (WsgiApplication(information_extraction.app), b'InformationExtractionService'),
+    (WsgiApplication(credit_check.app), b'CreditCheckService'),
+    (WsgiApplication(property_evaluation.app), b'PropertyEvaluationService'),
+    (WsgiApplication(decision_service.app), b'DecisionService'),
+]
+PORTS = [8000, 8001, 8002, 8003, 8004]
+
+
+if __name__ == '__main__':
+    check_workers(worker_count("host"))
+    transports = service_composite.TRANSPORTS
+    logging.info("[Host] All services in one process on ports " + ", ".join(map(str, PORTS)))
+    logging.info("[Host] Transports: " + ", ".join(f"{k}={t.mode}" for k, t in transports.items()))
+    soap_stages = [stage for stage, t in transports.items() if t.mode == "soap"]
+    if soap_stages:
+        logging.warning(f"[Host] {', '.join(soap_stages)} still called over SOAP: the WSDLs are loaded on first use")
+    sys.exit(serve(APPS, PORTS, "host", on_start=service_composite.start_worker))
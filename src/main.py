@@ -1,20 +1,43 @@
+import argparse
 import os
 import subprocess
 import time
 import signal
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import urlopen
 
 # --- CONFIG --- #
+# (name, script, port, SOAP service path, names of the services it depends on)
 SERVICES = [
-    ("Information Extraction", "services/information_extraction.py", 8001),
-    ("Credit Check", "services/credit_check.py", 8002),
-    ("Property Evaluation", "services/property_evaluation.py", 8003),
-    ("Decision Service", "services/decision_service.py", 8004),
-    ("Composite Service", "composite_service/service_composite.py", 8000),
+    ("Information Extraction", "services/information_extraction.py", 8001, "InformationExtractionService", []),
+    ("Credit Check", "services/credit_check.py", 8002, "CreditCheckService", []),
+    ("Property Evaluation", "services/property_evaluation.py", 8003, "PropertyEvaluationService", []),
+    ("Decision Service", "services/decision_service.py", 8004, "DecisionService", []),
+    ("Composite Service", "composite_service/service_composite.py", 8000, "LoanEvaluationService",
+     ["Information Extraction", "Credit Check", "Property Evaluation", "Decision Service"]),
 ]
 
+# --single-process: the five services mounted on one reactor (host.py), same ports and URLs
+HOST_SERVICES = [
+    ("All services (host mode)", "host.py", 8000, "LoanEvaluationService", []),
+]
+
+READY_TIMEOUT = 30     # seconds for a service to serve its WSDL
+READY_INTERVAL = 0.1   # seconds between two readiness probes
+
 PYTHON = sys.executable  # uses current environment's Python
 PROCESSES = []
+WORKERS_ENV = {}  # LOAN_WORKERS* variables passed to the services (see services/hosting.py)
+
+
+def parse_workers(spec):
+    """'4' → 4 workers per service; 'cc=4,ds=2' → per service (ie, cc, pe, ds, composite)."""
+    env = {}
+    for part in spec.split(","):
+        key, _, count = part.rpartition("=")
+        env[f"LOAN_WORKERS_{key.upper()}" if key else "LOAN_WORKERS"] = str(int(count))
+    return env
 
 
 def run_service(name, script, port):
@@ -28,37 +51,82 @@ def run_service(name, script, port):
         # Start without piping stdout/stderr to prevent blocking
         proc = subprocess.Popen(
             [PYTHON, script],
+            env=dict(os.environ, **WORKERS_ENV),
             stdout=f,
             stderr=subprocess.STDOUT,
             creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if os.name == "nt" else 0
         )
 
     PROCESSES.append((name, proc))
-    time.sleep(1)
-
-    if proc.poll() is None:
-        print(f"✅ {name} running (PID: {proc.pid}) → logs in {log_file}")
-    else:
-        print(f"❌ Failed to start {name}")
     return proc
 
 
-def start_all():
-    """Launch all services sequentially."""
+def wait_ready(name, proc, port, path, started):
+    """Poll the service WSDL until it answers; return the startup time (None on failure)."""
+    url = f"http://127.0.0.1:{port}/{path}?wsdl"
+    deadline = started + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            print(f"❌ {name} exited during startup (code {proc.returncode})")
+            return None
+        try:
+            with urlopen(url, timeout=READY_INTERVAL * 10) as resp:
+                if resp.status == 200:
+                    elapsed = time.monotonic() - started
+                    print(f"✅ {name} ready in {elapsed:.2f}s (PID: {proc.pid}) → {url}")
+                    return elapsed
+        except OSError:
+            pass
+        time.sleep(READY_INTERVAL)
+    print(f"❌ {name} not ready after {READY_TIMEOUT}s ({url})")
+    return None
+
+
+def start_all(services=SERVICES):
+    """Launch all services concurrently; a service starts once the services it depends on are ready."""
     base_path = os.path.dirname(os.path.abspath(__file__))
     os.chdir(base_path)
+    t0 = time.monotonic()
+
+    startup = {}  # name -> seconds to readiness (None = failed)
+    pending = list(services)
+    with ThreadPoolExecutor(len(services)) as pool:
+        while pending:
+            wave = [s for s in pending if all(dep in startup for dep in s[4])]
+            if not wave:
+                break
+            pending = [s for s in pending if s not in wave]
+            futures = {}
+            for name, script, port, path, requires in wave:
+                script_path = os.path.join(base_path, script)
+                failed = [dep for dep in requires if startup[dep] is None]
+                if failed:
+                    print(f"⏭️ Not starting {name}: {', '.join(failed)} not ready")
+                    startup[name] = None
+                    continue
+                if not os.path.exists(script_path):
+                    print(f"⚠️ Warning: script not found -> {script_path}")
+                    startup[name] = None
+                    continue
+                started = time.monotonic()
+                proc = run_service(name, script_path, port)
+                futures[name] = pool.submit(wait_ready, name, proc, port, path, started)
+            for name, future in futures.items():
+                startup[name] = future.result()
 
-    for name, script, port in SERVICES:
-        script_path = os.path.join(base_path, script)
-        if not os.path.exists(script_path):
-            print(f"⚠️ Warning: script not found -> {script_path}")
-            continue
-        run_service(name, script_path, port)
-        time.sleep(2)
+    print(f"\n⏱️ Startup times (total {time.monotonic() - t0:.2f}s):")
+    for name, *_ in services:
+        elapsed = startup.get(name)
+        print(f"   {name:<24} {'failed' if elapsed is None else f'{elapsed:.2f}s'}")
+
+    if any(elapsed is None for elapsed in startup.values()):
+        print("\n⚠️ Some services did not start, see the logs folder.\n")
+        return False
 
     print("\n🌐 All services started successfully!\n")
     print("🧩 Composite service is available at:")
     print("   👉 http://127.0.0.1:8000/LoanEvaluationService?wsdl\n")
+    return True
 
 
 def stop_all():
@@ -80,8 +148,19 @@ def stop_all():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Start all loan evaluation services")
+    parser.add_argument("--workers", default="",
+                        help="worker processes per service: '4' for all, or 'cc=4,ds=2,composite=2'")
+    parser.add_argument("--single-process", action="store_true",
+                        help="run the five services in one process (host.py) instead of five")
+    args = parser.parse_args()
+    if args.workers:
+        WORKERS_ENV.update(parse_workers(args.workers))
+
     try:
-        start_all()
+        if not start_all(HOST_SERVICES if args.single_process else SERVICES):
+            stop_all()
+            sys.exit(1)
         print("🔄 Press Ctrl+C to stop all services.\n")
         while True:
             time.sleep(1)
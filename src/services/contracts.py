@@ -0,0 +1,175 @@
+"""
+Contrats SOAP typés (opérations *_v2) des services, en Spyne ComplexModel.
+
+Les opérations historiques échangent du JSON dans une chaîne (Unicode); les opérations
+_v2 décrivent les mêmes données dans le WSDL, sans JSON ni échappement à chaque saut.
+Les champs et leurs noms sont ceux des dicts des opérations historiques, ce qui permet
+de passer de l'un à l'autre avec `as_dict` (instance Spyne côté service, objet suds
+côté client) et `pick` (dict → champs du contrat).
+"""
+from typing import Any, Dict
+
+from spyne import Boolean, ComplexModel, Double, Integer, Unicode
+
+TYPES_NS = "loan.services.types"
+
+
+class _Contract(ComplexModel):
+    __namespace__ = TYPES_NS
+
+
+# --- InformationExtractionService --- #
+class ExtractedInfo(_Contract):
+    nom = Unicode
+    adresse = Unicode
+    email = Unicode
+    telephone = Unicode
+    montant_pret = Double
+    revenu_mensuel = Double
+    depenses_mensuelles = Double
+    description = Unicode
+
+
+# --- CreditCheckService --- #
+class Applicant(_Contract):
+    """Demandeur: informations extraites, plus les champs facultatifs utilisés par le score."""
+    nom = Unicode
+    prenom = Unicode
+    adresse = Unicode
+    email = Unicode
+    telephone = Unicode
+    montant_pret = Double
+    revenu_mensuel = Double
+    depenses_mensuelles = Double
+    description = Unicode
+    age = Integer
+    emploi_stable = Unicode  # "oui" / "non"
+
+
+class BureauRecord(_Contract):
+    historique_paiement = Unicode
+    dettes_en_cours = Integer
+    retards_paiement = Integer
+    anciennete_credit = Integer
+    score_bureau = Integer
+
+
+class CreditDetails(_Contract):
+    revenu_mensuel = Double
+    depenses_mensuelles = Double
+    montant_pret = Double
+    nom = Unicode
+    prenom = Unicode
+    age = Integer
+    emploi_stable = Unicode
+    credit_bureau = BureauRecord
+
+
+class CreditResult(_Contract):
+    credit_score = Double
+    details = CreditDetails
+
+
+# --- PropertyEvaluationService --- #
+class Inspection(_Contract):
+    condition_score = Double
+    surface_estimee_m2 = Integer
+
+
+class LegalCheck(_Contract):
+    conforme = Boolean
+    litige_en_cours = Boolean
+    details = Unicode
+
+
+class PropertyDetails(_Contract):
+    region = Unicode
+    prix_m2 = Integer
+    surface_estimee_m2 = Integer
+    facteur_condition = Double
+    facteur_conformite = Double
+    inspection = Inspection
+    legal = LegalCheck
+    adjustment_factor = Double
+
+
+class PropertyResult(_Contract):
+    property_value = Double
+    details = PropertyDetails
+
+
+# --- DecisionService --- #
+class DecisionInput(_Contract):
+    credit_score = Double
+    property_value = Double
+    loan_amount = Double
+    revenu_mensuel = Double
+    depenses_mensuelles = Double
+    emploi_stable = Boolean
+
+
+class RiskDetails(_Contract):
+    credit_score = Double
+    loan_amount = Double
+    property_value = Double
+    loan_to_value = Double
+    debt_to_income = Double
+    monthly_savings = Double
+    employment_stable = Boolean
+    risk_score = Double
+    default_probability = Double
+
+
+class Decision(_Contract):
+    approved = Boolean
+    interest_rate = Double
+    loan_amount = Double
+    risk_details = RiskDetails
+    reasons = Unicode(max_occurs="unbounded")
+    recommendations = Unicode(max_occurs="unbounded")
+    message = Unicode
+
+
+# ---------------------------------------------------------------------
+# Conversions dict <-> contrat
+# ---------------------------------------------------------------------
+def _fields(cls):
+    return cls.get_flat_type_info(cls)
+
+
+def as_dict(obj, cls, drop_none: bool = False) -> Dict[str, Any]:
+    """
+    Convertit récursivement une instance du contrat `cls` (instance Spyne ou objet suds,
+    tous deux à attributs) en dict. Les champs répétés donnent une liste (vide si absents).
+    `drop_none` omet les champs absents, comme une clé absente du JSON historique.
+    """
+    out = {}
+    for key, field in _fields(cls).items():
+        value = getattr(obj, key, None)
+        if field.Attributes.max_occurs > 1:
+            value = [_scalar(v) for v in value] if value is not None else []
+        elif value is not None and issubclass(field, ComplexModel):
+            value = as_dict(value, field, drop_none)
+        elif value is not None:
+            value = _scalar(value)
+        if value is not None or not drop_none:
+            out[key] = value
+    return out
+
+
+def _scalar(value):
+    # Les chaînes suds (suds.sax.text.Text) redeviennent des str ordinaires
+    return str(value) if isinstance(value, str) else value
+
+
+def pick(data: Dict[str, Any], cls) -> Dict[str, Any]:
+    """Ne garde de `data` que les champs du contrat `cls` (récursivement), sans les valeurs None."""
+    out = {}
+    for key, field in _fields(cls).items():
+        value = data.get(key)
+        if value is None:
+            continue
+        if field.Attributes.max_occurs <= 1 and issubclass(field, ComplexModel) and isinstance(value, dict):
+            value = pick(value, field)
+        out[key] = value
+    return out
@@ -0,0 +1,198 @@
+"""
+Clients du bureau de crédit utilisés par CreditCheckService (même API pour tous:
+`lookup(nom)` retourne le dossier du demandeur):
+- SimulatedBureau: données simulées, stables pour un même nom (pas d'appel réseau),
+- HttpBureau: bureau externe joint en HTTP (GET <url>/bureau?nom=...),
+- CachedBureau: cache LRU + TTL devant n'importe quel client, avec regroupement des
+  requêtes identiques simultanées et compteurs hits/misses.
+
+Le module sert aussi de bureau HTTP de remplacement pour mesurer le cache hors ligne:
+    python services/credit_bureau.py --port 8010 --latency 0.05
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, quote, urlparse
+from urllib.request import urlopen
+
+# --- CONFIG --- #
+# LOAN_BUREAU_URL: bureau HTTP à interroger (vide = bureau simulé dans le processus)
+BUREAU_URL = os.environ.get("LOAN_BUREAU_URL", "")
+BUREAU_TIMEOUT = float(os.environ.get("LOAN_BUREAU_TIMEOUT", "5"))
+BUREAU_CACHE_SIZE = int(os.environ.get("LOAN_BUREAU_CACHE_SIZE", "10000"))  # 0 = pas de cache
+BUREAU_CACHE_TTL = float(os.environ.get("LOAN_BUREAU_CACHE_TTL", "300"))    # secondes
+
+
+class SimulatedBureau:
+    """
+    Simule un bureau de crédit. Le générateur est local à chaque appel (le module
+    `random` global n'est pas touché) et la graine est un crc32 du nom, donc le même
+    nom donne le même dossier dans tous les processus et tous les threads.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def lookup(self, nom: str) -> Dict[str, Any]:
+        if self.latency:
+            time.sleep(self.latency)
+        rng = random.Random(zlib.crc32(nom.encode("utf-8")) % 10000)
+        return {
+            "historique_paiement": rng.choice(["excellent", "bon", "moyen", "mauvais"]),
+            "dettes_en_cours": rng.randint(0, 5),
+            "retards_paiement": rng.randint(0, 3),
+            "anciennete_credit": rng.randint(1, 20),  # en années
+            "score_bureau": rng.randint(400, 850)
+        }
+
+
+class HttpBureau:
+    """Bureau externe: GET {url}/bureau?nom=... retourne le dossier en JSON."""
+
+    def __init__(self, url: str, timeout: float = BUREAU_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def lookup(self, nom: str) -> Dict[str, Any]:
+        with urlopen(f"{self.url}/bureau?nom={quote(nom)}", timeout=self.timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+
+
+class CachedBureau:
+    """
+    Cache LRU borné (`max_entries`) avec expiration (`ttl` secondes) devant `backend`.
+    Si plusieurs threads demandent le même nom absent du cache, un seul appel part vers
+    le bureau et les autres attendent son résultat (compté dans `coalesced`).
+    Les erreurs du bureau ne sont pas mises en cache.
+    """
+
+    def __init__(self, backend, max_entries: int = BUREAU_CACHE_SIZE,
+                 ttl: float = BUREAU_CACHE_TTL):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # nom -> (expiration, dossier)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.coalesced = self.evictions = 0
+
+    def lookup(self, nom: str) -> Dict[str, Any]:
+        with self._lock:
+            entry = self._entries.get(nom)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(nom)
+                    self.hits += 1
+                    return dict(entry[1])
+                del self._entries[nom]
+            future = self._inflight.get(nom)
+            leader = future is None
+            if leader:
+                future = self._inflight[nom] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return dict(future.result())
+
+        try:
+            record = self.backend.lookup(nom)
+        except Exception as e:
+            with self._lock:
+                del self._inflight[nom]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._inflight[nom]
+            self._entries[nom] = (time.monotonic() + self.ttl, record)
+            self._entries.move_to_end(nom)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        future.set_result(record)
+        return dict(record)
+
+    def invalidate(self, nom: Optional[str] = None):
+        """Oublie le dossier de `nom` (ou tout le cache)."""
+        with self._lock:
+            if nom is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(nom, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
+
+
+def build_bureau(url: str = BUREAU_URL, cache_size: int = BUREAU_CACHE_SIZE,
+                 ttl: float = BUREAU_CACHE_TTL):
+    """Bureau configuré par l'environnement: HTTP si une URL est donnée, simulé sinon, mis en cache."""
+    backend = HttpBureau(url) if url else SimulatedBureau()
+    return CachedBureau(backend, cache_size, ttl) if cache_size > 0 else backend
+
+
+# ---------------------------------------------------------------------
+# Stand-in HTTP bureau (tests et benchmarks hors ligne)
+# ---------------------------------------------------------------------
+def make_server(port: int, latency: float = 0.05, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Bureau HTTP simulé qui répond en `latency` secondes (à lancer avec serve_forever)."""
+    bureau = SimulatedBureau(latency)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/bureau":
+                self.send_error(404)
+                return
+            nom = parse_qs(url.query).get("nom", [""])[0]
+            body = json.dumps(bureau.lookup(nom), ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 128  # le défaut (5) fait attendre les connexions simultanées
+
+    return Server((host, port), Handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in credit bureau (HTTP)")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per lookup")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    logging.info(f"[Bureau] Stand-in bureau on http://127.0.0.1:{args.port}/bureau (latency {args.latency}s)")
+    try:
+        make_server(args.port, args.latency).serve_forever()
+    except KeyboardInterrupt:
+        pass
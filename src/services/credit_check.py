@@ -1,41 +1,54 @@
-import sys, logging, json, random
-from spyne import Application, rpc, ServiceBase, Unicode
+import sys, logging, json
+import numpy as np
+from spyne import Application, rpc, ServiceBase, Unicode, Fault
 from spyne.protocol.soap import Soap11
 from spyne.server.wsgi import WsgiApplication
-from spyne.util.wsgi_wrapper import run_twisted
+
+try:
+    from services.numeric import round2
+    from services.credit_bureau import build_bureau
+    from services.hosting import serve
+    from services.metrics import instrument
+    from services.tracing import trace
+    from services.contracts import Applicant, CreditResult, as_dict
+except ModuleNotFoundError:
+    from numeric import round2
+    from credit_bureau import build_bureau
+    from hosting import serve
+    from metrics import instrument
+    from tracing import trace
+    from contracts import Applicant, CreditResult, as_dict
 
 logging.basicConfig(level=logging.INFO)
 
 
 # ---------------------------------------------------------------------
-# Simulated Credit Bureau (could be replaced by a real external service)
+# Credit Bureau (simulé ou HTTP selon LOAN_BUREAU_URL, voir credit_bureau.py)
 # ---------------------------------------------------------------------
+BUREAU = build_bureau()
+
+
 def get_credit_bureau_data(nom: str):
-    """Simule la récupération des informations d’un bureau de crédit."""
-    random.seed(hash(nom) % 10000)
-    return {
-        "historique_paiement": random.choice(["excellent", "bon", "moyen", "mauvais"]),
-        "dettes_en_cours": random.randint(0, 5),
-        "retards_paiement": random.randint(0, 3),
-        "anciennete_credit": random.randint(1, 20),  # en années
-        "score_bureau": random.randint(400, 850)
-    }
+    """Récupère les informations du bureau de crédit pour un demandeur (via le cache)."""
+    return BUREAU.lookup(nom)
 
 
 # ---------------------------------------------------------------------
 # Credit Scoring Model
 # ---------------------------------------------------------------------
-def compute_credit_score(data: dict) -> (float, dict):
-    """Calcule un score global de solvabilité entre 0 et 100 et retourne aussi les détails du bureau."""
+def scoring_inputs(data: dict):
+    """Extrait et type les champs utilisés par le score: (revenu, dépense, montant, âge, emploi stable)."""
     revenu = float(data.get("revenu_mensuel", 0))
     depense = float(data.get("depenses_mensuelles", 0))
     montant = float(data.get("montant_pret", 1))
     age = int(data.get("age", 35))
     emploi_stable = data.get("emploi_stable", "oui").lower() == "oui"
-    nom = data.get("nom", "")
-    prenom = data.get("prenom", "")
+    return revenu, depense, montant, age, emploi_stable
 
-    bureau = get_credit_bureau_data(nom)
+
+def score_applicant(revenu: float, depense: float, montant: float, age: int,
+                    emploi_stable: bool, bureau: dict) -> float:
+    """Score global de solvabilité entre 0 et 100 pour un demandeur."""
     score_bureau = bureau["score_bureau"]
 
     # --- 1. Ratio revenu / dépense ---
@@ -74,12 +87,134 @@ def compute_credit_score(data: dict) -> (float, dict):
     # Petit équilibrage : éviter que les scores chutent trop bas
     final_score = min(100, max(0, final_score * 1.05))
 
-    return round(final_score, 2), bureau
+    return round(final_score, 2)
+
+
+def compute_credit_score(data: dict) -> (float, dict):
+    """Calcule un score global de solvabilité entre 0 et 100 et retourne aussi les détails du bureau."""
+    revenu, depense, montant, age, emploi_stable = scoring_inputs(data)
+    nom = data.get("nom", "")
+
+    bureau = get_credit_bureau_data(nom)
+    return score_applicant(revenu, depense, montant, age, emploi_stable, bureau), bureau
+
+
+# ---------------------------------------------------------------------
+# Vectorized Credit Scoring (bulk rescoring)
+# ---------------------------------------------------------------------
+def compute_credit_scores(revenu_mensuel, depenses_mensuelles, montant_pret, age, emploi_stable,
+                          score_bureau, retards_paiement, dettes_en_cours) -> np.ndarray:
+    """
+    Version vectorisée de score_applicant: un score (0–100) par demandeur.
+    Tous les arguments sont des tableaux (ou listes) de même longueur; le résultat est
+    identique, élément par élément, à celui de score_applicant.
+    """
+    revenu = np.asarray(revenu_mensuel, dtype=np.float64)
+    depense = np.asarray(depenses_mensuelles, dtype=np.float64)
+    montant = np.asarray(montant_pret, dtype=np.float64)
+    age = np.asarray(age)
+    emploi_stable = np.asarray(emploi_stable, dtype=bool)
+    score_bureau = np.asarray(score_bureau, dtype=np.float64)
+    retards = np.asarray(retards_paiement, dtype=np.float64)
+    dettes = np.asarray(dettes_en_cours, dtype=np.float64)
+
+    # --- 1. Ratio revenu / dépense ---
+    ratio_revenu = np.where(depense == 0, 1.0, (revenu - depense) / np.maximum(revenu, 1))
+    ratio_revenu_score = np.clip(ratio_revenu, 0, 1)
+
+    # --- 2. Ratio montant / revenu annuel ---
+    ratio_montant = montant / np.maximum(revenu * 12, 1)
+    ratio_montant_score = np.clip(1 - ratio_montant, 0, 1)
+
+    # --- 3. Bureau de crédit ---
+    bureau_score_norm = np.clip((score_bureau - 400) / (850 - 400), 0, 1)
+
+    # --- 4. Historique ---
+    retard_penalty = 1 - np.minimum(retards / 3, 1)
+    dettes_penalty = 1 - np.minimum(dettes / 5, 1)
+    historique_score = 0.6 * retard_penalty + 0.4 * dettes_penalty
+
+    # --- 5. Stabilité de l’emploi et âge ---
+    emploi_score = np.where(emploi_stable, 1.0, 0.5)
+    age_score = np.where((age >= 25) & (age <= 60), 1.0, 0.7)
+
+    # --- Pondération globale ajustée (même ordre d'opérations que score_applicant) ---
+    final_score = (
+        0.35 * bureau_score_norm +
+        0.25 * ratio_revenu_score +
+        0.20 * ratio_montant_score +
+        0.10 * historique_score +
+        0.10 * ((emploi_score + age_score) / 2)
+    ) * 100
+
+    final_score = np.clip(final_score * 1.05, 0, 100)
+    return round2(final_score)
 
 
 # ---------------------------------------------------------------------
 # Spyne SOAP Service
 # ---------------------------------------------------------------------
+def credit_result(parsed: dict, score: float, bureau_data: dict) -> dict:
+    """Met en forme la réponse du service pour un demandeur."""
+    return {
+        "credit_score": score,
+        "details": {
+            "revenu_mensuel": parsed.get("revenu_mensuel"),
+            "depenses_mensuelles": parsed.get("depenses_mensuelles"),
+            "montant_pret": parsed.get("montant_pret"),
+            "nom": parsed.get("nom"),
+            "prenom": parsed.get("prenom"),
+            "age": parsed.get("age"),
+            "emploi_stable": parsed.get("emploi_stable"),
+            "credit_bureau": bureau_data
+        }
+    }
+
+
+def check_credit_data(parsed: dict) -> dict:
+    """Retourne le résultat complet du contrôle de crédit (dict prêt pour JSON)."""
+    try:
+        score, bureau_data = compute_credit_score(parsed)
+        logging.info(f"[CreditCheck] Calculated score: {score} for {parsed.get('nom')}")
+        return credit_result(parsed, score, bureau_data)
+    except Exception as e:
+        logging.error(f"[CreditCheck] Error: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+def check_credit_batch_data(items: list) -> list:
+    """
+    Contrôle de crédit de plusieurs demandeurs; chaque élément réussit ou échoue seul.
+    Les entrées sont typées élément par élément, puis tous les scores sont calculés
+    en une passe vectorisée (compute_credit_scores).
+    """
+    results = [None] * len(items)
+    rows, bureaus, valid = [], [], []
+    for i, parsed in enumerate(items):
+        try:
+            rows.append(scoring_inputs(parsed))
+            bureaus.append(get_credit_bureau_data(parsed.get("nom", "")))
+            valid.append(i)
+        except Exception as e:
+            del rows[len(valid):]
+            logging.error(f"[CreditCheck] Error on batch item {i}: {e}")
+            results[i] = {"status": "error", "message": str(e)}
+
+    if valid:
+        revenu, depense, montant, age, emploi_stable = zip(*rows)
+        scores = compute_credit_scores(
+            revenu, depense, montant, age, emploi_stable,
+            [b["score_bureau"] for b in bureaus],
+            [b["retards_paiement"] for b in bureaus],
+            [b["dettes_en_cours"] for b in bureaus],
+        ).tolist()
+        for i, score, bureau in zip(valid, scores, bureaus):
+            results[i] = credit_result(items[i], score, bureau)
+
+    logging.info(f"[CreditCheck] Scored {len(valid)} of {len(items)} batch items")
+    return results
+
+
 class CreditCheckService(ServiceBase):
     @rpc(Unicode, _returns=Unicode)
     def check_credit(ctx, data):
@@ -89,26 +224,34 @@ class CreditCheckService(ServiceBase):
         except Exception as e:
             return json.dumps({"status": "error", "message": f"Invalid JSON: {e}"})
 
+        return json.dumps(check_credit_data(parsed), indent=2, ensure_ascii=False)
+
+    @rpc(Unicode, _returns=Unicode)
+    def check_credit_batch(ctx, data):
+        """Reçoit une liste JSON de demandeurs et retourne un résultat par demandeur."""
         try:
-            score, bureau_data = compute_credit_score(parsed)
-            result = {
-                "credit_score": score,
-                "details": {
-                    "revenu_mensuel": parsed.get("revenu_mensuel"),
-                    "depenses_mensuelles": parsed.get("depenses_mensuelles"),
-                    "montant_pret": parsed.get("montant_pret"),
-                    "nom": parsed.get("nom"),
-                    "prenom": parsed.get("prenom"),
-                    "age": parsed.get("age"),
-                    "emploi_stable": parsed.get("emploi_stable"),
-                    "credit_bureau": bureau_data
-                }
-            }
-            logging.info(f"[CreditCheck] Calculated score: {score} for {parsed.get('nom')}")
-            return json.dumps(result, indent=2, ensure_ascii=False)
+            items = json.loads(data)
+            if not isinstance(items, list):
+                raise ValueError("expected a JSON list")
         except Exception as e:
-            logging.error(f"[CreditCheck] Error: {e}")
-            return json.dumps({"status": "error", "message": str(e)})
+            return json.dumps({"status": "error", "message": f"Invalid JSON: {e}"})
+
+        return json.dumps(check_credit_batch_data(items), ensure_ascii=False)
+
+    # --- v2: contrat typé (voir services/contracts.py) ---
+    @rpc(Applicant, _returns=CreditResult)
+    def check_credit_v2(ctx, applicant):
+        """Version typée de check_credit; une erreur de calcul est un fault SOAP."""
+        result = check_credit_data(as_dict(applicant, Applicant, drop_none=True))
+        if result.get("status") == "error":
+            raise Fault("Server.CreditCheck", result["message"])
+        return result
+
+    @rpc(_returns=Unicode)
+    def bureau_stats(ctx):
+        """Compteurs du cache du bureau de crédit (hits, misses, regroupements, évictions)."""
+        stats = BUREAU.stats() if hasattr(BUREAU, "stats") else {"cache": "disabled"}
+        return json.dumps(stats)
 
 
 # ---------------------------------------------------------------------
@@ -120,6 +263,8 @@ app = Application(
     in_protocol=Soap11(validator='lxml'),
     out_protocol=Soap11()
 )
+instrument(app, "cc")
+trace(app, "cc")
 
 if __name__ == '__main__':
-    sys.exit(run_twisted([(WsgiApplication(app), b'CreditCheckService')], 8002))
+    sys.exit(serve([(WsgiApplication(app), b'CreditCheckService')], 8002, "cc"))
@@ -1,8 +1,21 @@
 import sys, logging, json, random
-from spyne import Application, rpc, ServiceBase, Unicode
+import numpy as np
+from spyne import Application, rpc, ServiceBase, Unicode, Fault
 from spyne.protocol.soap import Soap11
 from spyne.server.wsgi import WsgiApplication
-from spyne.util.wsgi_wrapper import run_twisted
+
+try:
+    from services.numeric import round2
+    from services.hosting import serve
+    from services.metrics import instrument
+    from services.tracing import trace
+    from services.contracts import DecisionInput, Decision, as_dict
+except ModuleNotFoundError:
+    from numeric import round2
+    from hosting import serve
+    from metrics import instrument
+    from tracing import trace
+    from contracts import DecisionInput, Decision, as_dict
 
 logging.basicConfig(level=logging.INFO)
 
@@ -105,39 +118,40 @@ def analyze_risk(data):
     }
 
 
-def apply_policies(risk_data):
-    """Apply institutional rules and return detailed reasoning."""
+def apply_policies(risk_data, policy=None):
+    """Apply institutional rules (POLICY unless another policy is given) and return detailed reasoning."""
+    policy = policy or POLICY
     approved = True
     reasons = []
     recommendations = []
 
     # --- Credit score policy ---
-    if risk_data["credit_score"] < POLICY["min_credit_score"]:
+    if risk_data["credit_score"] < policy["min_credit_score"]:
         approved = False
         reasons.append(
-            f"Credit score ({risk_data['credit_score']}) is below the minimum threshold ({POLICY['min_credit_score']})."
+            f"Credit score ({risk_data['credit_score']}) is below the minimum threshold ({policy['min_credit_score']})."
         )
         recommendations.append(
             "Improve your credit score by paying bills on time, reducing outstanding debts, and avoiding new credit requests."
         )
 
     # --- Loan-to-value policy ---
-    if risk_data["loan_to_value"] > POLICY["max_loan_to_value"]:
+    if risk_data["loan_to_value"] > policy["max_loan_to_value"]:
         approved = False
         reasons.append(
-            f"Loan-to-Value ratio ({risk_data['loan_to_value']:.2f}) exceeds the acceptable limit ({POLICY['max_loan_to_value']})."
+            f"Loan-to-Value ratio ({risk_data['loan_to_value']:.2f}) exceeds the acceptable limit ({policy['max_loan_to_value']})."
         )
         recommendations.append(
             "Increase your down payment or consider a lower loan amount to improve your loan-to-value ratio."
         )
 
     # --- Debt-to-income policy ---
-    if risk_data["debt_to_income"] > POLICY["max_debt_to_income"]:
+    if risk_data["debt_to_income"] > policy["max_debt_to_income"]:
         # Only critical if ratio > 0.6 (less strict for mid-range cases)
         if risk_data["debt_to_income"] > 0.6:
             approved = False
         reasons.append(
-            f"Debt-to-Income ratio ({risk_data['debt_to_income']:.2f}) is higher than the recommended maximum ({POLICY['max_debt_to_income']})."
+            f"Debt-to-Income ratio ({risk_data['debt_to_income']:.2f}) is higher than the recommended maximum ({policy['max_debt_to_income']})."
         )
         recommendations.append(
             "Try to increase your income or reduce your monthly expenses to improve your debt ratio."
@@ -162,7 +176,7 @@ def apply_policies(risk_data):
         )
 
     # --- Interest rate calculation (risk-based pricing) ---
-    base_rate = POLICY["base_interest_rate"]
+    base_rate = policy["base_interest_rate"]
     # More moderate slope for interest rate changes
     risk_adjustment = (100 - risk_data["risk_score"]) / 25
     interest_rate = round(base_rate + risk_adjustment, 2)
@@ -175,10 +189,138 @@ def apply_policies(risk_data):
     return approved, reasons, recommendations, interest_rate
 
 
+# ---------------------------------------------------------------------
+# Vectorized Decision Engine (what-if simulations over the decision history)
+# ---------------------------------------------------------------------
+
+# Reason codes (bit flags): one bit per rule that produced a reason in apply_policies
+REASON_CREDIT_SCORE = 1
+REASON_LOAN_TO_VALUE = 2
+REASON_DEBT_TO_INCOME = 4
+REASON_RISK_SCORE = 8
+REASON_EMPLOYMENT = 16
+
+REASON_NAMES = {
+    REASON_CREDIT_SCORE: "credit_score",
+    REASON_LOAN_TO_VALUE: "loan_to_value",
+    REASON_DEBT_TO_INCOME: "debt_to_income",
+    REASON_RISK_SCORE: "risk_score",
+    REASON_EMPLOYMENT: "employment",
+}
+
+
+def _ratio(numerator, denominator):
+    """numerator / denominator where denominator > 0, else 1 (as in analyze_risk)."""
+    return np.divide(numerator, denominator, out=np.ones_like(numerator), where=denominator > 0)
+
+
+def analyze_risk_columns(credit_score, property_value, loan_amount, revenu_mensuel,
+                         depenses_mensuelles, emploi_stable):
+    """
+    Vectorized analyze_risk: takes one array per input field and returns a dict of arrays
+    with the same keys and (rounded) values as analyze_risk, row by row.
+    """
+    credit_score = np.asarray(credit_score, dtype=np.float64)
+    property_value = np.asarray(property_value, dtype=np.float64)
+    loan_amount = np.asarray(loan_amount, dtype=np.float64)
+    income = np.asarray(revenu_mensuel, dtype=np.float64)
+    expenses = np.asarray(depenses_mensuelles, dtype=np.float64)
+    employment_stable = np.asarray(emploi_stable, dtype=bool)
+
+    monthly_savings = np.maximum(0, income - expenses)
+    debt_to_income = _ratio(loan_amount * 0.01, income)
+    loan_to_value = _ratio(loan_amount, property_value)
+
+    risk_score = (
+        (credit_score / 100) * 0.6
+        + (1 - loan_to_value) * 0.2
+        + (1 - np.minimum(debt_to_income, 1)) * 0.15
+        + np.where(employment_stable, 0.05, 0.0)
+    )
+    risk_score = np.clip(risk_score, 0, 1)
+
+    return {
+        "credit_score": credit_score,
+        "loan_amount": loan_amount,
+        "property_value": property_value,
+        "loan_to_value": round2(loan_to_value),
+        "debt_to_income": round2(debt_to_income),
+        "monthly_savings": round2(monthly_savings),
+        "employment_stable": employment_stable,
+        "risk_score": round2(risk_score * 100),
+        "default_probability": round2((1 - risk_score) * 100),
+    }
+
+
+def apply_policies_grid(risk, policies=None):
+    """
+    Vectorized apply_policies for every row of `risk` (output of analyze_risk_columns)
+    and every policy variant in `policies` (list of POLICY-like dicts, default [POLICY]).
+
+    Returns arrays of shape (len(policies), rows):
+    - "approved": approve/reject flags,
+    - "reason_codes": REASON_* bit flags of the rules that produced a reason,
+    - "interest_rate": risk-based interest rates.
+    """
+    policies = policies or [POLICY]
+
+    def column(key):
+        return np.array([p[key] for p in policies], dtype=np.float64)[:, None]
+
+    credit_low = risk["credit_score"] < column("min_credit_score")
+    ltv_high = risk["loan_to_value"] > column("max_loan_to_value")
+    dti_high = risk["debt_to_income"] > column("max_debt_to_income")
+    # Debt-to-income only rejects above 0.6 (less strict for mid-range cases)
+    dti_reject = dti_high & (risk["debt_to_income"] > 0.6)
+    risk_low = np.broadcast_to(risk["risk_score"] < 35, credit_low.shape)
+    unstable = np.broadcast_to(~risk["employment_stable"], credit_low.shape)
+
+    approved = ~(credit_low | ltv_high | dti_reject | risk_low | unstable)
+    reason_codes = (
+        credit_low * REASON_CREDIT_SCORE
+        | ltv_high * REASON_LOAN_TO_VALUE
+        | dti_high * REASON_DEBT_TO_INCOME
+        | risk_low * REASON_RISK_SCORE
+        | unstable * REASON_EMPLOYMENT
+    ).astype(np.uint8)
+    interest_rate = round2(column("base_interest_rate") + (100 - risk["risk_score"]) / 25)
+
+    return {"approved": approved, "reason_codes": reason_codes, "interest_rate": interest_rate}
+
+
 # ---------------------------------------------------------------------
 # Spyne SOAP Service
 # ---------------------------------------------------------------------
 
+def make_decision_data(parsed: dict) -> dict:
+    """Returns the loan approval decision for already-parsed input (JSON-ready dict)."""
+    try:
+        risk_data = analyze_risk(parsed)
+        approved, reasons, recommendations, rate = apply_policies(risk_data)
+
+        decision = {
+            "approved": approved,
+            "interest_rate": rate,
+            "loan_amount": risk_data["loan_amount"],
+            "risk_details": risk_data,
+            "reasons": reasons,
+            "recommendations": recommendations,
+            "message": "✅ Approved" if approved else "❌ Rejected"
+        }
+
+        logging.info(f"[Decision] {decision['message']} | Rate: {rate}%")
+        return decision
+
+    except Exception as e:
+        logging.error(f"[Decision] Error during processing: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+def make_decision_batch_data(items: list) -> list:
+    """Returns one decision per input; each item succeeds or fails on its own."""
+    return [make_decision_data(parsed) for parsed in items]
+
+
 class DecisionService(ServiceBase):
     @rpc(Unicode, _returns=Unicode)
     def make_decision(ctx, data):
@@ -189,27 +331,30 @@ class DecisionService(ServiceBase):
             logging.error(f"[Decision] Invalid JSON: {e}")
             return json.dumps({"status": "error", "message": str(e)})
 
-        try:
-            risk_data = analyze_risk(parsed)
-            approved, reasons, recommendations, rate = apply_policies(risk_data)
-
-            decision = {
-                "approved": approved,
-                "interest_rate": rate,
-                "loan_amount": risk_data["loan_amount"],
-                "risk_details": risk_data,
-                "reasons": reasons,
-                "recommendations": recommendations,
-                "message": "✅ Approved" if approved else "❌ Rejected"
-            }
-
-            logging.info(f"[Decision] {decision['message']} | Rate: {rate}%")
-            return json.dumps(decision, indent=2, ensure_ascii=False)
+        return json.dumps(make_decision_data(parsed), indent=2, ensure_ascii=False)
 
+    @rpc(Unicode, _returns=Unicode)
+    def make_decision_batch(ctx, data):
+        """Receives a JSON list of decision inputs and returns one decision per item."""
+        try:
+            items = json.loads(data)
+            if not isinstance(items, list):
+                raise ValueError("expected a JSON list")
         except Exception as e:
-            logging.error(f"[Decision] Error during processing: {e}")
+            logging.error(f"[Decision] Invalid batch JSON: {e}")
             return json.dumps({"status": "error", "message": str(e)})
 
+        return json.dumps(make_decision_batch_data(items), ensure_ascii=False)
+
+    # --- v2: typed contract (see services/contracts.py) ---
+    @rpc(DecisionInput, _returns=Decision)
+    def make_decision_v2(ctx, data):
+        """Typed make_decision; a processing error is a SOAP fault."""
+        decision = make_decision_data(as_dict(data, DecisionInput, drop_none=True))
+        if decision.get("status") == "error":
+            raise Fault("Server.Decision", decision["message"])
+        return decision
+
 
 # ---------------------------------------------------------------------
 # SOAP Application Setup
@@ -221,6 +366,8 @@ app = Application(
     in_protocol=Soap11(validator='lxml'),
     out_protocol=Soap11()
 )
+instrument(app, "ds")
+trace(app, "ds")
 
 if __name__ == '__main__':
-    sys.exit(run_twisted([(WsgiApplication(app), b'DecisionService')], 8004))
+    sys.exit(serve([(WsgiApplication(app), b'DecisionService')], 8004, "ds"))
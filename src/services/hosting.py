@@ -0,0 +1,158 @@
+"""
+Hébergement Twisted des applications Spyne, en un ou plusieurs processus.
+
+`serve(apps, port, name)` remplace `run_twisted(apps, port)` dans les points d'entrée:
+- 1 worker: le même site que run_twisted, dans ce processus,
+- N workers (POSIX): le processus parent ouvre le port une seule fois puis crée N
+  processus (fork) qui acceptent les connexions sur ce même socket, chacun avec son
+  propre réacteur et son propre GIL. Un worker qui s'arrête est relancé.
+
+Nombre de workers: option --workers, sinon LOAN_WORKERS_<NAME> (ex. LOAN_WORKERS_CC),
+sinon LOAN_WORKERS, sinon 1.
+
+`port` peut aussi être une liste de ports: le même site (toutes les applications) est
+servi sur chacun d'eux, ce qu'utilise host.py pour garder les URL de chaque service.
+
+Chaque site sert aussi /metrics (format texte Prometheus, voir metrics.py).
+"""
+import argparse
+import atexit
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Callable, List, Optional, Tuple, Union
+
+try:
+    from services.metrics import CONTENT_TYPE, REGISTRY
+except ModuleNotFoundError:
+    from metrics import CONTENT_TYPE, REGISTRY
+
+LISTEN_BACKLOG = 128
+
+
+def worker_count(name: str, argv: Optional[List[str]] = None) -> int:
+    """Nombre de workers demandé pour le service `name` (ligne de commande puis environnement)."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--workers", type=int)
+    args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    if args.workers:
+        return args.workers
+    return int(os.environ.get(f"LOAN_WORKERS_{name.upper()}", os.environ.get("LOAN_WORKERS", "1")))
+
+
+def _listen(port: int, interface: str) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((interface, port))
+    sock.listen(LISTEN_BACKLOG)
+    sock.setblocking(False)
+    return sock
+
+
+def _run_worker(apps, socks: List[socket.socket], static_dir: str):
+    """Corps d'un worker: même site que run_twisted, sur les sockets hérités du parent."""
+    import twisted.web.server
+    import twisted.web.static
+    from twisted.web.resource import Resource
+    from twisted.web.wsgi import WSGIResource
+    from twisted.internet import reactor
+
+    class MetricsResource(Resource):
+        isLeaf = True
+
+        def render_GET(self, request):
+            request.setHeader(b"content-type", CONTENT_TYPE.encode("ascii"))
+            return REGISTRY.render().encode("utf-8")
+
+    root = twisted.web.static.File(os.path.abspath(static_dir)) if static_dir is not None else Resource()
+    for app, url, *wrap in apps:
+        resource = WSGIResource(reactor, reactor, app)
+        root.putChild(url, wrap[0](resource) if wrap else resource)
+    root.putChild(b"metrics", MetricsResource())
+
+    site = twisted.web.server.Site(root)
+    for sock in socks:
+        reactor.adoptStreamPort(sock.fileno(), socket.AF_INET, site)
+        sock.close()  # adoptStreamPort garde sa propre copie du descripteur
+    return reactor.run()
+
+
+def serve(apps: List[Tuple], port: Union[int, List[int]], name: str = "", workers: Optional[int] = None,
+          on_start: Optional[Callable[[int], None]] = None, static_dir: str = ".",
+          interface: str = "0.0.0.0"):
+    """
+    Sert `apps` (liste de (WsgiApplication, url)) sur `port` avec `workers` processus.
+    Un troisième élément optionnel `wrap(resource)` remplace la ressource WSGI de
+    l'application par une ressource qui l'enveloppe (créée dans chaque worker).
+    `on_start(index)` est appelé dans chaque worker (index 0..N-1) avant de servir, pour
+    ce qui ne doit pas traverser un fork (threads, connexions).
+    """
+    workers = worker_count(name) if workers is None else workers
+    ports = [port] if isinstance(port, int) else list(port)
+    if workers > 1 and not hasattr(os, "fork"):
+        logging.warning(f"[Hosting] {name}: pre-fork workers need os.fork, running a single process")
+        workers = 1
+    if workers <= 1:
+        if on_start:
+            on_start(0)
+        socks = [_listen(p, interface) for p in ports]
+        logging.info(f"[Hosting] {name}: listening on {interface}:{', '.join(map(str, ports))}")
+        return _run_worker(apps, socks, static_dir)
+
+    socks = [_listen(p, interface) for p in ports]
+    logging.info(f"[Hosting] {name}: listening on {interface}:{', '.join(map(str, ports))} with {workers} workers")
+    children = {}  # pid -> index du worker
+    stopping = False
+
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            REGISTRY.const_labels["worker"] = str(index)
+            try:
+                if on_start:
+                    on_start(index)
+                _run_worker(apps, socks, static_dir)
+                code = 0
+            except Exception:
+                logging.exception(f"[Hosting] {name}: worker {index} failed")
+                code = 1
+            # os._exit saute atexit: on vide quand même ce qui doit l'être (notifications en file...)
+            atexit._run_exitfuncs()
+            os._exit(code)
+        children[pid] = index
+        logging.info(f"[Hosting] {name}: worker {index} started (PID: {pid})")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for index in range(workers):
+        spawn(index)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index = children.pop(pid, None)
+        if index is not None and not stopping:
+            logging.warning(f"[Hosting] {name}: worker {index} (PID: {pid}) exited with status {status}, restarting")
+            time.sleep(0.5)
+            spawn(index)
+    for sock in socks:
+        sock.close()
+    return 0
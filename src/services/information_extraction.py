@@ -1,76 +1,178 @@
 import sys, logging, re, json
-from spyne import Application, rpc, ServiceBase, Unicode
+from spyne import Application, rpc, ServiceBase, Unicode, Fault
 from spyne.protocol.soap import Soap11
 from spyne.server.wsgi import WsgiApplication
-from spyne.util.wsgi_wrapper import run_twisted
+
+try:
+    from services.hosting import serve
+    from services.metrics import instrument
+    from services.tracing import trace
+    from services.contracts import ExtractedInfo
+except ModuleNotFoundError:
+    from hosting import serve
+    from metrics import instrument
+    from tracing import trace
+    from contracts import ExtractedInfo
 
 logging.basicConfig(level=logging.INFO)
 
 def clean_text(text: str) -> str:
     """Remove extra spaces and normalize common characters."""
-    return re.sub(r'\s+', ' ', text.replace('\n', ' ')).strip()
+    # str.split() splits on the same whitespace as \s (str.isspace), without going through re
+    return " ".join(text.split())
 
 
-class InformationExtractionService(ServiceBase):
-    @rpc(Unicode, _returns=Unicode)
-    def extract_information(ctx, text):
-        """Extract structured info from a raw loan request text."""
-        if not text or not isinstance(text, str):
-            return json.dumps({"error": "Empty or invalid input."})
-
-        text = clean_text(text)
-        logging.info(f"[IE] Received request text: {text[:80]}...")
-
-        # --- Regex patterns for basic NLP-like extraction ---
-        patterns = {
-            "nom": r"(?:Nom du Client|Nom)\s*:\s*([A-Za-zÀ-ÿ'\-\s]+)",
-            "adresse": r"(?:Adresse|Adresse du Bien)\s*:\s*(.*?)(?=\s*(?:Email|Montant|$))",
-            "email": r"(?:Email|Courriel)\s*:\s*([\w\.-]+@[\w\.-]+\.\w+)",
-            "telephone": r"(?:Numéro de Téléphone|Téléphone)\s*:\s*([\d\+\-\s]+)",
-            "montant_pret": r"(?:Montant du Prêt Demandé|Montant)\s*:\s*([\d\s]+)",
-            "revenu_mensuel": r"(?:Revenu Mensuel|Revenu)\s*:\s*([\d\s]+)",
-            "depenses_mensuelles": r"(?:Dépenses Mensuelles|Dépenses)\s*:\s*([\d\s]+)",
-            "description": r"(?:Description de la Propriété|Description)\s*:\s*(.*)"
+# ---------------------------------------------------------------------
+# Extraction engine (compiled once at import)
+# ---------------------------------------------------------------------
+
+# (field, label alternatives, value pattern) — same rules as the original per-field regexes
+FIELDS = [
+    ("nom", "Nom du Client|Nom", r"([A-Za-zÀ-ÿ'\-\s]+)"),
+    ("adresse", "Adresse|Adresse du Bien", r"(.*?)(?=\s*(?:Email|Montant|$))"),
+    ("email", "Email|Courriel", r"([\w\.-]+@[\w\.-]+\.\w+)"),
+    ("telephone", "Numéro de Téléphone|Téléphone", r"([\d\+\-\s]+)"),
+    ("montant_pret", "Montant du Prêt Demandé|Montant", r"([\d\s]+)"),
+    ("revenu_mensuel", "Revenu Mensuel|Revenu", r"([\d\s]+)"),
+    ("depenses_mensuelles", "Dépenses Mensuelles|Dépenses", r"([\d\s]+)"),
+    ("description", "Description de la Propriété|Description", r"(.*)"),
+]
+
+NUMERIC_FIELDS = {"montant_pret", "revenu_mensuel", "depenses_mensuelles"}
+
+DEFAULTS = {
+    "nom": "Inconnu",
+    "adresse": "Non spécifiée",
+    "email": "unknown@email.com",
+    "telephone": "N/A",
+    "montant_pret": 0.0,
+    "revenu_mensuel": 0.0,
+    "depenses_mensuelles": 0.0,
+    "description": "Aucune description fournie"
+}
+
+
+class ExtractionEngine:
+    """
+    Single-pass field extractor.
+    Every label is followed by ":", so the text is scanned once for colons, and a single
+    anchored regex on the reversed text tells which field label (if any) ends before each one.
+    Each field's full pattern is then only tried at the positions of its own labels, which
+    yields the same first match as a separate re.search per field.
+    """
+
+    def __init__(self, fields, defaults):
+        self.fields = [key for key, _, _ in fields]
+        self.defaults = defaults
+        # Labels are plain text: reversed, longest alternative first, read from the colon backwards
+        self.reversed_labels = re.compile(r":\s*(?:" + "|".join(
+            f"(?P<{key}>" + "|".join(label[::-1] for label in sorted(labels.split("|"), key=len, reverse=True)) + ")"
+            for key, labels, _ in fields
+        ) + ")", re.IGNORECASE)
+        self.patterns = {
+            key: re.compile(rf"(?:{labels})\s*:\s*{value}", re.IGNORECASE)
+            for key, labels, value in fields
         }
 
-        data = {}
+    def label_positions(self, text: str) -> dict:
+        """{field: [start of each "Label :" occurrence, in text order]}"""
+        hits = {}
+        reversed_text = text[::-1]
+        end = len(text) - 1
+        colon = text.find(":")
+        while colon != -1:
+            label = self.reversed_labels.match(reversed_text, end - colon)
+            if label:
+                hits.setdefault(label.lastgroup, []).append(len(text) - label.end())
+            colon = text.find(":", colon + 1)
+        return hits
+
+    def extract(self, text: str) -> dict:
+        """Extract typed fields from an already cleaned text (see clean_text)."""
+        hits = self.label_positions(text)
 
-        # --- Extract data using regex ---
-        for key, pat in patterns.items():
-            match = re.search(pat, text, re.IGNORECASE)
-            if match:
-                value = clean_text(match.group(1))
-                if key in ["montant_pret", "revenu_mensuel", "depenses_mensuelles"]:
-                    try:
-                        value = float(value.replace(" ", "").replace(",", "."))
-                    except ValueError:
-                        value = 0.0
-                data[key] = value
+        data = {}
+        for key in self.fields:
+            pattern = self.patterns[key]
+            for pos in hits.get(key, ()):
+                match = pattern.match(text, pos)
+                if match:
+                    value = match.group(1).strip()
+                    if key in NUMERIC_FIELDS:
+                        try:
+                            value = float(value.replace(" ", "").replace(",", "."))
+                        except ValueError:
+                            value = 0.0
+                    data[key] = value
+                    break
             else:
                 logging.warning(f"[IE] Missing value for: {key}")
 
         # --- Fill default values for missing keys ---
-        defaults = {
-            "nom": "Inconnu",
-            "adresse": "Non spécifiée",
-            "email": "unknown@email.com",
-            "telephone": "N/A",
-            "montant_pret": 0.0,
-            "revenu_mensuel": 0.0,
-            "depenses_mensuelles": 0.0,
-            "description": "Aucune description fournie"
-        }
-        for key, default in defaults.items():
+        for key, default in self.defaults.items():
             data.setdefault(key, default)
+        return data
+
+
+ENGINE = ExtractionEngine(FIELDS, DEFAULTS)
 
-        # --- Derived or enriched data ---
-        # You could later add postal code extraction, or city inference here.
-        data["texte_original"] = text[:500]  # Keep small snippet for reference
+
+def extract_information_data(text: str) -> dict:
+    """Extract structured info from a raw loan request text (returns a JSON-ready dict)."""
+    if not text or not isinstance(text, str):
+        return {"error": "Empty or invalid input."}
+
+    text = clean_text(text)
+    logging.info(f"[IE] Received request text: {text[:80]}...")
+
+    data = ENGINE.extract(text)
+
+    # --- Derived or enriched data ---
+    # You could later add postal code extraction, or city inference here.
+    data["texte_original"] = text[:500]  # Keep small snippet for reference
+    return data
+
+
+def extract_information_batch_data(texts: list) -> list:
+    """Extract structured info from many texts; each item succeeds or fails on its own."""
+    return [extract_information_data(text) for text in texts]
+
+
+class InformationExtractionService(ServiceBase):
+    @rpc(Unicode, _returns=Unicode)
+    def extract_information(ctx, text):
+        """Extract structured info from a raw loan request text."""
+        data = extract_information_data(text)
+        if "error" in data:
+            return json.dumps(data)
 
         result = json.dumps(data, indent=2, ensure_ascii=False)
-        logging.info(f"[IE] Extracted info: {result}")
+        logging.debug(f"[IE] Extracted info: {result}")
         return result
 
+    @rpc(Unicode, _returns=Unicode)
+    def extract_information_batch(ctx, texts):
+        """Extract structured info from a JSON list of raw loan request texts (one result per text)."""
+        try:
+            items = json.loads(texts)
+            if not isinstance(items, list):
+                raise ValueError("expected a JSON list")
+        except Exception as e:
+            return json.dumps({"error": f"Invalid batch: {e}"})
+
+        results = extract_information_batch_data(items)
+        logging.info(f"[IE] Extracted {len(results)} batch items")
+        return json.dumps(results, ensure_ascii=False)
+
+    # --- v2: typed contract (see services/contracts.py) ---
+    @rpc(Unicode, _returns=ExtractedInfo)
+    def extract_information_v2(ctx, text):
+        """Typed extract_information (texte_original is not sent back); invalid input is a SOAP fault."""
+        data = extract_information_data(text)
+        if "error" in data:
+            raise Fault("Client.InvalidInput", data["error"])
+        return data
+
 
 # --- SOAP Application Setup ---
 app = Application(
@@ -79,6 +181,8 @@ app = Application(
     in_protocol=Soap11(validator='lxml'),
     out_protocol=Soap11()
 )
+instrument(app, "ie")
+trace(app, "ie")
 
 if __name__ == '__main__':
-    sys.exit(run_twisted([(WsgiApplication(app), b'InformationExtractionService')], 8001))
+    sys.exit(serve([(WsgiApplication(app), b'InformationExtractionService')], 8001, "ie"))
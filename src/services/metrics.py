@@ -0,0 +1,295 @@
+"""
+Métriques des services au format texte Prometheus (servies sur /metrics par hosting.py):
+- histogrammes de latence par opération SOAP et par étape du composite,
+- compteurs de requêtes et d'erreurs, jauges des requêtes en cours.
+
+`instrument(app, service)` branche les compteurs d'opération sur les événements de
+l'application Spyne (method_call / method_return_object / method_exception_object), sans
+toucher aux méthodes. Coût sur le chemin chaud: deux perf_counter et quelques additions
+sous verrou par appel. LOAN_METRICS=0 désactive l'instrumentation.
+
+Chaque processus a son propre registre: avec plusieurs workers (hosting.py), une lecture
+de /metrics donne les valeurs du worker qui a répondu (label `worker`).
+"""
+import json
+import os
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Sequence, Tuple
+
+METRICS_ENABLED = os.environ.get("LOAN_METRICS", "1").lower() not in ("0", "false", "no")
+
+# Bornes (secondes) des histogrammes de latence: de 0,5 ms à 10 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Métrique et ses séries par valeurs de labels; `new_child()` crée une série vide."""
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], new_child: Callable[[], object]):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._new_child = new_child
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Série correspondant aux valeurs de labels (créée au premier appel)."""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self, const: str) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._samples(values, child, const))
+        return lines
+
+
+class _Value:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self.lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels, _Value)
+
+    def _samples(self, values, child, const):
+        return [f"{self.name}{_format_labels(self.label_names, values, const)} {_format_value(child.value)}"]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum", "lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # dernier: au-delà de la plus grande borne
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labels, lambda: _Buckets(self.buckets))
+
+    def _samples(self, values, child, const):
+        with child.lock:
+            counts, total = list(child.counts), child.sum
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, values, _join(const, le))} {cumulative}")
+        labels = _format_labels(self.label_names, values, const)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def _join(*pairs: str) -> str:
+    return ",".join(p for p in pairs if p)
+
+
+class Registry:
+    """Ensemble des métriques d'un processus, rendu au format texte Prometheus."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._callbacks: List[Tuple[str, str, Callable[[], float]]] = []
+        self._lock = threading.Lock()
+        self.const_labels: Dict[str, str] = {}
+
+    def _register(self, cls, name, help_text, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labels, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, labels, buckets=buckets)
+
+    def gauge_callback(self, name: str, help_text: str, func: Callable[[], float]):
+        """Jauge lue à chaque rendu (profondeur d'une file, ...)."""
+        with self._lock:
+            self._callbacks = [c for c in self._callbacks if c[0] != name] + [(name, help_text, func)]
+
+    def render(self) -> str:
+        const = ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(self.const_labels.items()))
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render(const))
+        for name, help_text, func in list(self._callbacks):
+            try:
+                value = func()
+            except Exception:
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge",
+                      f"{name}{'{' + const + '}' if const else ''} {_format_value(value)}"]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+OPERATION_SECONDS = REGISTRY.histogram(
+    "loan_operation_seconds", "SOAP operation latency (method call, without (de)serialization)",
+    ("service", "operation"))
+OPERATION_REQUESTS = REGISTRY.counter(
+    "loan_operation_requests_total", "SOAP operation calls", ("service", "operation"))
+OPERATION_ERRORS = REGISTRY.counter(
+    "loan_operation_errors_total", "SOAP operation calls that raised a fault or returned an error status",
+    ("service", "operation"))
+OPERATION_IN_FLIGHT = REGISTRY.gauge(
+    "loan_operation_in_flight", "SOAP operation calls in progress", ("service", "operation"))
+STAGE_SECONDS = REGISTRY.histogram(
+    "loan_stage_seconds", "Composite pipeline stage latency", ("pipeline", "stage"))
+STAGE_ERRORS = REGISTRY.counter(
+    "loan_stage_errors_total", "Composite pipeline stages that raised", ("pipeline", "stage"))
+
+
+def _is_error_response(out: str) -> bool:
+    """
+    Réponse JSON d'une opération historique qui signale une erreur sans lever de fault:
+    {"status": "error", ...} ou {"error": ...}, compacte ou indentée. Le JSON n'est lu que si
+    la chaîne contient "error" (les réponses normales n'en paient pas le coût).
+    """
+    if '"error"' not in out:
+        return False
+    try:
+        data = json.loads(out)
+    except ValueError:
+        return False
+    return isinstance(data, dict) and (data.get("status") == "error" or "error" in data)
+
+
+def udc(ctx) -> SimpleNamespace:
+    """Données propres à l'appel (Spyne n'accepte pas d'attributs libres sur le contexte)."""
+    if ctx.udc is None:
+        ctx.udc = SimpleNamespace()
+    return ctx.udc
+
+
+def instrument(app, service: str):
+    """Compte et chronomètre chaque opération de l'application Spyne `app`."""
+    if not METRICS_ENABLED:
+        return app
+    metrics = (OPERATION_SECONDS, OPERATION_REQUESTS, OPERATION_ERRORS, OPERATION_IN_FLIGHT)
+    series = {}  # nom de méthode -> (histogramme, requêtes, erreurs, en cours)
+
+    def on_call(ctx):
+        name = ctx.method_name
+        s = series.get(name)
+        if s is None:
+            s = series[name] = tuple(m.labels(service, name) for m in metrics)
+        s[3].inc()
+        udc(ctx).metrics = (s, perf_counter())
+
+    def on_return(ctx):
+        s, start = ctx.udc.metrics
+        s[0].observe(perf_counter() - start)
+        s[1].inc()
+        s[3].dec()
+        out = ctx.out_object[0] if ctx.out_object else None
+        if isinstance(out, str) and _is_error_response(out):
+            s[2].inc()
+
+    def on_exception(ctx):
+        state = getattr(ctx.udc, "metrics", None)
+        if state is None:
+            return  # erreur avant l'appel de la méthode (requête invalide)
+        s, start = state
+        s[0].observe(perf_counter() - start)
+        s[1].inc()
+        s[2].inc()
+        s[3].dec()
+
+    app.event_manager.add_listener("method_call", on_call)
+    app.event_manager.add_listener("method_return_object", on_return)
+    app.event_manager.add_listener("method_exception_object", on_exception)
+    return app
+
+
+def observe_stage(pipeline: str, stage: str, seconds: float, failed: bool = False):
+    """Enregistre la durée d'une étape du composite (ie, cc, pe, ds, store, notify)."""
+    if not METRICS_ENABLED:
+        return
+    STAGE_SECONDS.labels(pipeline, stage).observe(seconds)
+    if failed:
+        STAGE_ERRORS.labels(pipeline, stage).inc()
+
+
+class timed:
+    """Context manager: `with timed("request", "store"): ...` chronomètre une étape."""
+
+    __slots__ = ("pipeline", "stage", "start")
+
+    def __init__(self, pipeline: str, stage: str):
+        self.pipeline = pipeline
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe_stage(self.pipeline, self.stage, perf_counter() - self.start, exc_type is not None)
+        return False
@@ -0,0 +1,19 @@
+"""
+Outils numériques partagés par les moteurs vectorisés des services.
+"""
+import numpy as np
+
+
+def round2(values: np.ndarray) -> np.ndarray:
+    """
+    Équivalent vectorisé de round(x, 2) sur des floats Python, pour un tableau de toute forme.
+    np.round (rint(x*100)/100) ne diffère de round() qu'autour des demi-centièmes, où
+    l'erreur de x*100 peut changer le sens de l'arrondi: ces rares cas sont arrondis par round().
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 100
+    rounded = np.rint(scaled) / 100
+    frac = np.abs(scaled - np.floor(scaled) - 0.5)
+    for i in np.flatnonzero(frac < 1e-9 * np.maximum(1, np.abs(scaled))):
+        rounded.flat[i] = round(float(values.flat[i]), 2)
+    return rounded
@@ -1,8 +1,18 @@
 import sys, logging, json, random
-from spyne import Application, rpc, ServiceBase, Unicode
+from spyne import Application, rpc, ServiceBase, Unicode, Fault
 from spyne.protocol.soap import Soap11
 from spyne.server.wsgi import WsgiApplication
-from spyne.util.wsgi_wrapper import run_twisted
+
+try:
+    from services.hosting import serve
+    from services.metrics import instrument
+    from services.tracing import trace
+    from services.contracts import Applicant, PropertyResult, as_dict
+except ModuleNotFoundError:
+    from hosting import serve
+    from metrics import instrument
+    from tracing import trace
+    from contracts import Applicant, PropertyResult, as_dict
 
 logging.basicConfig(level=logging.INFO)
 
@@ -107,6 +117,26 @@ def evaluate_property_value(data: dict) -> (float, dict):
 # Spyne SOAP Service
 # ---------------------------------------------------------------------
 
+def evaluate_property_data(parsed: dict) -> dict:
+    """Returns the full property evaluation result (JSON-ready dict)."""
+    try:
+        value, details = evaluate_property_value(parsed)
+        result = {
+            "property_value": value,
+            "details": details
+        }
+        logging.info(f"[PropertyEval] Estimated value: {value} € for region {details['region']}")
+        return result
+    except Exception as e:
+        logging.error(f"[PropertyEval] Error: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+def evaluate_property_batch_data(items: list) -> list:
+    """Evaluates many properties; each item succeeds or fails on its own."""
+    return [evaluate_property_data(parsed) for parsed in items]
+
+
 class PropertyEvaluationService(ServiceBase):
     @rpc(Unicode, _returns=Unicode)
     def evaluate_property(ctx, data):
@@ -116,17 +146,28 @@ class PropertyEvaluationService(ServiceBase):
         except Exception:
             parsed = {"description": data}
 
+        return json.dumps(evaluate_property_data(parsed), indent=2, ensure_ascii=False)
+
+    @rpc(Unicode, _returns=Unicode)
+    def evaluate_property_batch(ctx, data):
+        """Receives a JSON list of properties and returns one estimation per item."""
         try:
-            value, details = evaluate_property_value(parsed)
-            result = {
-                "property_value": value,
-                "details": details
-            }
-            logging.info(f"[PropertyEval] Estimated value: {value} € for region {details['region']}")
-            return json.dumps(result, indent=2, ensure_ascii=False)
+            items = json.loads(data)
+            if not isinstance(items, list):
+                raise ValueError("expected a JSON list")
         except Exception as e:
-            logging.error(f"[PropertyEval] Error: {e}")
-            return json.dumps({"status": "error", "message": str(e)})
+            return json.dumps({"status": "error", "message": f"Invalid JSON: {e}"})
+
+        return json.dumps(evaluate_property_batch_data(items), ensure_ascii=False)
+
+    # --- v2: typed contract (see services/contracts.py) ---
+    @rpc(Applicant, _returns=PropertyResult)
+    def evaluate_property_v2(ctx, applicant):
+        """Typed evaluate_property; an evaluation error is a SOAP fault."""
+        result = evaluate_property_data(as_dict(applicant, Applicant, drop_none=True))
+        if result.get("status") == "error":
+            raise Fault("Server.PropertyEvaluation", result["message"])
+        return result
 
 
 # ---------------------------------------------------------------------
@@ -138,6 +179,8 @@ app = Application(
     in_protocol=Soap11(validator='lxml'),
     out_protocol=Soap11()
 )
+instrument(app, "pe")
+trace(app, "pe")
 
 if __name__ == '__main__':
-    sys.exit(run_twisted([(WsgiApplication(app), b'PropertyEvaluationService')], 8003))
+    sys.exit(serve([(WsgiApplication(app), b'PropertyEvaluationService')], 8003, "pe"))
@@ -0,0 +1,85 @@
+"""
+Rendu en cascade (waterfall) des requêtes les plus lentes du fichier de traces
+(services/tracing.py): une ligne par span, indentée sous son parent, avec une barre
+placée sur l'axe du temps de la requête.
+
+Usage:
+    python services/trace_report.py                     # 5 traces les plus lentes
+    python services/trace_report.py --top 10 --width 80
+    python services/trace_report.py --request REQ_01JAB3Z9Q8N4W6X2C5V7T0RKHM
+"""
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from tracing import TRACE_FILE  # noqa: E402
+
+
+def load(path):
+    """Spans du fichier regroupés par trace: {trace_id: [span, ...]} (lignes invalides ignorées)."""
+    traces = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                span = json.loads(line)
+            except ValueError:
+                continue  # ligne tronquée (processus arrêté pendant une écriture)
+            traces[span["traceId"]].append(span)
+    return traces
+
+
+def duration_ns(spans):
+    return max(s["endTimeUnixNano"] for s in spans) - min(s["startTimeUnixNano"] for s in spans)
+
+
+def request_id(spans):
+    return next((s["attributes"]["request_id"] for s in spans if s["attributes"].get("request_id")), "-")
+
+
+def render(trace_id, spans, width=60):
+    """Lignes de la cascade d'une trace."""
+    t0 = min(s["startTimeUnixNano"] for s in spans)
+    total = max(duration_ns(spans), 1)
+    ids = {s["spanId"] for s in spans}
+    children = defaultdict(list)
+    for s in spans:
+        # Parent absent du fichier (service non tracé, span non échantillonné): affiché en racine
+        children[s["parentSpanId"] if s["parentSpanId"] in ids else ""].append(s)
+
+    lines = [f"trace {trace_id}  request {request_id(spans)}  {total / 1e6:.1f} ms  ({len(spans)} spans)"]
+
+    def walk(parent, depth):
+        for s in sorted(children[parent], key=lambda s: s["startTimeUnixNano"]):
+            start = (s["startTimeUnixNano"] - t0) / total * width
+            length = max(1, round((s["endTimeUnixNano"] - s["startTimeUnixNano"]) / total * width))
+            bar = " " * int(start) + ("!" if s["status"] == "error" else "█") * length
+            label = f"{'  ' * depth}{s['service']}:{s['name']}"
+            ms = (s["endTimeUnixNano"] - s["startTimeUnixNano"]) / 1e6
+            lines.append(f"  {label:<36}{ms:9.2f} ms  |{bar:<{width}}|")
+            walk(s["spanId"], depth + 1)
+
+    walk("", 0)
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Waterfall of the slowest traced requests")
+    parser.add_argument("--file", default=TRACE_FILE)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--width", type=int, default=60)
+    parser.add_argument("--request", help="show the trace(s) of this request_id only")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        sys.exit(f"No trace file at {args.file}")
+    traces = load(args.file)
+    if args.request:
+        selected = [t for t, spans in traces.items() if request_id(spans) == args.request]
+    else:
+        selected = sorted(traces, key=lambda t: duration_ns(traces[t]), reverse=True)[:args.top]
+    print(f"{len(traces)} traces in {args.file}\n")
+    for trace_id in selected:
+        print("\n".join(render(trace_id, traces[trace_id], args.width)) + "\n")
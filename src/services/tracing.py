@@ -0,0 +1,297 @@
+"""
+Traces de bout en bout: le contexte de trace (trace_id, span parent, request_id) passe du
+composite aux services dans un en-tête SOAP, et chaque service enregistre ses spans dans
+un fichier JSONL (un span par ligne, champs à la OTLP-JSON):
+
+    {"traceId", "spanId", "parentSpanId", "name", "service", "startTimeUnixNano",
+     "endTimeUnixNano", "status", "attributes": {"request_id": ...}}
+
+En-tête SOAP (optionnel, ignoré par les anciens services, absent du WSDL):
+
+    <lt:TraceContext xmlns:lt="loan.trace">
+      <lt:traceparent>00-<trace_id>-<span_id>-01</lt:traceparent>   (format W3C)
+      <lt:requestId>REQ_...</lt:requestId>
+    </lt:TraceContext>
+
+`trace(app, service)` branche sur l'application Spyne un span serveur par appel, avec
+trois enfants: parse (désérialisation), logic (méthode) et serialize. `span(name)` crée
+un span enfant du span courant (ou une nouvelle trace) dans le code applicatif; le span
+courant suit les threads du pipeline (contextvars). Les lignes de log émises pendant un
+appel tracé sont préfixées par le request_id.
+
+LOAN_TRACE=0 désactive les traces, LOAN_TRACE_SAMPLE (0..1) n'en écrit qu'une partie,
+LOAN_TRACE_FILE choisit le fichier (logs/traces.jsonl par défaut).
+Rendu des requêtes les plus lentes: python services/trace_report.py
+"""
+import atexit
+import contextvars
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    from services.metrics import udc
+except ModuleNotFoundError:
+    from metrics import udc
+
+TRACE_ENABLED = os.environ.get("LOAN_TRACE", "1").lower() not in ("0", "false", "no")
+TRACE_SAMPLE = float(os.environ.get("LOAN_TRACE_SAMPLE", "1.0"))
+TRACE_FILE = os.environ.get(
+    "LOAN_TRACE_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs", "traces.jsonl"))
+
+HEADER_NS = "loan.trace"
+HEADER_NAME = "TraceContext"
+
+
+class Trace:
+    """Données partagées par tous les spans d'une trace dans ce processus."""
+
+    __slots__ = ("trace_id", "request_id", "sampled")
+
+    def __init__(self, trace_id: str, request_id: Optional[str] = None, sampled: bool = True):
+        self.trace_id = trace_id
+        self.request_id = request_id
+        self.sampled = sampled
+
+
+class SpanContext:
+    __slots__ = ("trace", "span_id")
+
+    def __init__(self, trace: Trace, span_id: str):
+        self.trace = trace
+        self.span_id = span_id
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace.trace_id}-{self.span_id}-{'01' if self.trace.sampled else '00'}"
+
+
+_CURRENT: contextvars.ContextVar = contextvars.ContextVar("loan_trace_span", default=None)
+
+
+# Générateur propre au module: indépendant des random.seed() applicatifs, et réinitialisé
+# dans chaque worker forké (pas d'identifiants en double entre workers)
+_RNG = random.Random()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_RNG.seed)
+
+
+def _new_id(size: int) -> str:
+    return f"{_RNG.getrandbits(size * 8):0{size * 2}x}"
+
+
+def new_trace(request_id: Optional[str] = None) -> Trace:
+    return Trace(_new_id(16), request_id, TRACE_SAMPLE >= 1 or _RNG.random() < TRACE_SAMPLE)
+
+
+def current() -> Optional[SpanContext]:
+    return _CURRENT.get()
+
+
+def set_request_id(request_id: str):
+    """Associe `request_id` à la trace courante (spans déjà ouverts compris)."""
+    ctx = _CURRENT.get()
+    if ctx is not None:
+        ctx.trace.request_id = request_id
+
+
+def current_request_id() -> Optional[str]:
+    ctx = _CURRENT.get()
+    return ctx.trace.request_id if ctx is not None else None
+
+
+# ---------------------------------------------------------------------
+# Écriture des spans
+# ---------------------------------------------------------------------
+class SpanWriter:
+    """
+    File de spans écrite par un thread toutes les `interval` secondes (et à l'arrêt du
+    processus): sur le chemin de la requête, un span ne coûte qu'un append. Chaque lot
+    est ajouté au fichier par un seul write en O_APPEND (fichier partagé entre processus).
+    """
+
+    def __init__(self, path: str, interval: float = 0.5):
+        self.path = path
+        self.interval = interval
+        self._spans = deque()
+        self._lock = threading.Lock()
+        self._pid = None
+        atexit.register(self.flush)
+
+    def write(self, *spans: tuple):
+        if self._pid != os.getpid():
+            self._start()
+        self._spans.extend(spans)
+
+    def _start(self):
+        # Un thread par processus (après un fork, celui du parent n'existe plus)
+        with self._lock:
+            if self._pid != os.getpid():
+                self._spans = deque()
+                threading.Thread(target=self._run, name="trace-writer", daemon=True).start()
+                self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            spans = []
+            while self._spans:
+                spans.append(self._spans.popleft())
+        if spans:
+            self._append([_format(*span) for span in spans])
+
+    def _append(self, lines):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, ("\n".join(lines) + "\n").encode("utf-8"))
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logging.warning(f"[Trace] Could not write {len(lines)} spans to {self.path}: {e}")
+
+
+def _format(trace, span_id, parent_id, name, service, start_ns, end_ns, error, attributes):
+    attributes = dict(attributes or ())
+    if trace.request_id:
+        attributes["request_id"] = trace.request_id
+    # Identifiants hexadécimaux, noms d'opérations et de services: pas d'échappement JSON à faire
+    attrs = ",".join(f'"{key}":{json.dumps(value)}' for key, value in attributes.items())
+    return (f'{{"traceId":"{trace.trace_id}","spanId":"{span_id or _new_id(8)}","parentSpanId":"{parent_id or ""}",'
+            f'"name":"{name}","service":"{service}","startTimeUnixNano":{start_ns},'
+            f'"endTimeUnixNano":{end_ns},"status":"{"error" if error else "ok"}","attributes":{{{attrs}}}}}')
+
+
+WRITER = SpanWriter(TRACE_FILE)
+
+
+def record(trace: Trace, span_id: Optional[str], parent_id: Optional[str], name: str, service: str,
+           start_ns: int, end_ns: int, error: bool = False, attributes: Optional[dict] = None):
+    """Met un span en file (span_id None: identifiant attribué à l'écriture, span sans enfant)."""
+    if trace.sampled:
+        WRITER.write((trace, span_id, parent_id, name, service, start_ns, end_ns, error, attributes))
+
+
+@contextmanager
+def span(name: str, service: str, **attributes):
+    """Span enfant du span courant (ou racine d'une nouvelle trace), courant pendant le bloc."""
+    if not TRACE_ENABLED:
+        yield None
+        return
+    parent = _CURRENT.get()
+    trace = parent.trace if parent is not None else new_trace(attributes.pop("request_id", None))
+    ctx = SpanContext(trace, _new_id(8))
+    token = _CURRENT.set(ctx)
+    start = time.time_ns()
+    error = False
+    try:
+        yield ctx
+    except BaseException:
+        error = True
+        raise
+    finally:
+        _CURRENT.reset(token)
+        record(trace, ctx.span_id, parent.span_id if parent else None, name, service,
+               start, time.time_ns(), error, attributes)
+
+
+# ---------------------------------------------------------------------
+# En-tête SOAP
+# ---------------------------------------------------------------------
+def header_values() -> Optional[dict]:
+    """traceparent et requestId du span courant, à envoyer dans l'en-tête (None hors trace)."""
+    ctx = _CURRENT.get()
+    if ctx is None:
+        return None
+    values = {"traceparent": ctx.traceparent()}
+    if ctx.trace.request_id:
+        values["requestId"] = ctx.trace.request_id
+    return values
+
+
+def _from_header(header_doc) -> Optional[SpanContext]:
+    """Contexte parent lu dans les en-têtes SOAP reçus (éléments lxml), None si absent ou invalide."""
+    for element in header_doc or ():
+        if getattr(element, "tag", None) != f"{{{HEADER_NS}}}{HEADER_NAME}":
+            continue
+        parts = (element.findtext(f"{{{HEADER_NS}}}traceparent") or "").strip().split("-")
+        if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+        request_id = (element.findtext(f"{{{HEADER_NS}}}requestId") or "").strip() or None
+        return SpanContext(Trace(parts[1], request_id, parts[3] == "01"), parts[2])
+    return None
+
+
+# ---------------------------------------------------------------------
+# Instrumentation des applications Spyne
+# ---------------------------------------------------------------------
+class _RequestIdFilter(logging.Filter):
+    """Préfixe les lignes de log émises pendant un appel tracé par son request_id."""
+
+    def filter(self, record):
+        request_id = current_request_id()
+        if request_id and isinstance(record.msg, str):
+            record.msg = f"[{request_id}] {record.msg}"
+        return True
+
+
+_log_filter_installed = False
+
+
+def trace(app, service: str):
+    """Enregistre pour chaque appel de `app` un span serveur et ses étapes parse/logic/serialize."""
+    global _log_filter_installed
+    if not TRACE_ENABLED:
+        return app
+    if not _log_filter_installed:
+        logging.getLogger().addFilter(_RequestIdFilter())
+        _log_filter_installed = True
+
+    def on_call(ctx):
+        parent = _from_header(ctx.in_header_doc)
+        trace_ = parent.trace if parent is not None else new_trace()
+        server = SpanContext(trace_, _new_id(8))
+        logic = SpanContext(trace_, _new_id(8))
+        state = udc(ctx)
+        state.trace = (parent, server, logic, int(ctx.call_start * 1e9), time.time_ns())
+        state.trace_token = _CURRENT.set(logic)
+
+    def on_result(ctx):
+        state = getattr(ctx.udc, "trace", None)
+        if state is None:
+            return
+        ctx.udc.trace = state + (time.time_ns(),)
+        _CURRENT.reset(ctx.udc.trace_token)
+
+    def on_string(ctx, error=False):
+        state = getattr(ctx.udc, "trace", None)
+        if state is None or len(state) < 6:
+            return
+        parent, server, logic, start, called, returned = state
+        t = server.trace
+        if not t.sampled:
+            return
+        end = time.time_ns()
+        sid = server.span_id
+        WRITER.write((t, sid, parent.span_id if parent else None, ctx.method_name, service, start, end, error, None),
+                     (t, None, sid, "parse", service, start, called, False, None),
+                     (t, logic.span_id, sid, "logic", service, called, returned, error, None),
+                     (t, None, sid, "serialize", service, returned, end, False, None))
+
+    events = app.event_manager
+    events.add_listener("method_call", on_call)
+    events.add_listener("method_return_object", on_result)
+    events.add_listener("method_exception_object", on_result)
+    events.add_listener("method_return_string", on_string)
+    events.add_listener("method_exception_string", lambda ctx: on_string(ctx, error=True))
+    return app